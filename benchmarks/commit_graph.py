@@ -0,0 +1,82 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional, Tuple
+
+from git_machete.commit_graph import CommitGraph
+
+from .synthetic_repo import generate_synthetic_repo
+
+# Compares answering merge-base (and hence, is-ancestor) queries from the commit-graph file in-process
+# against running a `git merge-base` subprocess per query, which is what git-machete falls back to without a commit-graph.
+#
+# Usage (from the root of the repository):
+#     python -m benchmarks.commit_graph [--commits 200000] [--branches 100] [--repo-dir DIR]
+
+
+def _time(label: str, queries: List[Tuple[str, str]], answer: Callable[[str, str], Optional[str]]) -> List[Optional[str]]:
+    start = time.perf_counter()
+    results = [answer(hash1, hash2) for hash1, hash2 in queries]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed:8.3f} s total, {1000 * elapsed / len(queries):8.3f} ms per query")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commits", type=int, default=200000)
+    parser.add_argument("--branches", type=int, default=100)
+    parser.add_argument("--repo-dir", help="reuse the synthetic repository from this directory (created if it doesn't exist)")
+    args = parser.parse_args()
+
+    repo_dir = args.repo_dir or os.path.join(tempfile.mkdtemp(), "repo")
+    if not os.path.isdir(os.path.join(repo_dir, ".git")):
+        print(f"Generating a synthetic repository with {args.commits} commits in {repo_dir}...", file=sys.stderr)
+        generate_synthetic_repo(repo_dir, commit_count=args.commits, branch_count=args.branches)
+    subprocess.check_call(["git", "commit-graph", "write", "--reachable"], cwd=repo_dir)
+
+    def rev_parse(revision: str) -> str:
+        return subprocess.check_output(["git", "rev-parse", revision], cwd=repo_dir, universal_newlines=True).strip()
+
+    branches = subprocess.check_output(
+        ["git", "for-each-ref", "--format=%(refname)", "refs/heads/branch-*"], cwd=repo_dir, universal_newlines=True).split()
+    rand = random.Random(0)
+    main_hash = rev_parse("main")
+    # The typical queries made by git-machete: is the parent branch an ancestor of the child branch,
+    # is the branch merged into its parent, are the sibling branches related at all.
+    queries = [(main_hash, rev_parse(branch)) for branch in branches]
+    queries += [(rev_parse(branch), main_hash) for branch in branches]
+    queries += [(rev_parse(rand.choice(branches)), rev_parse(rand.choice(branches))) for _ in branches]
+
+    def answer_via_subprocess(hash1: str, hash2: str) -> Optional[str]:
+        output = subprocess.run(["git", "merge-base", hash1, hash2], cwd=repo_dir, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        return output.strip() or None
+
+    commit_graph = CommitGraph.load_or_none(os.path.join(repo_dir, ".git", "objects"))
+    assert commit_graph is not None
+
+    fallback_count = 0
+
+    # Same as what GitContext does: fall back to `git merge-base` whenever the commit-graph can't (cheaply) answer the query.
+    def answer_via_commit_graph(hash1: str, hash2: str) -> Optional[str]:
+        nonlocal fallback_count
+        merge_bases = commit_graph.get_merge_bases_or_none(hash1, hash2) if commit_graph else None
+        if merge_bases is None or len(merge_bases) > 1:
+            fallback_count += 1
+            return answer_via_subprocess(hash1, hash2)
+        return merge_bases[0] if merge_bases else None
+
+    print(f"{len(queries)} merge-base queries on {args.commits} commits:")
+    expected = _time("git merge-base", queries, answer_via_subprocess)
+    actual = _time("commit-graph (in-process)", queries, answer_via_commit_graph)
+    assert actual == expected, "commit-graph results differ from git merge-base"
+    print(f"{fallback_count} of {len(queries)} queries fell back to git merge-base")
+    commit_graph.close()
+
+
+if __name__ == "__main__":
+    main()
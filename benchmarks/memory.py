@@ -0,0 +1,72 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .synthetic_repo import generate_synthetic_repo
+
+# Measures the peak memory usage of `git machete discover` and `git machete status`
+# on a repository with a long trunk history shared by many branches.
+# Each command is run in a fresh Python process (the memory used by the git subprocesses it spawns is not included).
+# Neither of the branches has a reflog, so fork point inference needs to walk each branch's entire history,
+# which is the worst case for memory usage.
+#
+# Usage (from the root of the repository):
+#     python -m benchmarks.memory [--commits 200000] [--branches 100] [--repo-dir DIR]
+
+_MEASURE_SCRIPT = """
+import resource, sys
+from git_machete import cli
+cli.launch(sys.argv[1:])
+# ru_maxrss is in kilobytes on Linux, but in bytes on macOS.
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024), file=sys.stderr)
+"""
+
+
+def _measure(label: str, repo_dir: str, *args: str) -> None:
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=project_dir)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", _MEASURE_SCRIPT] + list(args),
+                            cwd=repo_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"`git machete {' '.join(args)}` failed:\n{result.stderr}")
+    peak_rss = int(result.stderr.split()[-1])
+    print(f"{label:<24} {elapsed:8.3f} s, peak RSS {peak_rss / 2 ** 20:8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commits", type=int, default=200000)
+    parser.add_argument("--branches", type=int, default=100)
+    parser.add_argument("--repo-dir", help="reuse the synthetic repository from this directory (created if it doesn't exist)")
+    parser.add_argument("--no-commit-graph", action="store_true", help="remove the commit-graph file from the repository, if any")
+    args = parser.parse_args()
+
+    repo_dir = args.repo_dir or os.path.join(tempfile.mkdtemp(), "repo")
+    if not os.path.isdir(os.path.join(repo_dir, ".git")):
+        print(f"Generating a synthetic repository with {args.commits} commits in {repo_dir}...", file=sys.stderr)
+        generate_synthetic_repo(repo_dir, commit_count=args.commits, branch_count=args.branches)
+    if args.no_commit_graph:
+        info_dir = os.path.join(repo_dir, ".git", "objects", "info")
+        shutil.rmtree(os.path.join(info_dir, "commit-graphs"), ignore_errors=True)
+        if os.path.exists(os.path.join(info_dir, "commit-graph")):
+            os.remove(os.path.join(info_dir, "commit-graph"))
+    else:
+        subprocess.check_call(["git", "commit-graph", "write", "--reachable"], cwd=repo_dir, stderr=subprocess.DEVNULL)
+    subprocess.check_call(["git", "config", "machete.cache.enabled", "false"], cwd=repo_dir)
+
+    def count(*git_args: str) -> int:
+        return len(subprocess.check_output(["git"] + list(git_args), cwd=repo_dir, universal_newlines=True).splitlines())
+    print(f"{count('for-each-ref', 'refs/heads/branch-*')} branches, {count('rev-list', '--all')} commits, "
+          f"{'without' if args.no_commit_graph else 'with'} commit-graph:")
+    _measure("discover", repo_dir, "discover", "--yes", "--roots=main")
+    _measure("status", repo_dir, "status")
+
+
+if __name__ == "__main__":
+    main()
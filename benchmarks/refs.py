@@ -0,0 +1,88 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+from git_machete.git_operations import GitContext, LocalBranchShortName
+
+# Measures how the lookups of remote counterparts of local branches scale with the number of refs in the repository.
+# Each synthetic repository consists of a single commit pointed to by `local` branches (half of them with a tracking branch set),
+# `remote` branches of `origin` (covering all the local branches) and the same number of branches of `upstream`.
+# The refs are written straight into `packed-refs`, and the tracking branches straight into `.git/config`,
+# since creating them via git commands would take way longer than the benchmark itself.
+# For each local branch, its combined (strict or inferred) counterpart and its sole remote branch (if any) are resolved,
+# which is what `git machete status`, `traverse` and `discover` do for each branch.
+#
+# Usage (from the root of the repository):
+#     python -m benchmarks.refs [--scales 1000:10000,5000:100000] [--base-dir DIR]
+
+
+def _generate_repo(path: str, local_count: int, remote_count: int) -> None:
+    subprocess.check_call(["git", "init", "--quiet", path])
+    env = dict(os.environ, GIT_AUTHOR_NAME="Synthetic", GIT_AUTHOR_EMAIL="synthetic@example.com",
+               GIT_COMMITTER_NAME="Synthetic", GIT_COMMITTER_EMAIL="synthetic@example.com")
+    subprocess.check_call(["git", "commit", "--quiet", "--allow-empty", "-m", "initial"], cwd=path, env=env)
+    commit_hash = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=path, universal_newlines=True).strip()
+    subprocess.check_call(["git", "update-ref", "-d", "HEAD"], cwd=path)
+
+    refs: List[str] = [f"refs/heads/branch-{i}" for i in range(local_count)]
+    for remote in ("origin", "upstream"):
+        refs += [f"refs/remotes/{remote}/branch-{i}" for i in range(remote_count)]
+    with open(os.path.join(path, ".git", "packed-refs"), "w") as packed_refs:
+        packed_refs.write("# pack-refs with: peeled fully-peeled sorted \n")
+        packed_refs.writelines(f"{commit_hash} {ref}\n" for ref in sorted(refs))
+    subprocess.check_call(["git", "symbolic-ref", "HEAD", "refs/heads/branch-0"], cwd=path)
+
+    with open(os.path.join(path, ".git", "config"), "a") as config:
+        for remote in ("origin", "upstream"):
+            config.write(f'[remote "{remote}"]\n\turl = https://example.com/{remote}.git\n'
+                         f'\tfetch = +refs/heads/*:refs/remotes/{remote}/*\n')
+        for i in range(0, local_count, 2):
+            config.write(f'[branch "branch-{i}"]\n\tremote = origin\n\tmerge = refs/heads/branch-{i}\n')
+
+
+def _measure(repo_dir: str, local_count: int, remote_count: int) -> Tuple[float, float]:
+    os.chdir(repo_dir)
+    git = GitContext()
+    start = time.perf_counter()
+    local_branches = git.get_local_branches()
+    load_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for branch in local_branches:
+        git.get_combined_counterpart_for_fetching_of_branch(branch)
+        git.get_sole_remote_branch(LocalBranchShortName.of(branch))
+    lookup_elapsed = time.perf_counter() - start
+    assert len(local_branches) == local_count and len(git.get_remote_branches()) == 2 * remote_count
+    return load_elapsed, lookup_elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="1000:10000,5000:50000,5000:100000",
+                        help="comma-separated pairs of <local branch count>:<remote branch count per remote>")
+    parser.add_argument("--base-dir", help="reuse the synthetic repositories from this directory (created if they don't exist)")
+    args = parser.parse_args()
+
+    base_dir = args.base_dir or tempfile.mkdtemp()
+    initial_dir = os.getcwd()
+    print(f"{'local':>8} {'remote':>8} {'load':>10} {'lookups':>10} {'per branch':>12}")
+    for scale in args.scales.split(","):
+        local_count, remote_count = map(int, scale.split(":"))
+        if local_count > remote_count:
+            parser.error("the number of remote branches per remote must be at least the number of local branches")
+        repo_dir = os.path.join(base_dir, f"refs-{local_count}-{remote_count}")
+        if not os.path.isdir(os.path.join(repo_dir, ".git")):
+            print(f"Generating a synthetic repository with {local_count} local branches in {repo_dir}...", file=sys.stderr)
+            _generate_repo(repo_dir, local_count, remote_count)
+        load_elapsed, lookup_elapsed = _measure(repo_dir, local_count, remote_count)
+        os.chdir(initial_dir)
+        print(f"{local_count:>8} {2 * remote_count:>8} {load_elapsed:>8.3f} s {lookup_elapsed:>8.3f} s "
+              f"{1e6 * lookup_elapsed / local_count:>9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# Measures the startup cost of git-machete: the time it takes to import the modules (as reported by `python -X importtime`),
+# the number of subprocesses spawned just by importing them, and the wall time of a few cheap commands run in a fresh Python process each,
+# which is what shell prompts and completion scripts calling git-machete pay for on every invocation.
+#
+# Usage (from the root of the repository):
+#     python -m benchmarks.startup [--runs 20] [--repo-dir DIR]
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_COMMANDS = [["version"], ["file"], ["is-managed", "develop"], ["show", "up"], ["status"]]
+
+
+def _get_env() -> Dict[str, str]:
+    return dict(os.environ, PYTHONPATH=_PROJECT_DIR)
+
+
+def _generate_repo(path: str) -> None:
+    def git(*args: str) -> None:
+        subprocess.check_call(["git"] + list(args), cwd=path, stdout=subprocess.DEVNULL)
+    os.makedirs(path, exist_ok=True)
+    git("init", "--quiet")
+    git("config", "user.name", "Benchmark")
+    git("config", "user.email", "benchmark@example.com")
+    git("checkout", "--quiet", "-b", "master")
+    git("commit", "--quiet", "--allow-empty", "-m", "master commit")
+    git("checkout", "--quiet", "-b", "develop")
+    git("commit", "--quiet", "--allow-empty", "-m", "develop commit")
+    with open(os.path.join(path, ".git", "machete"), "w") as machete_file:
+        machete_file.write("master\n  develop\n")
+
+
+# Returns the cumulative import time (in microseconds) of each of the top-level modules imported by the given statement.
+def _measure_import_times(statement: str) -> Dict[str, int]:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], env=_get_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    import_times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        module = parts[2].rstrip()
+        if not module.startswith("  "):  # top-level imports are indented by a single space only
+            import_times[module.strip()] = int(parts[1])
+    return import_times
+
+
+def _count_subprocesses_spawned_on_import(module: str) -> int:
+    script = ("import subprocess\n"
+              "spawned = []\n"
+              "original_init = subprocess.Popen.__init__\n"
+              "def init(self, *args, **kwargs):\n"
+              "    spawned.append(args)\n"
+              "    original_init(self, *args, **kwargs)\n"
+              "subprocess.Popen.__init__ = init\n"
+              f"import {module}\n"
+              "print(len(spawned))\n")
+    return int(subprocess.check_output([sys.executable, "-c", script], env=_get_env(), universal_newlines=True))
+
+
+def _measure_command(repo_dir: str, args: List[str], runs: int) -> float:
+    script = "import sys; from git_machete import cli; cli.launch(sys.argv[1:])"
+    elapsed: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script] + args, cwd=repo_dir, env=_get_env(),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        elapsed.append(time.perf_counter() - start)
+    return statistics.median(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--repo-dir", help="reuse the repository from this directory (created if it doesn't exist)")
+    args = parser.parse_args()
+
+    repo_dir = args.repo_dir or os.path.join(tempfile.mkdtemp(), "repo")
+    if not os.path.isdir(os.path.join(repo_dir, ".git")):
+        _generate_repo(repo_dir)
+
+    print("Cumulative import time (median of all runs):")
+    for module in ("git_machete.utils", "git_machete.cli"):
+        _measure_import_times(f"import {module}")  # warm-up, so that the bytecode compilation is not measured
+        import_times = [_measure_import_times(f"import {module}").get(module, 0) for _ in range(args.runs)]
+        print(f"    import {module:<24} {statistics.median(import_times) / 1000:8.1f} ms, "
+              f"{_count_subprocesses_spawned_on_import(module)} subprocess(es) spawned")
+    print("Wall time of a command in a fresh process (median of all runs):")
+    for command in _COMMANDS:
+        print(f"    git machete {' '.join(command):<20} {1000 * _measure_command(repo_dir, command, args.runs):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
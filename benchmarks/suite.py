@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from .synthetic_repo import generate_stacked_repo
+
+# Runs the most common git-machete commands end-to-end against a synthetic repository of the given scale
+# and records their wall time, peak RSS (of the Python process, not including git) and the number of spawned subprocesses
+# into a JSON report, which can then be passed as `--compare` to a run made on another commit.
+# Each run of each command happens in a fresh Python process and on a fresh copy of the repository,
+# since some of the commands modify the repository (and also to start with the persistent caches empty each time).
+# Alternatively, with `--replay`, the commands recorded (e.g. on a real-world repository) with `GIT_MACHETE_RECORD`
+# are measured instead, with their git commands replayed from the recordings rather than executed.
+#
+# Usage (from the root of the repository):
+#     python -m benchmarks.suite [--branches 60] [--stack-depth 4] [--commits-per-branch 3] [--trunk-length 5000]
+#                                [--remote-refs 500] [--reflog-length 30] [--runs 3] [--output REPORT] [--compare BASELINE_REPORT]
+#     python -m benchmarks.suite --replay RECORDING [--replay RECORDING ...] [--runs 3] [--output REPORT] [--compare BASELINE_REPORT]
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MEASURE_SCRIPT = """
+import json, resource, subprocess, sys
+spawned = []
+original_init = subprocess.Popen.__init__
+def init(self, *args, **kwargs):
+    spawned.append(args)
+    original_init(self, *args, **kwargs)
+subprocess.Popen.__init__ = init
+from git_machete import cli
+exit_code = 0
+try:
+    cli.launch(sys.argv[2:])
+except SystemExit as e:
+    exit_code = e.code if isinstance(e.code, int) else 1
+# ru_maxrss is in kilobytes on Linux, but in bytes on macOS.
+rss_unit = 1 if sys.platform == "darwin" else 1024
+with open(sys.argv[1], "w") as result_file:
+    json.dump({
+        "exit_code": exit_code,
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit,
+        "subprocess_count": len(spawned)
+    }, result_file)
+"""
+
+# The metrics compared by `--compare`, along with the relative change that is reported as a regression or an improvement.
+_COMPARED_METRICS = {"wall_time_s": 0.1, "peak_rss_bytes": 0.1, "subprocess_count": 0.0}
+
+
+def _get_commands(stacks: List[List[str]]) -> Dict[str, List[str]]:
+    return {
+        "status": ["status"],
+        "status --list-commits": ["status", "--list-commits"],
+        "discover": ["discover", "--yes", "--roots=main"],
+        "traverse --yes": ["traverse", "--yes", "--no-push", "--no-push-untracked"],
+        # The bottom branch of the first stack, so that the rest of the stack needs to be rebased onto `main`.
+        "slide-out": ["slide-out", stacks[0][0]],
+        "list slidable": ["list", "slidable"],
+    }
+
+
+def _get_env(**extra_env: str) -> Dict[str, str]:
+    # Interactive rebases (as done by `traverse` and `slide-out`) must not wait for the user.
+    return dict(os.environ, PYTHONPATH=_PROJECT_DIR, GIT_SEQUENCE_EDITOR="true", GIT_EDITOR="true", **extra_env)
+
+
+def _run(template_repo_dir: Optional[str], work_dir: str, args: List[str], env: Dict[str, str]) -> Dict[str, Any]:
+    repo_dir = os.path.join(work_dir, "repo")
+    shutil.rmtree(repo_dir, ignore_errors=True)
+    if template_repo_dir:
+        shutil.copytree(template_repo_dir, repo_dir, symlinks=True)
+    else:
+        os.mkdir(repo_dir)
+    result_path = os.path.join(work_dir, "result.json")
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", _MEASURE_SCRIPT, result_path] + args, cwd=repo_dir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        raise RuntimeError(f"`git machete {' '.join(args)}` crashed:\n{completed.stderr}")
+    with open(result_path) as result_file:
+        result: Dict[str, Any] = json.load(result_file)
+    os.remove(result_path)
+    if result["exit_code"] != 0:
+        raise RuntimeError(f"`git machete {' '.join(args)}` failed with exit code {result['exit_code']}:\n{completed.stderr}")
+    result["wall_time_s"] = elapsed
+    return result
+
+
+def _measure(template_repo_dir: Optional[str], work_dir: str, args: List[str], runs: int, env: Dict[str, str]) -> Dict[str, Any]:
+    results = [_run(template_repo_dir, work_dir, args, env) for _ in range(runs)]
+    wall_times = [result["wall_time_s"] for result in results]
+    return {
+        "args": args,
+        "wall_time_s": statistics.median(wall_times),
+        "wall_times_s": wall_times,
+        "peak_rss_bytes": max(result["peak_rss_bytes"] for result in results),
+        # Should be the same in each run, unless some of the commands got skipped or retried.
+        "subprocess_count": max(result["subprocess_count"] for result in results),
+    }
+
+
+def _get_output_or_none(*args: str) -> Optional[str]:
+    try:
+        return subprocess.check_output(args, cwd=_PROJECT_DIR, stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_metric(metric: str, value: float) -> str:
+    if metric == "wall_time_s":
+        return f"{1000 * value:.0f} ms"
+    if metric.endswith("_bytes"):
+        return f"{value / 2 ** 20:.1f} MiB"
+    return str(value)
+
+
+def _print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'command':<24} {'wall time':>10} {'peak RSS':>10} {'subprocesses':>12}", file=sys.stderr)
+    for command, result in results.items():
+        print(f"{command:<24} {_format_metric('wall_time_s', result['wall_time_s']):>10} "
+              f"{_format_metric('peak_rss_bytes', result['peak_rss_bytes']):>10} {result['subprocess_count']:>12}", file=sys.stderr)
+
+
+def _print_comparison(baseline: Dict[str, Any], report: Dict[str, Any]) -> None:
+    if baseline["parameters"] != report["parameters"]:
+        print(f"Warning: the baseline has been measured with different parameters: {baseline['parameters']}", file=sys.stderr)
+    print(f"Compared to {baseline.get('revision') or 'the baseline'}:", file=sys.stderr)
+    print(f"{'command':<24} {'metric':<18} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for command, result in report["results"].items():
+        baseline_result = baseline["results"].get(command)
+        if baseline_result is None:
+            continue
+        for metric, threshold in _COMPARED_METRICS.items():
+            old, new = baseline_result[metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            verdict = "worse" if change > threshold else "better" if change < -threshold else ""
+            print(f"{command:<24} {metric:<18} {_format_metric(metric, old):>10} {_format_metric(metric, new):>10} "
+                  f"{100 * change:>+7.1f}% {verdict}".rstrip(), file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--branches", type=int, default=60)
+    parser.add_argument("--stack-depth", type=int, default=4)
+    parser.add_argument("--commits-per-branch", type=int, default=3)
+    parser.add_argument("--trunk-length", type=int, default=5000)
+    parser.add_argument("--remote-refs", type=int, default=500)
+    parser.add_argument("--reflog-length", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=3, help="number of runs of each command; the median wall time is reported")
+    parser.add_argument("--commands", help="comma-separated subset of the commands to run (all by default)")
+    parser.add_argument("--output", help="file to write the JSON report to (stdout by default)")
+    parser.add_argument("--compare", metavar="BASELINE_REPORT",
+                        help="JSON report (e.g. from another commit) to compare the results against")
+    parser.add_argument("--repo-dir", help="reuse the synthetic repository from this directory (created if it doesn't exist)")
+    parser.add_argument("--replay", metavar="RECORDING", action="append",
+                        help="measure the command recorded with GIT_MACHETE_RECORD=RECORDING (can be given multiple times) "
+                             "instead of the commands on a synthetic repository")
+    args = parser.parse_args()
+    if args.replay:
+        _replay(args)
+        return
+    if args.branches < 1 or args.stack_depth < 1 or args.trunk_length < 1:
+        parser.error("there must be at least one branch, and both the stack depth and the trunk length must be positive")
+
+    parameters = {
+        "branches": args.branches,
+        "stack_depth": args.stack_depth,
+        "commits_per_branch": args.commits_per_branch,
+        "trunk_length": args.trunk_length,
+        "remote_refs": args.remote_refs,
+        "reflog_length": args.reflog_length,
+    }
+    repo_dir = args.repo_dir or os.path.join(tempfile.mkdtemp(), "repo")
+    stacks_path = os.path.join(repo_dir, ".git", "benchmark-stacks.json")
+    if not os.path.isdir(os.path.join(repo_dir, ".git")):
+        print(f"Generating a synthetic repository in {repo_dir}...", file=sys.stderr)
+        stacks = generate_stacked_repo(repo_dir, branch_count=args.branches, stack_depth=args.stack_depth,
+                                       commits_per_branch=args.commits_per_branch, trunk_length=args.trunk_length,
+                                       remote_ref_count=args.remote_refs, reflog_length=args.reflog_length)
+        subprocess.check_call(["git", "commit-graph", "write", "--reachable"], cwd=repo_dir, stderr=subprocess.DEVNULL)
+        with open(stacks_path, "w") as stacks_file:
+            json.dump({"parameters": parameters, "stacks": stacks}, stacks_file)
+    with open(stacks_path) as stacks_file:
+        repo_info = json.load(stacks_file)
+    if repo_info["parameters"] != parameters:
+        parser.error(f"the repository in {repo_dir} has been generated with different parameters: {repo_info['parameters']}")
+
+    commands = _get_commands(repo_info["stacks"])
+    selected_commands = args.commands.split(",") if args.commands else list(commands)
+    unknown_commands = [command for command in selected_commands if command not in commands]
+    if unknown_commands:
+        parser.error(f"unknown command(s): {', '.join(unknown_commands)}; available: {', '.join(commands)}")
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        results = {command: _measure(repo_dir, work_dir, commands[command], args.runs, _get_env()) for command in selected_commands}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    _report(args, parameters, results)
+
+
+def _replay(args: argparse.Namespace) -> None:
+    results: Dict[str, Dict[str, Any]] = {}
+    work_dir = tempfile.mkdtemp()
+    try:
+        for recording_path in args.replay:
+            with open(recording_path) as recording_file:
+                recorded_args: List[str] = json.load(recording_file)["args"]
+            env = _get_env(GIT_MACHETE_REPLAY=os.path.abspath(recording_path))
+            results[os.path.basename(recording_path)] = _measure(None, work_dir, recorded_args, args.runs, env)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    _report(args, {"replays": [os.path.basename(recording_path) for recording_path in args.replay]}, results)
+
+
+def _report(args: argparse.Namespace, parameters: Dict[str, Any], results: Dict[str, Dict[str, Any]]) -> None:
+    report = {
+        "revision": _get_output_or_none("git", "describe", "--always", "--dirty"),
+        "git_version": _get_output_or_none("git", "--version"),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "runs": args.runs,
+        "results": results,
+    }
+    _print_results(results)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            _print_comparison(json.load(baseline_file), report)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import os
+import random
+import subprocess
+from typing import IO, Dict, List, Optional
+
+# Generates a repository with a long first-parent history of `main`,
+# where every few commits a short-lived side branch is merged back (so that the history is not just a straight line),
+# plus `branch_count` branches forked off `main` at random points among its latest `fork_point_window` commits,
+# each with a few commits of its own.
+# All commits are created via a single `git fast-import` run, which is orders of magnitude faster than `git commit`.
+
+
+def _write_commit(stream: IO[bytes], ref: str, mark: int, timestamp: int, parent_marks: List[int], path: Optional[str] = None) -> None:
+    message = f"commit {mark}\n".encode()
+    content = f"{mark}\n".encode()
+    stream.write(f"commit {ref}\nmark :{mark}\n".encode())
+    stream.write(f"committer Synthetic <synthetic@example.com> {timestamp} +0000\n".encode())
+    stream.write(f"data {len(message)}\n".encode() + message)
+    if parent_marks:
+        stream.write(f"from :{parent_marks[0]}\n".encode())
+    for parent_mark in parent_marks[1:]:
+        stream.write(f"merge :{parent_mark}\n".encode())
+    stream.write(f"M 644 inline {path or f'file-{mark % 100}'}\ndata {len(content)}\n".encode() + content + b"\n")
+
+
+def generate_synthetic_repo(path: str, commit_count: int, branch_count: int,
+                            commits_per_branch: int = 3, fork_point_window: int = 500, seed: int = 0) -> List[str]:
+    rand = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    subprocess.check_call(["git", "init", "--quiet", path])
+    subprocess.check_call(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=path)
+    process = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=path, stdin=subprocess.PIPE)
+    assert process.stdin is not None
+    stream = process.stdin
+
+    timestamp = 1600000000
+    mark = 0
+    main_marks: List[int] = []
+    main_commit_count = commit_count - branch_count * commits_per_branch
+    while mark < main_commit_count:
+        mark += 1
+        timestamp += 60
+        if len(main_marks) >= 2 and mark % 10 == 0 and mark + 3 <= main_commit_count:
+            # A side branch of two commits, forked off a few commits back and merged into main.
+            side_parent = main_marks[-2]
+            for _ in range(2):
+                _write_commit(stream, "refs/heads/side", mark, timestamp, [side_parent])
+                side_parent = mark
+                mark += 1
+                timestamp += 60
+            _write_commit(stream, "refs/heads/main", mark, timestamp, [main_marks[-1], side_parent])
+        else:
+            _write_commit(stream, "refs/heads/main", mark, timestamp, main_marks[-1:])
+        main_marks.append(mark)
+
+    branches = []
+    for branch_index in range(branch_count):
+        branch = f"branch-{branch_index}"
+        parent = rand.choice(main_marks[-fork_point_window:])
+        for _ in range(commits_per_branch):
+            mark += 1
+            timestamp += 60
+            _write_commit(stream, f"refs/heads/{branch}", mark, timestamp, [parent])
+            parent = mark
+        branches.append(branch)
+
+    stream.close()
+    if process.wait() != 0:
+        raise RuntimeError("git fast-import failed")
+    subprocess.check_call(["git", "update-ref", "-d", "refs/heads/side"], cwd=path)
+    subprocess.check_call(["git", "reset", "--quiet", "--hard", "main"], cwd=path)
+    return branches
+
+
+# Generates a repository shaped like the ones git-machete is meant for: a linear `main` of `trunk_length` commits
+# and `branch_count` branches arranged into stacks of (at most) `stack_depth` branches, each branch having `commits_per_branch` commits
+# on top of the previous one in its stack. The bottom branch of each stack is forked off one of the latest `fork_point_window`
+# commits of `main`, so most stacks need to be rebased onto `main`. The branches are laid out accordingly in `.git/machete`.
+# There are `remote_ref_count` remote branches of `origin`: the counterparts of `main` and the branches first
+# (every other one lagging a commit behind its local branch, and tracked by it), and then unrelated branches pointing into `main`.
+# The remote itself doesn't exist, so anything that would fetch or push fails.
+# Each branch gets a reflog of `reflog_length` entries (creation of the branch, its commits, and then resets to its tip),
+# which is written straight into `logs/`, since `git fast-import` doesn't write reflogs.
+# Returns the stacks, bottom branch first.
+def generate_stacked_repo(path: str, branch_count: int, stack_depth: int, commits_per_branch: int, trunk_length: int,
+                          remote_ref_count: int, reflog_length: int, fork_point_window: int = 100, seed: int = 0) -> List[List[str]]:
+    rand = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    subprocess.check_call(["git", "init", "--quiet", path])
+    subprocess.check_call(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=path)
+    marks_path = os.path.join(path, ".git", "fast-import-marks")
+    process = subprocess.Popen(["git", "fast-import", "--quiet", f"--export-marks={marks_path}"], cwd=path, stdin=subprocess.PIPE)
+    assert process.stdin is not None
+    stream = process.stdin
+
+    timestamp = 1600000000
+    for mark in range(1, trunk_length + 1):
+        timestamp += 60
+        _write_commit(stream, "refs/heads/main", mark, timestamp, [mark - 1] if mark > 1 else [])
+    mark = trunk_length
+
+    stacks: List[List[str]] = []
+    # For each branch, the commit it has been forked off followed by its own commits.
+    marks_by_branch: Dict[str, List[int]] = {}
+    for stack_index in range(0, branch_count, stack_depth):
+        parent = rand.randint(max(1, trunk_length - fork_point_window + 1), trunk_length)
+        stack: List[str] = []
+        for depth in range(min(stack_depth, branch_count - stack_index)):
+            branch = f"stack-{stack_index // stack_depth}-{depth}"
+            marks_by_branch[branch] = [parent]
+            for _ in range(commits_per_branch):
+                mark += 1
+                timestamp += 60
+                # Each branch modifies a file of its own, so that the stacks can be rebased without conflicts.
+                _write_commit(stream, f"refs/heads/{branch}", mark, timestamp, [parent], path=f"{branch}.txt")
+                parent = mark
+                marks_by_branch[branch].append(mark)
+            stream.write(f"reset refs/heads/{branch}\nfrom :{parent}\n\n".encode())
+            stack.append(branch)
+        stacks.append(stack)
+
+    branches = [branch for stack in stacks for branch in stack]
+    tracked_branches: List[str] = []
+    for index in range(remote_ref_count):
+        if index == 0:
+            remote_branch, remote_mark = "main", trunk_length
+        elif index <= len(branches):
+            remote_branch = branches[index - 1]
+            branch_marks = marks_by_branch[remote_branch]
+            remote_mark = branch_marks[-2] if index % 2 == 0 and len(branch_marks) > 2 else branch_marks[-1]
+            tracked_branches.append(remote_branch)
+        else:
+            remote_branch, remote_mark = f"other-{index}", rand.randint(1, trunk_length)
+        stream.write(f"reset refs/remotes/origin/{remote_branch}\nfrom :{remote_mark}\n\n".encode())
+
+    stream.close()
+    if process.wait() != 0:
+        raise RuntimeError("git fast-import failed")
+    with open(marks_path) as marks_file:
+        hash_by_mark = {int(mark_str[1:]): commit_hash for mark_str, commit_hash in (line.split() for line in marks_file)}
+    os.remove(marks_path)
+
+    with open(os.path.join(path, ".git", "config"), "a") as config:
+        # Needed by the commands that create commits, like `traverse` (when rebasing).
+        config.write('[user]\n\tname = Synthetic\n\temail = synthetic@example.com\n')
+        config.write(f'[remote "origin"]\n\turl = {path}-remote.git\n\tfetch = +refs/heads/*:refs/remotes/origin/*\n')
+        for branch in tracked_branches:
+            config.write(f'[branch "{branch}"]\n\tremote = origin\n\tmerge = refs/heads/{branch}\n')
+
+    null_hash = "0" * 40
+    for stack in stacks:
+        for depth, branch in enumerate(stack):
+            branch_marks = marks_by_branch[branch]
+            entries = [(null_hash, hash_by_mark[branch_marks[0]], f"branch: Created from {stack[depth - 1] if depth else 'main'}")]
+            entries += [(hash_by_mark[old], hash_by_mark[new], f"commit: commit {new}") for old, new in zip(branch_marks, branch_marks[1:])]
+            tip_hash = entries[-1][1]
+            entries += [(tip_hash, tip_hash, "reset: moving to HEAD")] * max(reflog_length - len(entries), 0)
+            if not reflog_length:
+                continue
+            os.makedirs(os.path.join(path, ".git", "logs", "refs", "heads"), exist_ok=True)
+            with open(os.path.join(path, ".git", "logs", "refs", "heads", branch), "w") as reflog:
+                for index, (old_hash, new_hash, message) in enumerate(entries[-reflog_length:]):
+                    reflog.write(f"{old_hash} {new_hash} Synthetic <synthetic@example.com> {timestamp + 60 * index} +0000\t{message}\n")
+
+    with open(os.path.join(path, ".git", "machete"), "w") as machete_file:
+        machete_file.write("main\n")
+        for stack in stacks:
+            machete_file.writelines("  " * (depth + 1) + branch + "\n" for depth, branch in enumerate(stack))
+    subprocess.check_call(["git", "reset", "--quiet", "--hard", "main"], cwd=path)
+    return stacks
@@ -1,9 +1,10 @@
 #!/usr/bin/env bash
 
 _git_machete() {
-  local cmds="add advance anno clean d delete-unmanaged diff discover e edit file fork-point g github go help is-managed l list log reapply s show slide-out squash status t traverse update version"
+  local cmds="add advance anno cache clean d delete-unmanaged diff discover e edit file fork-point g github go help is-managed l list log reapply s show slide-out squash status t traverse update version"
   local help_topics="$cmds config format hooks"
 
+  local cache_subcommands="clear"
   local categories="addable childless managed slidable slidable-after unmanaged with-overridden-fork-point"
   local directions="down first last next prev root up"
   local github_subcommands="anno-prs checkout-prs create-pr retarget-pr sync"
@@ -12,7 +13,7 @@ _git_machete() {
   local opt_return_to_args="here nearest-remaining stay"
   local opt_start_from_args="here root first-root"
 
-  local common_opts="--debug -h --help -v --verbose --version"
+  local common_opts="--debug -h --help --profile --profile= --stats --trace= -v --verbose --version"
   local add_opts="-o --onto= -R --as-root -y --yes"
   local advance_opts="-y --yes"
   local anno_opts="-b --branch= -H --sync-github-prs"
@@ -27,7 +28,7 @@ _git_machete() {
   local reapply_opts="-f --fork-point="
   local slide_out_opts="-d --down-fork-point= --delete -M --merge -n --no-edit-merge --no-interactive-rebase"
   local squash_opts="-f --fork-point="
-  local status_opts="--color= -L --list-commits-with-hashes -l --list-commits --no-detect-squash-merges"
+  local status_opts="--color= --jobs= -L --list-commits-with-hashes -l --list-commits --no-detect-squash-merges"
   local traverse_opts="-F --fetch -l --list-commits -M --merge -n --no-detect-squash-merges --no-edit-merge --no-interactive-rebase --no-push --no-push-untracked --push --push-untracked --return-to= --start-from= -w --whole -W -y --yes"
   local update_opts="-f --fork-point= -M --merge -n --no-edit-merge --no-interactive-rebase"
 
@@ -94,6 +95,12 @@ _git_machete() {
             case ${COMP_WORDS[2]} in
               add)
                 __gitcomp_nl "$(git machete list addable 2>/dev/null)" ;;
+              cache)
+                if [[ $COMP_CWORD -eq 3 ]]; then
+                  __gitcomp "$cache_subcommands"
+                else
+                  COMPREPLY=('')
+                fi ;;
               d|diff|fork-point|is-managed|l|log)
                 __gitcomp "$(__git_heads)" ;;
               g|go)
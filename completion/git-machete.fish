@@ -1,7 +1,7 @@
 # This file will be loaded by git.fish completions and also provide all __fish_git_* functions here.
 
 set -l __mcht_help_topics config format hooks
-set -l __mcht_commands_long add advance anno delete-unmanaged diff discover edit file fork-point \
+set -l __mcht_commands_long add advance anno cache delete-unmanaged diff discover edit file fork-point \
   github go help is-managed list log reapply show slide-out squash status traverse update version
 set -l __mcht_commands_short d e g l s t
 set -l __mcht_commands $__mcht_commands_long $__mcht_commands_short
@@ -19,6 +19,9 @@ complete -c git-machete -n "__fish_seen_subcommand_from $__mcht_commands;     an
 complete -c git-machete -n "not __fish_seen_subcommand_from --verbose -v" -f -l verbose -s v -d 'Log the executed git commands'
 complete -c git-machete -n "not __fish_seen_subcommand_from --debug"      -f -l debug        -d 'Log detailed diagnostic info, including outputs of the executed git commands'
 complete -c git-machete -n "not __fish_seen_subcommand_from --version"    -f -l version      -d 'Print version and exit'
+complete -c git-machete -n "not __fish_seen_subcommand_from --profile"    -f -l profile      -a 'cpu mem' -d 'Print where the CPU time or memory went once the command is done'
+complete -c git-machete -n "not __fish_seen_subcommand_from --stats"      -f -l stats        -d 'Print the hit/miss statistics of the caches once the command is done'
+complete -c git-machete -n "not __fish_seen_subcommand_from --trace"      -r -l trace        -d 'Record the timings of the executed git commands and GitHub API requests in Chrome trace event format'
 
 # git machete add
 complete -c git-machete -n "not __fish_seen_subcommand_from $__mcht_commands"                                            -f                 -a add                           -d 'Add a branch to the tree of branch dependencies'
@@ -35,6 +38,10 @@ complete -c git-machete -n "not __fish_seen_subcommand_from $__mcht_commands"
 complete -c git-machete -n "__fish_seen_subcommand_from anno"                                                           -x -l branch          -s b -a '(__fish_git_local_branches)' -d 'Branch to set the annotation for'
 complete -c git-machete -n "__fish_seen_subcommand_from anno; and not __fish_seen_subcommand_from --sync-github-prs -H" -f -l sync-github-prs -s H                                  -d 'Annotate with GitHub PR numbers and authors where applicable'
 
+# git machete cache
+complete -c git-machete -n "not __fish_seen_subcommand_from $__mcht_commands"                             -f -a cache -d 'Manage the cache of git history computations'
+complete -c git-machete -n "__fish_seen_subcommand_from cache; and not __fish_seen_subcommand_from clear" -f -a clear -d 'Remove all the cached data'
+
 # git machete clean
 complete -c git-machete -n "not __fish_seen_subcommand_from $__mcht_commands"                                                     -f -a clean                          -d 'Delete untracked and unmanaged branches, and optionally check out open GitHub PRs'
 complete -c git-machete -n "__fish_seen_subcommand_from clean; and not __fish_seen_subcommand_from --checkout-my-github-prs -H"   -f -l checkout-my-github-prs -s H    -d 'Checkout open PRs for the current user associated with the GitHub token'
@@ -154,6 +161,7 @@ complete -c git-machete -n "__fish_seen_subcommand_from squash" -x -l fork-point
 # git machete status
 complete -c git-machete -n "not __fish_seen_subcommand_from $__mcht_commands" -f -a status -d 'Display formatted tree of branch dependencies, including info on their sync with upstream branch and with remote'
 complete -c git-machete -n "__fish_seen_subcommand_from status s; and not __fish_seen_subcommand_from --color"                       -f -l color                    -a "auto always never" -d 'Colorize the output (default: auto)'
+complete -c git-machete -n "__fish_seen_subcommand_from status s; and not __fish_seen_subcommand_from --jobs"                        -x -l jobs                                            -d 'Run the git queries for up to the given number of branches at once (default: number of CPUs)'
 complete -c git-machete -n "__fish_seen_subcommand_from status s; and not __fish_seen_subcommand_from --list-commits -l"             -f -l list-commits             -s l                   -d 'Additionally list the commits introduced on each branch'
 complete -c git-machete -n "__fish_seen_subcommand_from status s; and not __fish_seen_subcommand_from --list-commits-with-hashes -L" -f -l list-commits-with-hashes -s L                   -d 'Additionally list the short hashes and messages of commits introduced on each branch'
 complete -c git-machete -n "__fish_seen_subcommand_from status s; and not __fish_seen_subcommand_from --no-detect-squash-merges"     -f -l no-detect-squash-merges                         -d 'Only consider "strict" (fast-forward or 2-parent) merges, rather than rebase/squash merges, when detecting if a branch is merged into its upstream (parent)'
@@ -1 +1 @@
-__version__ = '3.17.8'
+__version__ = '3.18.0'
@@ -4,18 +4,19 @@ import argparse
 import os
 import re
 import sys
-import textwrap
-from typing import Any, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+from typing import (Any, Callable, Dict, List, Optional, Sequence, Tuple,
+                    TypeVar, Union)
 
 import git_machete.options
-from git_machete import __version__, git_config_keys, utils
+from git_machete import __version__, git_config_keys, profiling, tracing, utils
 
-from .client import MacheteClient
 from .exceptions import (ExitCode, InteractionStopped, MacheteException,
                          UnderlyingGitException)
-from .generated_docs import long_docs, short_docs
+from .git_executor import (RECORD_ENV_VAR, REPLAY_ENV_VAR, GitExecutor,
+                           RecordingGitExecutor, ReplayingGitExecutor)
 from .git_operations import (AnyBranchName, AnyRevision, GitContext,
                              LocalBranchShortName, RemoteBranchShortName)
+from .memory_cache import format_cache_stats
 from .utils import bold, excluding, fmt, underline, warn
 
 T = TypeVar('T')
@@ -33,7 +34,7 @@ command_by_alias: Dict[str, str] = {v: k for k, v in alias_by_command.items()}
 
 command_groups: List[Tuple[str, List[str]]] = [
     ("General topics",
-     ["config", "file", "format", "help", "hooks", "version"]),
+     ["cache", "config", "file", "format", "help", "hooks", "version"]),
     ("Build, display and modify the tree of branch dependencies",
      ["add", "anno", "discover", "edit", "status"]),
     ("List, check out and delete branches",
@@ -46,10 +47,15 @@ command_groups: List[Tuple[str, List[str]]] = [
      ["github"])
 ]
 
-commands_and_aliases = list(long_docs.keys()) + list(command_by_alias.keys())
+commands_and_aliases = sorted(command for _, commands in command_groups for command in commands) + list(command_by_alias.keys())
 
 
 def get_help_description(display_help_topics: bool, command: Optional[str] = None) -> str:
+    # The docs (and textwrap) are only ever needed for help, so let's not import them upfront.
+    import textwrap
+
+    from .generated_docs import long_docs, short_docs
+
     usage_str = ''
     if command in long_docs:
         usage_str += fmt(textwrap.dedent(long_docs[command]))
@@ -73,7 +79,15 @@ def get_help_description(display_help_topics: bool, command: Optional[str] = Non
         usage_str += fmt(textwrap.dedent("""
             <u>General options</u>\n
                 <b>--debug</b>           Log detailed diagnostic info, including outputs of the executed git commands.
+                                  Can be limited to some subsystems with <b>GIT_MACHETE_DEBUG</b> environment variable.
                 <b>-h, --help</b>        Print help and exit.
+                <b>--profile[=cpu|mem]</b>
+                                  Print where the CPU time (default) or memory went (to stderr) once the command is done;
+                                  the full CPU profile is saved in pstats format.
+                                  Can also be enabled with <b>GIT_MACHETE_PROFILE=cpu|mem</b> environment variable.
+                <b>--stats</b>           Print the hit/miss statistics of the caches (to stderr) once the command is done.
+                <b>--trace=FILE</b>      Record the timings of the executed git commands and GitHub API requests to <b>FILE</b>,
+                                  in Chrome trace event format. Can also be enabled with <b>GIT_MACHETE_TRACE=FILE</b> environment variable.
                 <b>-v, --verbose</b>     Log the executed git commands.
                 <b>--version</b>         Print version and exit.
         """[1:]))
@@ -81,7 +95,7 @@ def get_help_description(display_help_topics: bool, command: Optional[str] = Non
 
 
 def get_short_general_usage() -> str:
-    return (fmt("<b>Usage: git machete [--debug] [-h] [-v|--verbose] [--version] "
+    return (fmt("<b>Usage: git machete [--debug] [-h] [--profile[=cpu|mem]] [--stats] [--trace=FILE] [-v|--verbose] [--version] "
                 "<command> [command-specific options] [command-specific argument]</b>"))
 
 
@@ -89,6 +103,16 @@ def version() -> None:
     print(f"git-machete version {__version__}")
 
 
+PROFILE_METAVAR = "[=" + "|".join(profiling.PROFILE_MODES) + "]"
+
+
+# argparse always separates an option from its value with a space in the usage line;
+# `--profile` is shown as documented instead, since its value is optional (see `profiling.normalize_args`).
+class MacheteArgumentParser(argparse.ArgumentParser):
+    def format_usage(self) -> str:
+        return super().format_usage().replace(f"--profile {PROFILE_METAVAR}", f"--profile{PROFILE_METAVAR}")
+
+
 class MacheteHelpAction(argparse.Action):
     def __init__(
             self,
@@ -117,24 +141,7 @@ class MacheteHelpAction(argparse.Action):
         parser.exit(status=ExitCode.SUCCESS)
 
 
-def create_cli_parser() -> argparse.ArgumentParser:
-    common_args_parser = argparse.ArgumentParser(
-        prog='git machete', argument_default=argparse.SUPPRESS, add_help=False)
-    common_args_parser.add_argument('--debug', action='store_true')
-    common_args_parser.add_argument('-h', '--help', action=MacheteHelpAction)
-    common_args_parser.add_argument(
-        '--version', action='version', version=f'git-machete version {__version__}')
-    common_args_parser.add_argument('-v', '--verbose', action='store_true')
-
-    cli_parser = argparse.ArgumentParser(
-        prog='git machete',
-        argument_default=argparse.SUPPRESS,
-        add_help=False,
-        parents=[common_args_parser]
-    )
-
-    subparsers = cli_parser.add_subparsers(dest='command')
-
+def add_add_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     add_parser = subparsers.add_parser(
         'add',
         argument_default=argparse.SUPPRESS,
@@ -146,10 +153,14 @@ def create_cli_parser() -> argparse.ArgumentParser:
     add_parser.add_argument('-R', '--as-root', action='store_true')
     add_parser.add_argument('-y', '--yes', action='store_true')
 
+
+def add_advance_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     advance_parser = subparsers.add_parser(
         'advance', usage=argparse.SUPPRESS, add_help=False, parents=[common_args_parser])
     advance_parser.add_argument('-y', '--yes', action='store_true', default=argparse.SUPPRESS)
 
+
+def add_anno_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     anno_parser = subparsers.add_parser(
         'anno', usage=argparse.SUPPRESS, add_help=False, parents=[common_args_parser])
     # possible values of 'annotation_text' include: [], [''], ['some_val'], ['text_1', 'text_2']
@@ -158,10 +169,20 @@ def create_cli_parser() -> argparse.ArgumentParser:
     anno_parser.add_argument(
         '-H', '--sync-github-prs', action='store_true', default=argparse.SUPPRESS)
 
+
+def add_cache_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
+    cache_parser = subparsers.add_parser(
+        'cache', usage=argparse.SUPPRESS, add_help=False, parents=[common_args_parser])
+    cache_parser.add_argument('subcommand', choices=['clear'])
+
+
+def add_clean_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     clean_parser = subparsers.add_parser('clean', usage=argparse.SUPPRESS, add_help=False, parents=[common_args_parser])
     clean_parser.add_argument('-H', '--checkout-my-github-prs', action='store_true', default=argparse.SUPPRESS)
     clean_parser.add_argument('-y', '--yes', action='store_true', default=argparse.SUPPRESS)
 
+
+def add_delete_unmanaged_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     delete_unmanaged_parser = subparsers.add_parser(
         'delete-unmanaged',
         usage=argparse.SUPPRESS,
@@ -170,6 +191,8 @@ def create_cli_parser() -> argparse.ArgumentParser:
     delete_unmanaged_parser.add_argument(
         '-y', '--yes', action='store_true', default=argparse.SUPPRESS)
 
+
+def add_diff_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     diff_full_parser = subparsers.add_parser(
         'diff',
         aliases=['d'],
@@ -180,6 +203,8 @@ def create_cli_parser() -> argparse.ArgumentParser:
     diff_full_parser.add_argument(
         '-s', '--stat', action='store_true', default=argparse.SUPPRESS)
 
+
+def add_discover_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     discover_parser = subparsers.add_parser(
         'discover',
         argument_default=argparse.SUPPRESS,
@@ -191,6 +216,8 @@ def create_cli_parser() -> argparse.ArgumentParser:
     discover_parser.add_argument('-r', '--roots')
     discover_parser.add_argument('-y', '--yes', action='store_true')
 
+
+def add_edit_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     subparsers.add_parser(
         'edit',
         aliases=['e'],
@@ -198,12 +225,16 @@ def create_cli_parser() -> argparse.ArgumentParser:
         add_help=False,
         parents=[common_args_parser])
 
+
+def add_file_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     subparsers.add_parser(
         'file',
         usage=argparse.SUPPRESS,
         add_help=False,
         parents=[common_args_parser])
 
+
+def add_fork_point_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     fork_point_parser = subparsers.add_parser(
         'fork-point',
         argument_default=argparse.SUPPRESS,
@@ -218,6 +249,8 @@ def create_cli_parser() -> argparse.ArgumentParser:
     fork_point_exclusive_optional_args.add_argument('--override-to-parent', action='store_true')
     fork_point_exclusive_optional_args.add_argument('--unset-override', action='store_true')
 
+
+def add_github_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     github_parser = subparsers.add_parser(
         'github',
         argument_default=argparse.SUPPRESS,
@@ -233,6 +266,8 @@ def create_cli_parser() -> argparse.ArgumentParser:
     github_parser.add_argument('--mine', action='store_true')
     github_parser.add_argument('--ignore-if-missing', action='store_true')
 
+
+def add_go_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     go_parser = subparsers.add_parser(
         'go',
         aliases=['g'],
@@ -245,10 +280,14 @@ def create_cli_parser() -> argparse.ArgumentParser:
                  'p', 'prev', 'r', 'root', 'u', 'up']
     )
 
+
+def add_help_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     help_parser = subparsers.add_parser(
         'help', add_help=False, usage=argparse.SUPPRESS, parents=[common_args_parser])
     help_parser.add_argument('topic_or_cmd', nargs='?', choices=commands_and_aliases)
 
+
+def add_is_managed_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     is_managed_parser = subparsers.add_parser(
         'is-managed',
         usage=argparse.SUPPRESS,
@@ -256,6 +295,8 @@ def create_cli_parser() -> argparse.ArgumentParser:
         parents=[common_args_parser])
     is_managed_parser.add_argument('branch', nargs='?')
 
+
+def add_list_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     list_parser = subparsers.add_parser(
         'list', usage=argparse.SUPPRESS, add_help=False, parents=[common_args_parser])
     list_parser.add_argument(
@@ -266,6 +307,8 @@ def create_cli_parser() -> argparse.ArgumentParser:
     )
     list_parser.add_argument('branch', nargs='?', default=argparse.SUPPRESS)
 
+
+def add_log_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     log_parser = subparsers.add_parser(
         'log',
         aliases=['l'],
@@ -274,10 +317,14 @@ def create_cli_parser() -> argparse.ArgumentParser:
         parents=[common_args_parser])
     log_parser.add_argument('branch', nargs='?', default=argparse.SUPPRESS)
 
+
+def add_reapply_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     reapply_parser = subparsers.add_parser(
         'reapply', usage=argparse.SUPPRESS, add_help=False, parents=[common_args_parser])
     reapply_parser.add_argument('-f', '--fork-point', default=argparse.SUPPRESS)
 
+
+def add_show_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     show_parser = subparsers.add_parser(
         'show', usage=argparse.SUPPRESS, add_help=False, parents=[common_args_parser])
     show_parser.add_argument(
@@ -287,6 +334,8 @@ def create_cli_parser() -> argparse.ArgumentParser:
     )
     show_parser.add_argument('branch', nargs='?', default=argparse.SUPPRESS)
 
+
+def add_slide_out_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     slide_out_parser = subparsers.add_parser(
         'slide-out',
         argument_default=argparse.SUPPRESS,
@@ -301,10 +350,14 @@ def create_cli_parser() -> argparse.ArgumentParser:
     slide_out_parser.add_argument('--no-edit-merge', action='store_true')
     slide_out_parser.add_argument('--no-interactive-rebase', action='store_true')
 
+
+def add_squash_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     squash_parser = subparsers.add_parser(
         'squash', usage=argparse.SUPPRESS, add_help=False, parents=[common_args_parser])
     squash_parser.add_argument('-f', '--fork-point', default=argparse.SUPPRESS)
 
+
+def add_status_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     status_parser = subparsers.add_parser(
         'status',
         aliases=['s'],
@@ -313,10 +366,13 @@ def create_cli_parser() -> argparse.ArgumentParser:
         add_help=False,
         parents=[common_args_parser])
     status_parser.add_argument('--color', choices=['always', 'auto', 'never'], default='auto')
+    status_parser.add_argument('--jobs', type=int)
     status_parser.add_argument('-l', '--list-commits', action='store_true')
     status_parser.add_argument('-L', '--list-commits-with-hashes', action='store_true')
     status_parser.add_argument('--no-detect-squash-merges', action='store_true')
 
+
+def add_traverse_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     traverse_parser = subparsers.add_parser(
         'traverse',
         aliases=['t'],
@@ -341,6 +397,8 @@ def create_cli_parser() -> argparse.ArgumentParser:
     traverse_parser.add_argument('-W', action='store_true')
     traverse_parser.add_argument('-y', '--yes', action='store_true')
 
+
+def add_update_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     update_parser = subparsers.add_parser(
         'update',
         argument_default=argparse.SUPPRESS,
@@ -353,9 +411,68 @@ def create_cli_parser() -> argparse.ArgumentParser:
     update_parser.add_argument('--no-edit-merge', action='store_true')
     update_parser.add_argument('--no-interactive-rebase', action='store_true')
 
+
+def add_version_parser(subparsers: Any, common_args_parser: argparse.ArgumentParser) -> None:
     subparsers.add_parser(
         'version', usage=argparse.SUPPRESS, add_help=False, parents=[common_args_parser])
 
+
+subparser_adders_by_command: Dict[str, Callable[[Any, argparse.ArgumentParser], None]] = {
+    'add': add_add_parser,
+    'advance': add_advance_parser,
+    'anno': add_anno_parser,
+    'cache': add_cache_parser,
+    'clean': add_clean_parser,
+    'delete-unmanaged': add_delete_unmanaged_parser,
+    'diff': add_diff_parser,
+    'discover': add_discover_parser,
+    'edit': add_edit_parser,
+    'file': add_file_parser,
+    'fork-point': add_fork_point_parser,
+    'github': add_github_parser,
+    'go': add_go_parser,
+    'help': add_help_parser,
+    'is-managed': add_is_managed_parser,
+    'list': add_list_parser,
+    'log': add_log_parser,
+    'reapply': add_reapply_parser,
+    'show': add_show_parser,
+    'slide-out': add_slide_out_parser,
+    'squash': add_squash_parser,
+    'status': add_status_parser,
+    'traverse': add_traverse_parser,
+    'update': add_update_parser,
+    'version': add_version_parser,
+}
+
+
+def create_cli_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    common_args_parser = MacheteArgumentParser(
+        prog='git machete', argument_default=argparse.SUPPRESS, add_help=False)
+    common_args_parser.add_argument('--debug', action='store_true')
+    common_args_parser.add_argument('-h', '--help', action=MacheteHelpAction)
+    common_args_parser.add_argument('--profile', choices=profiling.PROFILE_MODES, metavar=PROFILE_METAVAR)
+    common_args_parser.add_argument('--stats', action='store_true')
+    common_args_parser.add_argument('--trace', metavar='FILE')
+    common_args_parser.add_argument(
+        '--version', action='version', version=f'git-machete version {__version__}')
+    common_args_parser.add_argument('-v', '--verbose', action='store_true')
+
+    cli_parser = MacheteArgumentParser(
+        prog='git machete',
+        argument_default=argparse.SUPPRESS,
+        add_help=False,
+        parents=[common_args_parser]
+    )
+
+    subparsers = cli_parser.add_subparsers(dest='command', parser_class=MacheteArgumentParser)
+    # Building the parsers of all commands takes a noticeable part of the startup time,
+    # so only the parser of the given command is built (unless the command is unknown, so that argparse can list the valid choices).
+    command = command_by_alias.get(command or '', command)
+    for subparser_command, add_subparser in subparser_adders_by_command.items():
+        if command not in subparser_adders_by_command or subparser_command == command:
+            add_subparser(subparsers, common_args_parser)
+
     return cli_parser
 
 
@@ -394,6 +511,8 @@ def update_cli_options_using_parsed_args(
             cli_opts.opt_fork_point = AnyRevision.of(arg) if arg else None
         elif opt == "inferred":
             cli_opts.opt_inferred = True
+        elif opt == "jobs":
+            cli_opts.opt_jobs = arg
         elif opt == "list_commits_with_hashes":
             cli_opts.opt_list_commits = cli_opts.opt_list_commits_with_hashes = True
         elif opt == "list_commits":
@@ -434,6 +553,8 @@ def update_cli_options_using_parsed_args(
             cli_opts.opt_return_to = arg
         elif opt == "stat":
             cli_opts.opt_stat = True
+        elif opt == "stats":
+            cli_opts.opt_stats = True
         elif opt == "start_from":
             cli_opts.opt_start_from = arg
         elif opt == "sync_github_prs":
@@ -477,6 +598,17 @@ def set_utils_global_variables(cli_opts: git_machete.options.CommandLineOptions)
     utils.ascii_only = cli_opts.opt_color == "never" or (cli_opts.opt_color == "auto" and not sys.stdout.isatty())
     utils.debug_mode = cli_opts.opt_debug
     utils.verbose_mode = cli_opts.opt_verbose
+    utils.debug_subsystems = None
+    debug_subsystems_from_env = os.environ.get(utils.DEBUG_SUBSYSTEMS_ENV_VAR)
+    if debug_subsystems_from_env:
+        debug_subsystems = set(filter(None, debug_subsystems_from_env.split(",")))
+        invalid_subsystems = debug_subsystems - set(utils.DEBUG_SUBSYSTEMS)
+        if invalid_subsystems:
+            raise MacheteException(
+                f"Invalid value of `{utils.DEBUG_SUBSYSTEMS_ENV_VAR}` environment variable: `{', '.join(sorted(invalid_subsystems))}`. "
+                f"Valid subsystems: `{', '.join(utils.DEBUG_SUBSYSTEMS)}`.")
+        utils.debug_mode = True
+        utils.debug_subsystems = debug_subsystems
 
 
 def get_local_branch_short_name_from_arg_or_current_branch(
@@ -488,18 +620,68 @@ def get_local_branch_short_name_from_arg(branch_from_arg: AnyBranchName) -> Loca
     return LocalBranchShortName.of(branch_from_arg.replace('refs/heads/', ''))
 
 
+def get_git_executor_or_none(orig_args: List[str]) -> Optional[GitExecutor]:
+    recording_path = os.environ.get(RECORD_ENV_VAR)
+    replay_path = os.environ.get(REPLAY_ENV_VAR)
+    if recording_path and replay_path:
+        raise MacheteException(f"`{RECORD_ENV_VAR}` and `{REPLAY_ENV_VAR}` environment variables cannot be set at the same time")
+    if recording_path:
+        return RecordingGitExecutor(recording_path, orig_args)
+    if replay_path:
+        return ReplayingGitExecutor(replay_path)
+    return None
+
+
+def get_command_or_none(args: List[str]) -> Optional[str]:
+    # `--trace` is the only general option that takes a value (unless passed as `--trace=FILE`),
+    # so the first argument that is neither an option nor such a value must be the command.
+    args_iter = iter(args)
+    for arg in args_iter:
+        if arg == '--trace':
+            next(args_iter, None)
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+
 def launch(orig_args: List[str]) -> None:
+    profile_mode = profiling.get_mode_or_none(orig_args)
+    if profile_mode is None:
+        launch_without_profiling(orig_args)
+        return
+    if profile_mode not in profiling.PROFILE_MODES:
+        raise MacheteException(
+            f"Invalid value of `{profiling.PROFILE_ENV_VAR}` environment variable: `{profile_mode}`. "
+            f"Valid values: `{'`, `'.join(profiling.PROFILE_MODES)}`.")
+    # Invalid arguments are reported before the profiler gets started, so that no profile is reported for a run that does nothing.
+    normalized_args = profiling.normalize_args(orig_args)
+    create_cli_parser(get_command_or_none(normalized_args)).parse_args(normalized_args)
+    profiling.run_profiled(profile_mode, lambda: launch_without_profiling(orig_args))
+
+
+def launch_without_profiling(orig_args: List[str]) -> None:
     initial_current_directory: Optional[str] = utils.get_current_directory_or_none()
+    git = GitContext()
+    cli_opts = git_machete.options.CommandLineOptions()
 
     try:
-        cli_opts = git_machete.options.CommandLineOptions()
-        git = GitContext()
 
-        cli_parser: argparse.ArgumentParser = create_cli_parser()
-        parsed_cli: argparse.Namespace = cli_parser.parse_args(orig_args)
+        normalized_args = profiling.normalize_args(orig_args)
+        cli_parser: argparse.ArgumentParser = create_cli_parser(get_command_or_none(normalized_args))
+        parsed_cli: argparse.Namespace = cli_parser.parse_args(normalized_args)
         parsed_cli_as_dict: Dict[str, str] = vars(parsed_cli)
 
-        update_cli_options_using_config_keys(cli_opts, git)
+        # Enabled as early as possible, so that even locating the repository gets traced.
+        trace_file_path = parsed_cli_as_dict.get('trace') or os.environ.get(tracing.TRACE_ENV_VAR)
+        if trace_file_path:
+            tracing.enable(trace_file_path)
+        # Likewise, set up before anything is read from the repository, so that all git commands get recorded (or replayed).
+        git_executor = get_git_executor_or_none(orig_args)
+        if git_executor:
+            git = GitContext(git_executor)
+
+        if parsed_cli.command not in {"help", "version"}:  # no need to even locate the repository for these
+            update_cli_options_using_config_keys(cli_opts, git)
         update_cli_options_using_parsed_args(cli_opts, parsed_cli)
         cli_opts.validate()
         set_utils_global_variables(cli_opts)
@@ -517,6 +699,8 @@ def launch(orig_args: List[str]) -> None:
             version()
             return
 
+        # Imported only here, so that the commands that don't need the client (like `help` or `version`) start up faster.
+        from .client import MacheteClient
         machete_client = MacheteClient(git)
 
         if not os.path.exists(machete_client.definition_file_path):
@@ -563,6 +747,10 @@ def launch(orig_args: List[str]) -> None:
                     machete_client.annotate(branch, parsed_cli.annotation_text)
                 else:
                     machete_client.print_annotation(branch)
+        elif cmd == "cache":
+            # No need to read definition file.
+            if parsed_cli.subcommand == "clear":  # pragma: no branch; an unknown subcommand is handled by argparse
+                git.clear_persistent_caches()
         elif cmd == "clean":
             machete_client.read_definition_file(perform_interactive_slide_out=should_perform_interactive_slide_out)
             if 'checkout_my_github_prs' in parsed_cli:
@@ -752,13 +940,16 @@ def launch(orig_args: List[str]) -> None:
             squash_fork_point = cli_opts.opt_fork_point or machete_client.fork_point(branch=current_branch, use_overrides=True)
             machete_client.squash(current_branch=current_branch, opt_fork_point=squash_fork_point)
         elif cmd in {"status", alias_by_command["status"]}:
+            if cli_opts.opt_jobs is not None and cli_opts.opt_jobs < 1:
+                raise MacheteException("Invalid argument for `--jobs`. Expected a positive integer.")
             machete_client.read_definition_file(perform_interactive_slide_out=should_perform_interactive_slide_out)
             machete_client.expect_at_least_one_managed_branch()
             machete_client.status(
                 warn_when_branch_in_sync_but_fork_point_off=True,
                 opt_list_commits=cli_opts.opt_list_commits,
                 opt_list_commits_with_hashes=cli_opts.opt_list_commits_with_hashes,
-                opt_no_detect_squash_merges=cli_opts.opt_no_detect_squash_merges)
+                opt_no_detect_squash_merges=cli_opts.opt_no_detect_squash_merges,
+                opt_jobs=cli_opts.opt_jobs)
         elif cmd in {"traverse", alias_by_command["traverse"]}:
             if cli_opts.opt_start_from not in {"here", "root", "first-root"}:
                 raise MacheteException(
@@ -794,6 +985,17 @@ def launch(orig_args: List[str]) -> None:
                 opt_no_interactive_rebase=cli_opts.opt_no_interactive_rebase,
                 opt_fork_point=cli_opts.opt_fork_point)
     finally:
+        git.persist_caches()
+        try:
+            git.close()
+        except OSError as e:
+            warn(f"could not write the recording of git commands: {e}")
+        if cli_opts.opt_stats:
+            print(format_cache_stats(git.get_cache_stats()), file=sys.stderr)
+        try:
+            tracing.write(orig_args)
+        except OSError as e:
+            warn(f"could not write the trace: {e}")
         # Note that this problem (current directory no longer existing due to e.g. underlying git checkouts)
         # has been fixed in git itself as of 2.35.0:
         # see https://github.com/git/git/blob/master/Documentation/RelNotes/2.35.0.txt#L81
@@ -1,16 +1,18 @@
-import datetime
 import io
 import itertools
 import os
 import shlex
 import shutil
 import sys
+import threading
 from collections import OrderedDict
 from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 from . import git_config_keys, utils
 from .annotation import Annotation
-from .constants import (DISCOVER_DEFAULT_FRESH_BRANCH_COUNT, PICK_FIRST_ROOT,
+from .constants import (DISCOVER_DEFAULT_FRESH_BRANCH_COUNT,
+                        MAX_COMMITS_FOR_BATCH_ANCESTRY,
+                        MAX_COMMITS_TO_WALK_FOR_FORK_POINTS, PICK_FIRST_ROOT,
                         PICK_LAST_ROOT, GitFormatPatterns,
                         SyncToRemoteStatuses)
 from .exceptions import (InteractionStopped, MacheteException,
@@ -21,6 +23,7 @@ from .git_operations import (HEAD, AnyBranchName, AnyRevision, BranchPair,
                              RemoteBranchShortName)
 from .github import (GitHubClient, GitHubPullRequest, GitHubToken,
                      RemoteAndOrganizationAndRepository, is_github_remote_url)
+from .memory_cache import CacheStats, MemoryCachedValue
 from .utils import (GITHUB_NEW_ISSUE_MESSAGE, AnsiEscapeCodes, PopenResult,
                     SyncToParentStatus, bold, colored, debug, dim, excluding,
                     flat_map, fmt, get_pretty_choices, get_second,
@@ -28,12 +31,22 @@ from .utils import (GITHUB_NEW_ISSUE_MESSAGE, AnsiEscapeCodes, PopenResult,
                     sync_to_parent_status_to_junction_ascii_only_map, tupled,
                     underline, warn)
 
+# A commit in the history of a branch, along with the (other) branches whose filtered reflogs contain the commit.
+FilteredReflogMatch = Tuple[FullCommitHash, List[BranchPair]]
+
 
 class MacheteClient:
 
     def __init__(self, git: GitContext) -> None:
         self.__git: GitContext = git
         git.owner = self
+        # Guards the lazily computed state that can be accessed concurrently (see `status`).
+        self.__lock = threading.Lock()
+        # Unlike the rest of the state, doesn't depend on the contents of the definition file.
+        self.__branch_pairs_by_hash_in_reflog_cache: MemoryCachedValue[Dict[FullCommitHash, List[BranchPair]]] = \
+            MemoryCachedValue("branch-pairs-by-hash-in-reflog", self.__lock)
+        # Parents of the commits walked so far in `__get_first_filtered_reflog_matches`; these never change, so they're never flushed.
+        self.__parent_hashes_by_hash: Dict[FullCommitHash, List[FullCommitHash]] = {}
         self.__definition_file_path: str = self.__get_git_machete_definition_file_path()
         self.__init_state()
 
@@ -51,7 +64,6 @@ class MacheteClient:
         self.__roots: List[LocalBranchShortName] = []
         self.__annotations: Dict[LocalBranchShortName, Annotation] = {}
         self.__empty_line_status: Optional[bool] = None
-        self.__branch_pairs_by_hash_in_reflog: Optional[Dict[FullCommitHash, List[BranchPair]]] = None
 
     @property
     def definition_file_path(self) -> str:
@@ -79,7 +91,7 @@ class MacheteClient:
                 f"Use `git machete add {branch}` or `git machete edit`.")
 
     def expect_in_local_branches(self, branch: LocalBranchShortName) -> None:
-        if branch not in self.__git.get_local_branches():
+        if not self.__git.is_local_branch(branch):
             raise MacheteException(f"{bold(branch)} is not a local branch")
 
     def expect_at_least_one_managed_branch(self) -> None:
@@ -117,7 +129,7 @@ class MacheteClient:
                 raise MacheteException(
                     f"{self.__definition_file_path}, line {index + 1}: branch "
                     f"{bold(branch)} re-appears in the tree definition. {hint}")
-            if verify_branches and branch not in self.__git.get_local_branches():
+            if verify_branches and not self.__git.is_local_branch(branch):
                 invalid_branches += [branch]
             self.__managed_branches += [branch]
 
@@ -243,7 +255,7 @@ class MacheteClient:
         if opt_onto:
             self.expect_in_managed_branches(opt_onto)
 
-        if branch not in self.__git.get_local_branches():
+        if not self.__git.is_local_branch(branch):
             remote_branch: Optional[RemoteBranchShortName] = self.__git.get_sole_remote_branch(branch)
             if remote_branch:
                 common_line = (
@@ -405,6 +417,7 @@ class MacheteClient:
                 non_root_fixed_branches_by_last_checkout_timestamps[-c:]
             stale_non_root_fixed_branches = [LocalBranchShortName.of(branch) for (timestamp, branch) in stale]
             if stale:
+                import datetime
                 threshold_date = datetime.datetime.utcfromtimestamp(fresh[0][0]).strftime("%Y-%m-%d")
                 warn(
                     f"to keep the size of the discovered tree reasonable (ca. {c} branches), "
@@ -436,6 +449,8 @@ class MacheteClient:
                 debug(f"inferred no upstream for {branch}, attaching {branch} as a new root")
                 self.__roots += [branch]
 
+        self.__compute_ancestry_of_managed_branches()
+
         # Let's remove merged branches for which no downstream branch have been found.
         merged_branches_to_skip = []
         for branch in self.managed_branches:
@@ -470,7 +485,8 @@ class MacheteClient:
             warn_when_branch_in_sync_but_fork_point_off=False,
             opt_list_commits=opt_list_commits,
             opt_list_commits_with_hashes=False,
-            opt_no_detect_squash_merges=False)
+            opt_no_detect_squash_merges=False,
+            opt_jobs=None)
         print("")
         do_backup = os.path.isfile(self.__definition_file_path) and io.open(self.__definition_file_path).read().strip()
         backup_msg = (
@@ -676,6 +692,7 @@ class MacheteClient:
                 print("")
 
         initial_branch = nearest_remaining_branch = self.__git.get_current_branch()
+        self.__compute_ancestry_of_managed_branches()
 
         if opt_start_from == "root":
             dest = self.root_branch(self.__git.get_current_branch(), if_unmanaged=PICK_FIRST_ROOT)
@@ -752,7 +769,8 @@ class MacheteClient:
                     warn_when_branch_in_sync_but_fork_point_off=True,
                     opt_list_commits=opt_list_commits,
                     opt_list_commits_with_hashes=False,
-                    opt_no_detect_squash_merges=opt_no_detect_squash_merges)
+                    opt_no_detect_squash_merges=opt_no_detect_squash_merges,
+                    opt_jobs=None)
                 self.__print_new_line(True)
             if needs_slide_out:
                 any_action_suggested = True
@@ -911,7 +929,8 @@ class MacheteClient:
             warn_when_branch_in_sync_but_fork_point_off=True,
             opt_list_commits=opt_list_commits,
             opt_list_commits_with_hashes=False,
-            opt_no_detect_squash_merges=opt_no_detect_squash_merges)
+            opt_no_detect_squash_merges=opt_no_detect_squash_merges,
+            opt_jobs=None)
         print("")
         if current_branch == self.managed_branches[-1]:
             msg: str = f"Reached branch {bold(current_branch)} which has no successor"
@@ -936,8 +955,10 @@ class MacheteClient:
             warn_when_branch_in_sync_but_fork_point_off: bool,
             opt_list_commits: bool,
             opt_list_commits_with_hashes: bool,
-            opt_no_detect_squash_merges: bool
+            opt_no_detect_squash_merges: bool,
+            opt_jobs: Optional[int]
     ) -> None:
+        job_count = opt_jobs or self.__get_configured_job_count()
         next_sibling_of_ancestor_by_branch: OrderedDict[LocalBranchShortName, List[Optional[LocalBranchShortName]]] = OrderedDict()
 
         def prefix_dfs(parent: LocalBranchShortName, accumulated_path_: List[Optional[LocalBranchShortName]]) -> None:
@@ -952,39 +973,53 @@ class MacheteClient:
             prefix_dfs(root, accumulated_path_=[])
 
         out = io.StringIO()
-        sync_to_parent_status: Dict[LocalBranchShortName, SyncToParentStatus] = {}
         fork_point_hash_cached: Dict[LocalBranchShortName, Optional[FullCommitHash]] = {}  # TODO (#110): default dict with None
         fork_point_branches_cached: Dict[LocalBranchShortName, List[BranchPair]] = {}
 
+        # Each branch's fork point is only ever computed by a single thread at a time (see below).
         def fork_point_hash(branch_: LocalBranchShortName) -> Optional[FullCommitHash]:
-            if branch not in fork_point_hash_cached:
+            if branch_ not in fork_point_hash_cached:
                 try:
                     # We're always using fork point overrides, even when status
                     # is launched from discover().
                     fork_point_hash_cached[branch_], fork_point_branches_cached[branch_] = \
-                        self.__fork_point_and_containing_branch_pairs(branch_, use_overrides=True)
+                        self.__fork_point_and_containing_branch_pairs(
+                            branch_, use_overrides=True, first_filtered_reflog_matches=first_filtered_reflog_matches)
                 except MacheteException:
                     fork_point_hash_cached[branch_], fork_point_branches_cached[branch_] = None, []
             return fork_point_hash_cached[branch_]
 
-        # Edge colors need to be precomputed
-        # in order to render the leading parts of lines properly.
-        branch: LocalBranchShortName
-        for branch in self.__up_branch:
-            parent_branch = self.__up_branch[branch]
+        self.__compute_ancestry_of_managed_branches()
+        # The fork points are inferred all at once for the branches that might need them
+        # (unless listing the commits, only the fork points of the branches in sync with their parents are needed).
+        first_filtered_reflog_matches = self.__get_first_filtered_reflog_matches([
+            branch for branch, parent_branch in self.__up_branch.items()
+            if not self.__get_fork_point_override_data(branch) and
+            (opt_list_commits or self.__git.is_ancestor_or_equal(parent_branch.full_name(), branch.full_name()))])
+
+        def get_sync_to_parent_status(branch_: LocalBranchShortName) -> SyncToParentStatus:
+            parent_branch = self.__up_branch[branch_]
             assert parent_branch is not None
             if self.is_merged_to(
-                    branch=branch,
+                    branch=branch_,
                     upstream=parent_branch,
                     opt_no_detect_squash_merges=opt_no_detect_squash_merges):
-                sync_to_parent_status[branch] = SyncToParentStatus.MergedToParent
-            elif not self.__git.is_ancestor_or_equal(parent_branch.full_name(), branch.full_name()):
-                sync_to_parent_status[branch] = SyncToParentStatus.OutOfSync
-            elif self.__get_overridden_fork_point(branch) or \
-                    self.__git.get_commit_hash_by_revision(parent_branch) == fork_point_hash(branch):
-                sync_to_parent_status[branch] = SyncToParentStatus.InSync
+                return SyncToParentStatus.MergedToParent
+            elif not self.__git.is_ancestor_or_equal(parent_branch.full_name(), branch_.full_name()):
+                return SyncToParentStatus.OutOfSync
+            elif self.__get_overridden_fork_point(branch_) or \
+                    self.__git.get_commit_hash_by_revision(parent_branch) == fork_point_hash(branch_):
+                return SyncToParentStatus.InSync
             else:
-                sync_to_parent_status[branch] = SyncToParentStatus.InSyncButForkPointOff
+                return SyncToParentStatus.InSyncButForkPointOff
+
+        # Edge colors need to be precomputed
+        # in order to render the leading parts of lines properly.
+        # The queries for each branch are independent of each other, so they're run concurrently;
+        # the output is then rendered sequentially, and hence doesn't depend on the number of jobs.
+        branches_with_parent = list(self.__up_branch)
+        sync_to_parent_status: Dict[LocalBranchShortName, SyncToParentStatus] = dict(
+            zip(branches_with_parent, utils.map_concurrently(get_sync_to_parent_status, branches_with_parent, job_count)))
 
         currently_rebased_branch = self.__git.get_currently_rebased_branch_or_none()
         currently_checked_out_branch = self.__git.get_currently_checked_out_branch_or_none()
@@ -995,6 +1030,61 @@ class MacheteClient:
         maybe_space_before_branch_name = ' ' if self.__git.get_boolean_config_attr(git_config_keys.STATUS_EXTRA_SPACE_BEFORE_BRANCH_NAME,
                                                                                    default_value=False) else ''
 
+        def get_commits_to_list(branch_: LocalBranchShortName) -> List[GitLogEntry]:
+            fork_point = fork_point_hash(branch_)
+            if not fork_point:
+                # Rare case, but can happen e.g. due to reflog expiry.
+                return []
+            elif sync_to_parent_status[branch_] == SyncToParentStatus.MergedToParent:
+                return []
+            elif sync_to_parent_status[branch_] == SyncToParentStatus.InSyncButForkPointOff:
+                upstream = self.__up_branch[branch_]
+                assert upstream is not None
+                return self.__git.get_commits_between(upstream.full_name(), branch_.full_name())
+            else:  # (SyncToParentStatus.OutOfSync, SyncToParentStatus.InSync):
+                return self.__git.get_commits_between(fork_point, branch_.full_name())
+
+        def get_sync_to_remote_status(branch_: LocalBranchShortName) -> str:
+            s, remote = self.__git.get_combined_remote_sync_status(branch_)
+            return {
+                SyncToRemoteStatuses.NO_REMOTES: "",
+                SyncToRemoteStatuses.UNTRACKED: colored(" (untracked)", AnsiEscapeCodes.ORANGE),
+                SyncToRemoteStatuses.IN_SYNC_WITH_REMOTE: "",
+                SyncToRemoteStatuses.BEHIND_REMOTE:
+                    colored(f" (behind {bold(remote)})", AnsiEscapeCodes.RED),  # type: ignore [arg-type]
+                SyncToRemoteStatuses.AHEAD_OF_REMOTE:
+                    colored(f" (ahead of {bold(remote)})", AnsiEscapeCodes.RED),  # type: ignore [arg-type]
+                SyncToRemoteStatuses.DIVERGED_FROM_AND_OLDER_THAN_REMOTE:
+                    colored(f" (diverged from & older than {bold(remote)})", AnsiEscapeCodes.RED),  # type: ignore [arg-type]
+                SyncToRemoteStatuses.DIVERGED_FROM_AND_NEWER_THAN_REMOTE:
+                    colored(f" (diverged from {bold(remote)})", AnsiEscapeCodes.RED)  # type: ignore [arg-type]
+            }[SyncToRemoteStatuses(s)]
+
+        # The hook is arbitrary user code (which might e.g. not expect to be run concurrently with itself),
+        # so unlike the git queries, it's run sequentially for each branch, in the order of the output.
+        def get_hook_output(branch_: LocalBranchShortName) -> str:
+            hook_output = ""
+            if hook_executable:
+                debug("running machete-status-branch hook (%s) for branch %s", hook_path, branch_, subsystem="hooks")
+                hook_env = dict(os.environ, ASCII_ONLY=str(utils.ascii_only).lower())
+                status_code, stdout, stderr = self.__popen_hook(hook_path, branch_, cwd=self.__git.get_root_dir(), env=hook_env)
+
+                if status_code == 0:
+                    if not stdout.isspace():
+                        # Replace all newlines with spaces, in case the hook prints out more than one line
+                        hook_output = "  " + stdout.replace('\n', ' ').rstrip()
+                else:
+                    debug("machete-status-branch hook (%s) for branch %s returned %s; stdout: '%s'; stderr: '%s'",
+                          hook_path, branch_, status_code, stdout, stderr, subsystem="hooks")
+            return hook_output
+
+        all_branches = list(next_sibling_of_ancestor_by_branch)
+        commits_to_list: Dict[LocalBranchShortName, List[GitLogEntry]] = {}
+        if opt_list_commits:
+            commits_to_list = dict(zip(branches_with_parent, utils.map_concurrently(get_commits_to_list, branches_with_parent, job_count)))
+        sync_to_remote_status: Dict[LocalBranchShortName, str] = dict(
+            zip(all_branches, utils.map_concurrently(get_sync_to_remote_status, all_branches, job_count)))
+
         def print_line_prefix(branch_: LocalBranchShortName, suffix: str) -> None:
             out.write("  " + maybe_space_before_branch_name)
             for sibling in next_sibling_of_ancestor[:-1]:
@@ -1011,19 +1101,7 @@ class MacheteClient:
                 print_line_prefix(branch, f"{utils.get_vertical_bar()}\n")
                 if opt_list_commits:
                     fork_point = fork_point_hash(branch)
-                    if not fork_point:
-                        # Rare case, but can happen e.g. due to reflog expiry.
-                        commits: List[GitLogEntry] = []
-                    elif sync_to_parent_status[branch] == SyncToParentStatus.MergedToParent:
-                        commits = []
-                    elif sync_to_parent_status[branch] == SyncToParentStatus.InSyncButForkPointOff:
-                        upstream = self.__up_branch[branch]
-                        assert upstream is not None
-                        commits = self.__git.get_commits_between(upstream.full_name(), branch.full_name())
-                    else:  # (SyncToParentStatus.OutOfSync, SyncToParentStatus.InSync):
-                        commits = self.__git.get_commits_between(fork_point, branch.full_name())
-
-                    for commit in commits:
+                    for commit in commits_to_list[branch]:
                         if commit.hash == fork_point:
                             # fork_point_branches_cached will already be there thanks to
                             # the above call to 'fork_point_hash'.
@@ -1083,36 +1161,7 @@ class MacheteClient:
             if branch in self.__annotations:
                 anno = self.__annotations[branch].get_formatted_text()
 
-            s, remote = self.__git.get_combined_remote_sync_status(branch)
-            sync_status = {
-                SyncToRemoteStatuses.NO_REMOTES: "",
-                SyncToRemoteStatuses.UNTRACKED: colored(" (untracked)", AnsiEscapeCodes.ORANGE),
-                SyncToRemoteStatuses.IN_SYNC_WITH_REMOTE: "",
-                SyncToRemoteStatuses.BEHIND_REMOTE:
-                    colored(f" (behind {bold(remote)})", AnsiEscapeCodes.RED),  # type: ignore [arg-type]
-                SyncToRemoteStatuses.AHEAD_OF_REMOTE:
-                    colored(f" (ahead of {bold(remote)})", AnsiEscapeCodes.RED),  # type: ignore [arg-type]
-                SyncToRemoteStatuses.DIVERGED_FROM_AND_OLDER_THAN_REMOTE:
-                    colored(f" (diverged from & older than {bold(remote)})", AnsiEscapeCodes.RED),  # type: ignore [arg-type]
-                SyncToRemoteStatuses.DIVERGED_FROM_AND_NEWER_THAN_REMOTE:
-                    colored(f" (diverged from {bold(remote)})", AnsiEscapeCodes.RED)  # type: ignore [arg-type]
-            }[SyncToRemoteStatuses(s)]
-
-            hook_output = ""
-            if hook_executable:
-                debug(f"running machete-status-branch hook ({hook_path}) for branch {branch}")
-                hook_env = dict(os.environ, ASCII_ONLY=str(utils.ascii_only).lower())
-                status_code, stdout, stderr = self.__popen_hook(hook_path, branch, cwd=self.__git.get_root_dir(), env=hook_env)
-
-                if status_code == 0:
-                    if not stdout.isspace():
-                        # Replace all newlines with spaces, in case the hook prints out more than one line
-                        hook_output = "  " + stdout.replace('\n', ' ').rstrip()
-                else:
-                    debug(f"machete-status-branch hook ({hook_path}) for branch {branch} "
-                          f"returned {status_code}; stdout: '{stdout}'; stderr: '{stderr}'")
-
-            out.write(current + anno + sync_status + hook_output + "\n")
+            out.write(current + anno + sync_to_remote_status[branch] + get_hook_output(branch) + "\n")
 
         sys.stdout.write(out.getvalue())
         out.close()
@@ -1145,20 +1194,29 @@ class MacheteClient:
             print("", file=sys.stderr)
             warn(f"{first_part}.\n\n{second_part}.")
 
+    def __get_configured_job_count(self) -> int:
+        configured_job_count = self.__git.get_config_attr_or_none(git_config_keys.JOBS)
+        if configured_job_count is None:
+            return os.cpu_count() or 1
+        if not configured_job_count.isdigit() or int(configured_job_count) < 1:
+            raise MacheteException(f"Invalid value for `{git_config_keys.JOBS}` git config key: `{configured_job_count}`. "
+                                   "Expected a positive integer.")
+        return int(configured_job_count)
+
     @staticmethod
     def __popen_hook(*args: str, cwd: str, env: Dict[str, str]) -> PopenResult:
         if sys.platform == "win32":
             # This is a poor-man's solution to the problem of Windows **not** recognizing Unix-style shebangs :/
-            return utils.popen_cmd("sh", *args, cwd=cwd, env=env)  # pragma: no cover
+            return utils.popen_cmd("sh", *args, cwd=cwd, env=env, debug_subsystem="hooks")  # pragma: no cover
         else:
-            return utils.popen_cmd(*args, cwd=cwd, env=env)
+            return utils.popen_cmd(*args, cwd=cwd, env=env, debug_subsystem="hooks")
 
     def __run_hook(self, *args: str, cwd: str) -> int:
         self.__git.flush_caches()
         if sys.platform == "win32":
-            return utils.run_cmd("sh", *args, cwd=cwd)  # pragma: no cover
+            return utils.run_cmd("sh", *args, cwd=cwd, debug_subsystem="hooks")  # pragma: no cover
         else:
-            return utils.run_cmd(*args, cwd=cwd)
+            return utils.run_cmd(*args, cwd=cwd, debug_subsystem="hooks")
 
     def rebase(self, onto: AnyRevision, from_exclusive: AnyRevision, branch: LocalBranchShortName, opt_no_interactive_rebase: bool) -> None:
         # Let's use `OPTS` suffix for consistency with git's built-in env var `GIT_DIFF_OPTS`
@@ -1166,7 +1224,7 @@ class MacheteClient:
 
         hook_path = self.__git.get_hook_path("machete-pre-rebase")
         if self.__git.check_hook_executable(hook_path):
-            debug(f"running machete-pre-rebase hook ({hook_path})")
+            debug("running machete-pre-rebase hook (%s)", hook_path, subsystem="hooks")
             exit_code = self.__run_hook(hook_path, onto, from_exclusive, branch, cwd=self.__git.get_root_dir())
             if exit_code == 0:
                 self.__git.rebase(onto, from_exclusive, branch, opt_no_interactive_rebase, extra_rebase_opts)
@@ -1277,10 +1335,14 @@ class MacheteClient:
         # This case is extremely unlikely on a modern Unix-like system.
         return []
 
-    def __fork_point_and_containing_branch_pairs(self,
-                                                 branch: LocalBranchShortName,
-                                                 use_overrides: bool
-                                                 ) -> Tuple[FullCommitHash, List[BranchPair]]:
+    # `first_filtered_reflog_matches` can contain the (already found) first matches of `__match_log_to_filtered_reflogs`
+    # for any of the branches, see `__get_first_filtered_reflog_matches`.
+    def __fork_point_and_containing_branch_pairs(
+            self,
+            branch: LocalBranchShortName,
+            use_overrides: bool,
+            first_filtered_reflog_matches: Optional[Dict[LocalBranchShortName, Optional[FilteredReflogMatch]]] = None
+    ) -> Tuple[FullCommitHash, List[BranchPair]]:
         upstream = self.__up_branch.get(branch)
         upstream_hash = self.__git.get_commit_hash_by_revision(upstream) if upstream else None
 
@@ -1293,9 +1355,9 @@ class MacheteClient:
                     # We need to handle the case when branch is a descendant of upstream,
                     # but the fork point of branch is overridden to a commit that is NOT a descendant of upstream.
                     # In this case it's more reasonable to assume that upstream (and not overridden_fp_hash) is the fork point.
-                    debug(
-                        f"{branch} is descendant of its upstream {upstream}, but overridden fork point commit {overridden_fp_hash} "
-                        f"is NOT a descendant of {upstream}; falling back to {upstream} as fork point")
+                    debug("%s is descendant of its upstream %s, but overridden fork point commit %s "
+                          "is NOT a descendant of %s; falling back to %s as fork point",
+                          branch, upstream, overridden_fp_hash, upstream, upstream, subsystem="fork-point")
                     return upstream_hash, []
                 elif upstream and \
                         self.__git.is_ancestor_or_equal(overridden_fp_hash, upstream.full_name()):
@@ -1304,31 +1366,33 @@ class MacheteClient:
                     assert common_ancestor is not None
                     return common_ancestor, []
                 else:
-                    debug(f"fork point of {branch} is overridden to {overridden_fp_hash}; skipping inference")
+                    debug("fork point of %s is overridden to %s; skipping inference", branch, overridden_fp_hash, subsystem="fork-point")
                     return overridden_fp_hash, []
 
-        try:
-            fp_hash, containing_branch_pairs = next(self.__match_log_to_filtered_reflogs(branch))
-        except StopIteration:
+        if first_filtered_reflog_matches is None or branch not in first_filtered_reflog_matches:
+            first_filtered_reflog_matches = self.__get_first_filtered_reflog_matches([branch])
+        first_filtered_reflog_match = first_filtered_reflog_matches[branch]
+        if first_filtered_reflog_match is None:
             if upstream and upstream_hash:
                 if self.__git.is_ancestor_or_equal(upstream.full_name(), branch.full_name()):
-                    debug(
-                        f"cannot find fork point, but {branch} is a descendant of its upstream {upstream}; "
-                        f"falling back to {upstream} as fork point")
+                    debug("cannot find fork point, but %s is a descendant of its upstream %s; falling back to %s as fork point",
+                          branch, upstream, upstream, subsystem="fork-point")
                     return upstream_hash, []
                 else:
                     common_ancestor_hash = self.__git.get_merge_base(upstream.full_name(), branch.full_name())
                     if common_ancestor_hash:
-                        debug(
-                            f"cannot find fork point, and {branch} is NOT a descendant of its upstream {upstream}; "
-                            f"falling back to common ancestor of {branch} and {upstream} (commit {common_ancestor_hash}) as fork point")
+                        debug("cannot find fork point, and %s is NOT a descendant of its upstream %s; "
+                              "falling back to common ancestor of %s and %s (commit %s) as fork point",
+                              branch, upstream, branch, upstream, common_ancestor_hash, subsystem="fork-point")
                         return common_ancestor_hash, []
             raise MacheteException(f"Fork point not found for branch <b>{branch}</b>; "
                                    f"use `git machete fork-point {branch} --override-to...`")
         else:
-            debug(f"commit {fp_hash} is the most recent point in history of {branch} to occur on "
-                  "filtered reflog of any other branch or its remote counterpart "
-                  f"(specifically: {' and '.join(map(utils.get_second, containing_branch_pairs))})")
+            fp_hash, containing_branch_pairs = first_filtered_reflog_match
+            if utils.is_debug_enabled("fork-point"):
+                debug("commit %s is the most recent point in history of %s to occur on "
+                      "filtered reflog of any other branch or its remote counterpart (specifically: %s)",
+                      fp_hash, branch, ' and '.join(map(utils.get_second, containing_branch_pairs)), subsystem="fork-point")
 
             if upstream and upstream_hash and \
                     self.__git.is_ancestor_or_equal(upstream.full_name(), branch.full_name()) and \
@@ -1338,10 +1402,9 @@ class MacheteClient:
                 # of this branch, thus is_ancestor(upstream, branch) should imply
                 # is_ancestor(upstream, FP(branch)), but it's still possible in
                 # case reflog of upstream is incomplete for whatever reason.
-                debug(
-                    f"{upstream} is an ancestor of its upstream {branch}, "
-                    f"but the inferred fork point commit {fp_hash} is NOT a descendant of {upstream}; "
-                    f"falling back to {upstream} as fork point")
+                debug("%s is an ancestor of its upstream %s, but the inferred fork point commit %s is NOT a descendant of %s; "
+                      "falling back to %s as fork point",
+                      upstream, branch, fp_hash, upstream, upstream, subsystem="fork-point")
                 return upstream_hash, []
             elif upstream and \
                     not self.__git.is_ancestor_or_equal(upstream.full_name(), branch.full_name()) and \
@@ -1350,10 +1413,9 @@ class MacheteClient:
                 # We are sure that a common ancestor exists - `fp_hash` is an ancestor of both `branch` and `upstream`.
                 common_ancestor_hash = self.__git.get_merge_base(upstream.full_name(), branch.full_name())
                 assert common_ancestor_hash is not None
-                debug(
-                    f"{upstream} is NOT an ancestor of its upstream {branch}, "
-                    f"but the inferred fork point commit {fp_hash} is an ancestor of {upstream}; "
-                    f"falling back to the common ancestor of {branch} and {upstream} (commit {common_ancestor_hash}) as fork point")
+                debug("%s is NOT an ancestor of its upstream %s, but the inferred fork point commit %s is an ancestor of %s; "
+                      "falling back to the common ancestor of %s and %s (commit %s) as fork point",
+                      upstream, branch, fp_hash, upstream, branch, upstream, common_ancestor_hash, subsystem="fork-point")
                 return common_ancestor_hash, []
             else:
                 return fp_hash, containing_branch_pairs
@@ -1477,6 +1539,18 @@ class MacheteClient:
                 return dbs
         return []
 
+    # Resolves the ancestry of each managed branch vs its parent (and vs its remote counterpart) up front,
+    # with a single walk over the history rather than a separate `git merge-base` call for each pair.
+    def __compute_ancestry_of_managed_branches(self) -> None:
+        pairs: List[Tuple[AnyRevision, AnyRevision]] = [
+            (upstream.full_name(), branch.full_name()) for branch, upstream in self.__up_branch.items()]
+        if self.__git.get_remotes():
+            for branch in self.managed_branches:
+                remote_branch = self.__git.get_combined_counterpart_for_fetching_of_branch(branch)
+                if remote_branch:
+                    pairs.append((branch.full_name(), remote_branch.full_name()))
+        self.__git.compute_ancestry(pairs)
+
     def __is_merged_to_upstream(
             self, branch: LocalBranchShortName, *, opt_no_detect_squash_merges: bool) -> bool:
         upstream = self.__up_branch.get(branch)
@@ -1488,7 +1562,7 @@ class MacheteClient:
                                   new_downstreams: List[LocalBranchShortName]) -> None:
         hook_path = self.__git.get_hook_path("machete-post-slide-out")
         if self.__git.check_hook_executable(hook_path):
-            debug(f"running machete-post-slide-out hook ({hook_path})")
+            debug("running machete-post-slide-out hook (%s)", hook_path, subsystem="hooks")
             new_downstreams_strings: List[str] = [str(db) for db in new_downstreams]
             exit_code = self.__run_hook(hook_path, new_upstream, slid_out_branch, *new_downstreams_strings,
                                         cwd=self.__git.get_root_dir())
@@ -1564,7 +1638,7 @@ class MacheteClient:
                            # which might lead to fork point being inferred too *late* in the history
                            gs_ == "update by push")
             if is_excluded:
-                debug("skipping reflog entry")
+                debug("skipping reflog entry", subsystem="fork-point")
             return is_excluded
 
         branch_reflog = self.__git.get_reflog(branch.full_name())
@@ -1574,14 +1648,16 @@ class MacheteClient:
         earliest_hash, earliest_gs = branch_reflog[-1]  # Note that the reflog is returned from latest to earliest entries.
         hashes_to_exclude = set()
         if earliest_gs.startswith("branch: Created from"):
-            debug(f"skipping any reflog entry with the hash equal to the hash of the earliest (branch creation) entry: {earliest_hash}")
+            debug("skipping any reflog entry with the hash equal to the hash of the earliest (branch creation) entry: %s",
+                  earliest_hash, subsystem="fork-point")
             hashes_to_exclude.add(earliest_hash)
 
         result = [hash for (hash, gs) in branch_reflog if
                   hash not in hashes_to_exclude and not is_excluded_reflog_subject(hash, gs)]
-        reflog = (", ".join(result) or "<empty>")
-        debug("computed filtered reflog (= reflog without branch creation "
-              f"and branch reset events irrelevant for fork point/upstream inference): {reflog}")
+        if utils.is_debug_enabled("fork-point"):
+            debug("computed filtered reflog (= reflog without branch creation "
+                  "and branch reset events irrelevant for fork point/upstream inference): %s",
+                  ", ".join(result) or "<empty>", subsystem="fork-point")
         return result
 
     def sync_annotations_to_github_prs(self) -> None:
@@ -1590,7 +1666,7 @@ class MacheteClient:
         github_client = GitHubClient(domain=domain, organization=remote_org_repo.organization, repository=remote_org_repo.repository)
         print('Checking for open GitHub PRs... ', end='', flush=True)
         current_user: Optional[str] = github_client.derive_current_user_login()
-        debug('Current GitHub user is ' + (bold(current_user or '<none>')))
+        debug('Current GitHub user is ' + (bold(current_user or '<none>')), subsystem="github")
         all_open_prs: List[GitHubPullRequest] = github_client.derive_pull_requests()
         print(fmt('<green><b>OK</b></green>'))
         self.__sync_annotations_to_definition_file(all_open_prs, current_user, verbose=True)
@@ -1598,7 +1674,7 @@ class MacheteClient:
     def __sync_annotations_to_definition_file(self, prs: List[GitHubPullRequest], current_user: Optional[str], verbose: bool) -> None:
         for pr in prs:
             if LocalBranchShortName.of(pr.head) in self.managed_branches:
-                debug(f'{pr} corresponds to a managed branch')
+                debug('%s corresponds to a managed branch', pr, subsystem="github")
                 anno: str = f'PR #{pr.number}'
                 if pr.user != current_user:
                     anno += f' ({pr.user})'
@@ -1628,7 +1704,7 @@ class MacheteClient:
                     self.__annotations[LocalBranchShortName.of(pr.head)] = Annotation(f'{anno} {old_annotation_qualifiers_text}') \
                         if old_annotation_text is not None else Annotation(anno)
             else:
-                debug(f'{pr} does NOT correspond to a managed branch')
+                debug('%s does NOT correspond to a managed branch', pr, subsystem="github")
         self.save_definition_file()
 
     # Parse and evaluate direction against current branch for show/go commands
@@ -1657,68 +1733,170 @@ class MacheteClient:
         else:  # pragma: no cover; an unknown direction is handled by argparse
             raise MacheteException(f"Invalid direction: `{param}`.\n" + GITHUB_NEW_ISSUE_MESSAGE)
 
-    def __match_log_to_filtered_reflogs(self, branch: LocalBranchShortName) -> Iterator[Tuple[FullCommitHash, List[BranchPair]]]:
-
-        if self.__branch_pairs_by_hash_in_reflog is None:
-            def generate_entries() -> Iterator[Tuple[FullCommitHash, BranchPair]]:
-                for lb in self.__git.get_local_branches():
-                    lb_hashes = set()
-                    for hash_ in self.filtered_reflog(lb):
-                        lb_hashes.add(hash_)
-                        yield FullCommitHash.of(hash_), BranchPair(lb, lb)
-                    remote_branch = self.__git.get_combined_counterpart_for_fetching_of_branch(lb)
-                    if remote_branch:
-                        for hash_ in self.filtered_reflog(remote_branch):
-                            if hash_ not in lb_hashes:
-                                yield FullCommitHash.of(hash_), BranchPair(lb, remote_branch)
-
-            self.__branch_pairs_by_hash_in_reflog = {}
-            for hash, branch_pair in generate_entries():
-                if hash in self.__branch_pairs_by_hash_in_reflog:
-                    # The practice shows that it's rather unlikely for a given
-                    # commit to appear on filtered reflogs of two unrelated branches
-                    # ("unrelated" as in, not a local branch and its remote counterpart)
-                    # but we need to handle this case anyway.
-                    self.__branch_pairs_by_hash_in_reflog[hash] += [branch_pair]
-                else:
-                    self.__branch_pairs_by_hash_in_reflog[hash] = [branch_pair]
+    def __get_branch_pairs_by_hash_in_reflog(self) -> Dict[FullCommitHash, List[BranchPair]]:
+        return self.__branch_pairs_by_hash_in_reflog_cache.get_or_load(self.__compute_branch_pairs_by_hash_in_reflog)
+
+    def __compute_branch_pairs_by_hash_in_reflog(self) -> Dict[FullCommitHash, List[BranchPair]]:
+        def generate_entries() -> Iterator[Tuple[FullCommitHash, BranchPair]]:
+            for lb in self.__git.get_local_branches():
+                lb_hashes = set()
+                for hash_ in self.filtered_reflog(lb):
+                    lb_hashes.add(hash_)
+                    yield FullCommitHash.of(hash_), BranchPair(lb, lb)
+                remote_branch = self.__git.get_combined_counterpart_for_fetching_of_branch(lb)
+                if remote_branch:
+                    for hash_ in self.filtered_reflog(remote_branch):
+                        if hash_ not in lb_hashes:
+                            yield FullCommitHash.of(hash_), BranchPair(lb, remote_branch)
+
+        branch_pairs_by_hash_in_reflog: Dict[FullCommitHash, List[BranchPair]] = {}
+        for hash, branch_pair in generate_entries():
+            if hash in branch_pairs_by_hash_in_reflog:
+                # The practice shows that it's rather unlikely for a given
+                # commit to appear on filtered reflogs of two unrelated branches
+                # ("unrelated" as in, not a local branch and its remote counterpart)
+                # but we need to handle this case anyway.
+                branch_pairs_by_hash_in_reflog[hash] += [branch_pair]
+            else:
+                branch_pairs_by_hash_in_reflog[hash] = [branch_pair]
+
+        def log_result() -> Iterator[str]:
+            branch_pairs_: List[BranchPair]
+            hash_: FullCommitHash
+            for hash_, branch_pairs_ in branch_pairs_by_hash_in_reflog.items():
+                def branch_pair_to_str(lb: str, lb_or_rb: str) -> str:
+                    return lb if lb == lb_or_rb else f"{lb_or_rb} (remote counterpart of {lb})"
 
-            def log_result() -> Iterator[str]:
-                branch_pairs_: List[BranchPair]
-                hash_: FullCommitHash
-                assert self.__branch_pairs_by_hash_in_reflog is not None
-                for hash_, branch_pairs_ in self.__branch_pairs_by_hash_in_reflog.items():
-                    def branch_pair_to_str(lb: str, lb_or_rb: str) -> str:
-                        return lb if lb == lb_or_rb else f"{lb_or_rb} (remote counterpart of {lb})"
+                joined_branch_pairs = ", ".join(map(tupled(branch_pair_to_str), branch_pairs_))
+                yield dim(f"{hash_} => {joined_branch_pairs}")
 
-                    joined_branch_pairs = ", ".join(map(tupled(branch_pair_to_str), branch_pairs_))
-                    yield dim(f"{hash_} => {joined_branch_pairs}")
+        if utils.is_debug_enabled("fork-point"):
+            debug("branches containing the given hash in their filtered reflog: \n%s\n", "\n".join(log_result()), subsystem="fork-point")
+        return branch_pairs_by_hash_in_reflog
 
-            branches = "\n".join(log_result())
-            debug(f"branches containing the given hash in their filtered reflog: \n{branches}\n")
+    def __match_log_to_filtered_reflogs(self, branch: LocalBranchShortName) -> Iterator[FilteredReflogMatch]:
+        branch_pairs_by_hash_in_reflog = self.__get_branch_pairs_by_hash_in_reflog()
 
         branch_full_hash = self.__git.get_commit_hash_by_revision(branch)
         if not branch_full_hash:
             return
 
-        for hash in self.__git.spoonfeed_log_hashes(branch_full_hash):
-            if hash in self.__branch_pairs_by_hash_in_reflog:
-                # The entries must be sorted by lb_or_rb to make sure the
-                # upstream inference is deterministic (and does not depend on the
-                # order in which `generate_entries` iterated through the local branches).
-                branch_pairs: List[BranchPair] = self.__branch_pairs_by_hash_in_reflog[hash]
+        for hash in self.__git.get_log_hashes_lazily(branch_full_hash):
+            containing_branch_pairs = self.__get_containing_branch_pairs(branch, hash, branch_pairs_by_hash_in_reflog)
+            if containing_branch_pairs:
+                yield hash, containing_branch_pairs
 
-                def lb_is_not_b(lb: str, _lb_or_rb: str) -> bool:
-                    return lb != branch
-
-                containing_branch_pairs = sorted(filter(tupled(lb_is_not_b), branch_pairs), key=get_second)
-                if containing_branch_pairs:
-                    debug(f"commit {hash} found in filtered reflog of {' and '.join(map(get_second, branch_pairs))}")
-                    yield hash, containing_branch_pairs
-                else:
-                    debug(f"commit {hash} found only in filtered reflog of {' and '.join(map(get_second, branch_pairs))}; ignoring")
+    @staticmethod
+    def __get_containing_branch_pairs(branch: LocalBranchShortName,
+                                      hash: FullCommitHash,
+                                      branch_pairs_by_hash_in_reflog: Dict[FullCommitHash, List[BranchPair]]
+                                      ) -> List[BranchPair]:
+        if hash not in branch_pairs_by_hash_in_reflog:
+            debug("commit %s not found in any filtered reflog", hash, subsystem="fork-point")
+            return []
+        # The entries must be sorted by lb_or_rb to make sure the
+        # upstream inference is deterministic (and does not depend on the
+        # order in which `generate_entries` iterated through the local branches).
+        branch_pairs: List[BranchPair] = branch_pairs_by_hash_in_reflog[hash]
+
+        def lb_is_not_b(lb: str, _lb_or_rb: str) -> bool:
+            return lb != branch
+
+        containing_branch_pairs = sorted(filter(tupled(lb_is_not_b), branch_pairs), key=get_second)
+        if containing_branch_pairs:
+            if utils.is_debug_enabled("fork-point"):
+                debug("commit %s found in filtered reflog of %s",
+                      hash, ' and '.join(map(get_second, branch_pairs)), subsystem="fork-point")
+        else:
+            if utils.is_debug_enabled("fork-point"):
+                debug("commit %s found only in filtered reflog of %s; ignoring",
+                      hash, ' and '.join(map(get_second, branch_pairs)), subsystem="fork-point")
+        return containing_branch_pairs
+
+    # Finds the first match of `__match_log_to_filtered_reflogs` (if any) for each of the given branches at once,
+    # with a single `git log` walking the joint history of all the branches, rather than a separate `git log` for each branch
+    # that would go through the shared part of the history (e.g. the stack that the branch is based on) over and over again.
+    # `git log` of a single branch lists its commits by committer date, which only determines the order unambiguously
+    # as long as the history is linear, i.e. each commit is followed by its only parent. Hence, the walk follows each branch
+    # along the chain of its commits (tagging each commit with the branches waiting for it to be walked) only until the first match,
+    # or until a merge commit; in the latter case (or if the joint history turns out to be too long), the branch falls back
+    # to its own `git log`. This way, the results are always the same as with `__match_log_to_filtered_reflogs`.
+    def __get_first_filtered_reflog_matches(self, branches: List[LocalBranchShortName]
+                                            ) -> Dict[LocalBranchShortName, Optional[FilteredReflogMatch]]:
+        branch_pairs_by_hash_in_reflog = self.__get_branch_pairs_by_hash_in_reflog()
+        first_match_by_branch: Dict[LocalBranchShortName, Optional[FilteredReflogMatch]] = {}
+        waiting_branches_by_hash: Dict[FullCommitHash, List[LocalBranchShortName]] = {}
+        fallback_branches: List[LocalBranchShortName] = []
+        for branch in branches:
+            branch_full_hash = self.__git.get_commit_hash_by_revision(branch)
+            if not branch_full_hash:
+                first_match_by_branch[branch] = None
+            elif self.__git.is_log_stored(branch_full_hash):
+                # E.g. when the fork point has already been found before by `traverse`; no need to walk the history again.
+                fallback_branches.append(branch)
             else:
-                debug(f"commit {hash} not found in any filtered reflog")
+                waiting_branches_by_hash.setdefault(branch_full_hash, []).append(branch)
+        if waiting_branches_by_hash and len(waiting_branches_by_hash) <= MAX_COMMITS_FOR_BATCH_ANCESTRY:
+            fallback_branches += self.__walk_joint_history_to_first_filtered_reflog_matches(
+                waiting_branches_by_hash, branch_pairs_by_hash_in_reflog, first_match_by_branch)
+        else:
+            # Let's not hit the limits of command line length.
+            fallback_branches += [branch for branches_ in waiting_branches_by_hash.values() for branch in branches_]
+
+        for branch in fallback_branches:
+            debug("walking the history of %s alone", branch, subsystem="fork-point")
+            first_match_by_branch[branch] = next(self.__match_log_to_filtered_reflogs(branch), None)
+        return first_match_by_branch
+
+    # Returns the branches that need to fall back to their own `git log`.
+    def __walk_joint_history_to_first_filtered_reflog_matches(
+            self,
+            waiting_branches_by_hash: Dict[FullCommitHash, List[LocalBranchShortName]],
+            branch_pairs_by_hash_in_reflog: Dict[FullCommitHash, List[BranchPair]],
+            first_match_by_branch: Dict[LocalBranchShortName, Optional[FilteredReflogMatch]]
+    ) -> List[LocalBranchShortName]:
+        fallback_branches: List[LocalBranchShortName] = []
+        parent_hashes_by_hash = self.__parent_hashes_by_hash
+
+        def walk(hash_: FullCommitHash) -> None:
+            # Due to clock skew, the parent of a commit might have been walked even before the commit itself.
+            hashes_to_check: List[FullCommitHash] = [hash_]
+            while hashes_to_check:
+                hash = hashes_to_check.pop()
+                for branch in waiting_branches_by_hash.pop(hash, []):
+                    containing_branch_pairs = self.__get_containing_branch_pairs(branch, hash, branch_pairs_by_hash_in_reflog)
+                    if containing_branch_pairs:
+                        first_match_by_branch[branch] = hash, containing_branch_pairs
+                    elif not parent_hashes_by_hash[hash]:
+                        first_match_by_branch[branch] = None
+                    elif len(parent_hashes_by_hash[hash]) > 1:
+                        fallback_branches.append(branch)
+                    else:
+                        parent_hash = parent_hashes_by_hash[hash][0]
+                        waiting_branches_by_hash.setdefault(parent_hash, []).append(branch)
+                        if parent_hash in parent_hashes_by_hash:
+                            hashes_to_check.append(parent_hash)
+
+        # The commits walked by the previous calls (e.g. by the previous `status` in `traverse`) don't need to be read again.
+        for hash in list(waiting_branches_by_hash):
+            if hash in parent_hashes_by_hash:
+                walk(hash)
+        if not waiting_branches_by_hash:
+            return fallback_branches
+
+        log_entries = self.__git.get_log_entries_lazily(list(waiting_branches_by_hash))
+        try:
+            for walked_commit_count, (commit_hash, parent_hashes) in enumerate(log_entries, start=1):
+                parent_hashes_by_hash[FullCommitHash(commit_hash)] = list(map(FullCommitHash, parent_hashes))
+                walk(FullCommitHash(commit_hash))
+                if not waiting_branches_by_hash:
+                    break
+                if walked_commit_count >= MAX_COMMITS_TO_WALK_FOR_FORK_POINTS:
+                    fallback_branches += [branch for branches_ in waiting_branches_by_hash.values() for branch in branches_]
+                    break
+        finally:
+            log_entries.close()
+        return fallback_branches
 
     def __infer_upstream(self,
                          branch: LocalBranchShortName,
@@ -1726,17 +1904,20 @@ class MacheteClient:
                          reject_reason_message: str = ""
                          ) -> Optional[LocalBranchShortName]:
         for hash, containing_branch_pairs in self.__match_log_to_filtered_reflogs(branch):
-            debug(f"commit {hash} found in filtered reflog of {' and '.join(map(get_second, containing_branch_pairs))}")
+            if utils.is_debug_enabled("fork-point"):
+                debug("commit %s found in filtered reflog of %s",
+                      hash, ' and '.join(map(get_second, containing_branch_pairs)), subsystem="fork-point")
 
             for candidate, original_matched_branch in containing_branch_pairs:
                 if candidate != original_matched_branch:
-                    debug(f"upstream candidate is {candidate}, which is the local counterpart of {original_matched_branch}")
+                    debug("upstream candidate is %s, which is the local counterpart of %s",
+                          candidate, original_matched_branch, subsystem="fork-point")
 
                 if condition(candidate):
-                    debug(f"upstream candidate {candidate} accepted")
+                    debug("upstream candidate %s accepted", candidate, subsystem="fork-point")
                     return candidate
                 else:
-                    debug(f"upstream candidate {candidate} rejected ({reject_reason_message})")
+                    debug("upstream candidate %s rejected (%s)", candidate, reject_reason_message, subsystem="fork-point")
         return None
 
     # Also includes config that is invalid (corresponding to a non-existent/GCed commit etc.).
@@ -1767,7 +1948,7 @@ class MacheteClient:
                 "the fork point override to this commit no longer applies.\n",
                 f"Consider running:\n  `git machete fork-point --unset-override {branch}`\n"))
             return None
-        debug(f"since branch {branch} is descendant of {to}, fork point of {branch} is overridden to {to}")
+        debug("since branch %s is descendant of %s, fork point of %s is overridden to %s", branch, to, branch, to, subsystem="fork-point")
         return to
 
     def unset_fork_point_override(self, branch: LocalBranchShortName) -> None:
@@ -2008,7 +2189,10 @@ class MacheteClient:
         return choices[index]
 
     def flush_caches(self) -> None:
-        self.__branch_pairs_by_hash_in_reflog = None
+        self.__branch_pairs_by_hash_in_reflog_cache.flush()
+
+    def get_cache_stats(self) -> List[CacheStats]:
+        return [self.__branch_pairs_by_hash_in_reflog_cache.get_stats()]
 
     def check_that_fork_point_is_ancestor_or_equal_to_tip_of_branch(
             self, fork_point_hash: AnyRevision, branch: AnyBranchName) -> None:
@@ -2048,14 +2232,14 @@ class MacheteClient:
             pr_nos, all_opened_prs_from_github=all_open_prs, github_client=github_client,
             all=all_opened_prs, mine=my_opened_prs, by=opened_by, user=current_user)
 
-        debug(f'organization is {remote_org_repo.organization}, repository is {remote_org_repo.repository}')
+        debug(f'organization is {remote_org_repo.organization}, repository is {remote_org_repo.repository}', subsystem="github")
         self.__git.fetch_remote(remote_org_repo.remote)
 
         pr: Optional[GitHubPullRequest] = None
         checked_out_prs: List[GitHubPullRequest] = []
         for pr in sorted(applicable_prs, key=lambda x: x.number):
             if pr.full_repository_name:
-                if '/'.join([remote_org_repo.remote, pr.head]) not in self.__git.get_remote_branches():
+                if not self.__git.is_remote_branch(RemoteBranchShortName.of('/'.join([remote_org_repo.remote, pr.head]))):
                     remote_already_added: Optional[str] = self.__get_remote_name_for_repository_url(domain, pr.repository_url)
                     if remote_already_added:
                         remote_to_fetch = remote_already_added
@@ -2065,7 +2249,7 @@ class MacheteClient:
                             self.__git.add_remote(remote_to_fetch, pr.repository_url)
                     if remote_org_repo.remote != remote_to_fetch:
                         self.__git.fetch_remote(remote_to_fetch)
-                    if '/'.join([remote_to_fetch, pr.head]) not in self.__git.get_remote_branches():
+                    if not self.__git.is_remote_branch(RemoteBranchShortName.of('/'.join([remote_to_fetch, pr.head]))):
                         raise MacheteException(
                             f"Could not check out PR #{bold(str(pr.number))} "
                             f"because its head branch {bold(pr.head)} is already deleted from {bold(remote_to_fetch)}.")
@@ -2075,7 +2259,7 @@ class MacheteClient:
                 github_client.checkout_pr_refs(self.__git, remote_org_repo.remote, pr.number, LocalBranchShortName.of(pr.head))
             if pr.state == 'closed':
                 warn(f'Pull request #{bold(str(pr.number))} is already closed.')
-            debug(f'found {pr}')
+            debug('found %s', pr, subsystem="github")
 
             path: List[LocalBranchShortName] = self.__get_path_from_pr_chain(pr, all_open_prs)
             reversed_path: List[LocalBranchShortName] = path[::-1]  # need to add from root downwards
@@ -2101,7 +2285,7 @@ class MacheteClient:
                         print(fmt(f"Pull request #{bold(str(pr.number))} checked out at local branch {bold(pr.head)}"))
                         checked_out_prs.append(pr)
 
-        debug('Current GitHub user is ' + (current_user or '<none>'))
+        debug('Current GitHub user is ' + (current_user or '<none>'), subsystem="github")
         self.__sync_annotations_to_definition_file(all_open_prs, current_user=current_user, verbose=False)
         if len(applicable_prs) == 1:
             self.__git.checkout(LocalBranchShortName.of(pr.head))
@@ -2184,7 +2368,7 @@ class MacheteClient:
         remote_org_repo = self.__derive_remote_and_github_org_and_repo(domain=domain, branch_used_for_tracking_data=head)
         github_client = GitHubClient(domain=domain, organization=remote_org_repo.organization, repository=remote_org_repo.repository)
 
-        debug(f'organization is {remote_org_repo.organization}, repository is {remote_org_repo.repository}')
+        debug(f'organization is {remote_org_repo.organization}, repository is {remote_org_repo.repository}', subsystem="github")
 
         try:
             prs: List[GitHubPullRequest] = github_client.derive_pull_requests_by_head(head)
@@ -2198,7 +2382,7 @@ class MacheteClient:
         if len(prs) > 1:
             raise MacheteException(f"Multiple PRs have {head} as its head: " + ", ".join(f"#{_pr.number}" for _pr in prs))
         pr = prs[0]
-        debug(f'found {pr}')
+        debug('found %s', pr, subsystem="github")
 
         new_base: Optional[LocalBranchShortName] = self.__up_branch.get(LocalBranchShortName.of(head))
         if not new_base:
@@ -2290,7 +2474,7 @@ class MacheteClient:
         github_client = GitHubClient(domain=domain, organization=remote_org_repo.organization, repository=remote_org_repo.repository)
         print(f"Fetching {bold(remote_org_repo.remote)}...")
         self.__git.fetch_remote(remote_org_repo.remote)
-        if '/'.join([remote_org_repo.remote, base]) not in self.__git.get_remote_branches():
+        if not self.__git.is_remote_branch(RemoteBranchShortName.of('/'.join([remote_org_repo.remote, base]))):
             warn(f'Base branch for this PR ({bold(base)}) is not found on remote, pushing...')
             self.__handle_untracked_branch(
                 branch=base,
@@ -2302,8 +2486,8 @@ class MacheteClient:
                 opt_yes=False)
 
         current_user: Optional[str] = github_client.derive_current_user_login()
-        debug(f'organization is {remote_org_repo.organization}, repository is {remote_org_repo.repository}')
-        debug('current GitHub user is ' + (current_user or '<none>'))
+        debug(f'organization is {remote_org_repo.organization}, repository is {remote_org_repo.repository}', subsystem="github")
+        debug('current GitHub user is ' + (current_user or '<none>'), subsystem="github")
 
         description_path = self.__git.get_main_git_subpath('info', 'description')
         description: str = utils.slurp_file_or_empty(description_path)
@@ -2550,7 +2734,8 @@ class MacheteClient:
                     warn_when_branch_in_sync_but_fork_point_off=True,
                     opt_list_commits=False,
                     opt_list_commits_with_hashes=False,
-                    opt_no_detect_squash_merges=False)
+                    opt_no_detect_squash_merges=False,
+                    opt_jobs=None)
                 self.__print_new_line(False)
 
         else:
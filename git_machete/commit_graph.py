@@ -0,0 +1,280 @@
+import heapq
+import mmap
+import os
+import struct
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .constants import MAX_COMMITS_TO_WALK_IN_COMMIT_GRAPH
+from .utils import debug
+
+# See https://git-scm.com/docs/gitformat-commit-graph for the description of the file format.
+SIGNATURE = b"CGPH"
+HASH_LENGTH_BY_HASH_VERSION = {1: 20, 2: 32}  # SHA-1, SHA-256
+CHUNK_ID_OID_FANOUT = b"OIDF"
+CHUNK_ID_OID_LOOKUP = b"OIDL"
+CHUNK_ID_COMMIT_DATA = b"CDAT"
+CHUNK_ID_EXTRA_EDGE_LIST = b"EDGE"
+
+PARENT_NONE = 0x70000000
+PARENT_EXTRA_EDGE_LIST = 0x80000000
+EXTRA_EDGE_LIST_LAST = 0x80000000
+GENERATION_NUMBER_ZERO = 0  # written by the versions of git that didn't compute generation numbers yet
+GENERATION_NUMBER_MAX = 0x3FFFFFFF  # saturated, the strict ordering of parents vs children is no longer guaranteed
+
+FLAG_PARENT1 = 1
+FLAG_PARENT2 = 2
+FLAG_STALE = 4
+
+
+class CommitGraphException(Exception):
+    pass
+
+
+class _CommitGraphLayer(NamedTuple):
+    file: mmap.mmap
+    hash_length: int
+    commit_count: int
+    # Count of commits in all the preceding layers of a split commit-graph chain,
+    # since parent positions stored in CDAT/EDGE chunks are global across the entire chain.
+    base_commit_count: int
+    fanout_offset: int
+    oid_lookup_offset: int
+    commit_data_offset: int
+    extra_edge_list_offset: Optional[int]
+
+
+# A read-only view of the commit-graph file(s) of the repository,
+# allowing to answer reachability queries without spawning `git merge-base`.
+# Generation numbers (topological levels) let us visit commits strictly from descendants to ancestors
+# and stop as soon as the remaining commits can no longer change the result.
+class CommitGraph:
+
+    def __init__(self, layers: List[_CommitGraphLayer]) -> None:
+        self.__layers = layers
+        self.__position_by_hash: Dict[str, Optional[int]] = {}
+
+    @staticmethod
+    def load_or_none(objects_dir: str) -> Optional["CommitGraph"]:
+        info_dir = os.path.join(objects_dir, "info")
+        single_file_path = os.path.join(info_dir, "commit-graph")
+        chain_file_path = os.path.join(info_dir, "commit-graphs", "commit-graph-chain")
+        # Just like git itself, we prefer the single-file commit-graph over the split chain if both are present.
+        if os.path.isfile(single_file_path):
+            paths = [single_file_path]
+        elif os.path.isfile(chain_file_path):
+            with open(chain_file_path) as chain_file:
+                paths = [os.path.join(info_dir, "commit-graphs", f"graph-{line.strip()}.graph")
+                         for line in chain_file.read().splitlines() if line.strip()]
+        else:
+            return None
+
+        layers: List[_CommitGraphLayer] = []
+        try:
+            for path in paths:
+                layers.append(CommitGraph.__load_layer(path, base_commit_count=sum(layer.commit_count for layer in layers)))
+        except (OSError, ValueError, struct.error, CommitGraphException) as e:
+            debug("commit-graph at %s could not be loaded: %s", objects_dir, e, subsystem="git")
+            for layer in layers:
+                layer.file.close()
+            return None
+        debug("loaded commit-graph with %s layer(s) and %s commit(s)",
+              len(layers), sum(layer.commit_count for layer in layers), subsystem="git")
+        return CommitGraph(layers)
+
+    @staticmethod
+    def __load_layer(path: str, base_commit_count: int) -> _CommitGraphLayer:
+        with open(path, "rb") as f:
+            file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            signature, version, hash_version, chunk_count = struct.unpack_from(">4sBBB", file, 0)
+            if signature != SIGNATURE:
+                raise CommitGraphException(f"{path}: unexpected signature {signature!r}")
+            if version != 1:
+                raise CommitGraphException(f"{path}: unsupported version {version}")
+            if hash_version not in HASH_LENGTH_BY_HASH_VERSION:
+                raise CommitGraphException(f"{path}: unsupported hash version {hash_version}")
+
+            chunk_offsets: Dict[bytes, int] = {}
+            for index in range(chunk_count):
+                chunk_id, chunk_offset = struct.unpack_from(">4sQ", file, 8 + 12 * index)
+                chunk_offsets[chunk_id] = chunk_offset
+            for required_chunk_id in (CHUNK_ID_OID_FANOUT, CHUNK_ID_OID_LOOKUP, CHUNK_ID_COMMIT_DATA):
+                if required_chunk_id not in chunk_offsets:
+                    raise CommitGraphException(f"{path}: missing {required_chunk_id.decode()} chunk")
+
+            fanout_offset = chunk_offsets[CHUNK_ID_OID_FANOUT]
+            commit_count: int = struct.unpack_from(">I", file, fanout_offset + 4 * 255)[0]
+            return _CommitGraphLayer(
+                file=file,
+                hash_length=HASH_LENGTH_BY_HASH_VERSION[hash_version],
+                commit_count=commit_count,
+                base_commit_count=base_commit_count,
+                fanout_offset=fanout_offset,
+                oid_lookup_offset=chunk_offsets[CHUNK_ID_OID_LOOKUP],
+                commit_data_offset=chunk_offsets[CHUNK_ID_COMMIT_DATA],
+                extra_edge_list_offset=chunk_offsets.get(CHUNK_ID_EXTRA_EDGE_LIST))
+        except Exception:
+            file.close()
+            raise
+
+    def close(self) -> None:
+        for layer in self.__layers:
+            layer.file.close()
+        self.__layers = []
+        self.__position_by_hash = {}
+
+    def __find_position_in_layer(self, layer: _CommitGraphLayer, oid: bytes) -> Optional[int]:
+        file, hash_length = layer.file, layer.hash_length
+        first_byte = oid[0]
+        low: int = struct.unpack_from(">I", file, layer.fanout_offset + 4 * (first_byte - 1))[0] if first_byte else 0
+        high: int = struct.unpack_from(">I", file, layer.fanout_offset + 4 * first_byte)[0]
+        while low < high:
+            middle = (low + high) // 2
+            offset = layer.oid_lookup_offset + middle * hash_length
+            middle_oid = file[offset:offset + hash_length]
+            if middle_oid == oid:
+                return layer.base_commit_count + middle
+            if middle_oid < oid:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def __get_position(self, commit_hash: str) -> Optional[int]:
+        if commit_hash not in self.__position_by_hash:
+            oid = bytes.fromhex(commit_hash)
+            position = None
+            for layer in self.__layers:
+                if len(oid) == layer.hash_length:
+                    position = self.__find_position_in_layer(layer, oid)
+                    if position is not None:
+                        break
+            self.__position_by_hash[commit_hash] = position
+        return self.__position_by_hash[commit_hash]
+
+    def __get_layer_and_index(self, position: int) -> Tuple[_CommitGraphLayer, int]:
+        for layer in reversed(self.__layers):
+            if position >= layer.base_commit_count:
+                return layer, position - layer.base_commit_count
+        raise CommitGraphException(f"commit position {position} out of range")  # pragma: no cover
+
+    def __get_hash(self, position: int) -> str:
+        layer, index = self.__get_layer_and_index(position)
+        offset = layer.oid_lookup_offset + index * layer.hash_length
+        return layer.file[offset:offset + layer.hash_length].hex()
+
+    def __get_generation_and_parents(self, position: int) -> Tuple[int, List[int]]:
+        layer, index = self.__get_layer_and_index(position)
+        # Each CDAT entry consists of the tree hash, the positions of the first two parents and generation number + commit date.
+        parent1, parent2, generation_and_date_high_bits = struct.unpack_from(
+            ">III", layer.file, layer.commit_data_offset + index * (layer.hash_length + 16) + layer.hash_length)
+        generation: int = generation_and_date_high_bits >> 2
+        if generation == GENERATION_NUMBER_ZERO or generation == GENERATION_NUMBER_MAX:
+            raise CommitGraphException(f"commit-graph does not provide a usable generation number for {self.__get_hash(position)}")
+        parents: List[int] = []
+        if parent1 != PARENT_NONE:
+            parents.append(parent1)
+        if parent2 & PARENT_EXTRA_EDGE_LIST:
+            # Octopus merge: the remaining parents are listed in the EDGE chunk, the last one marked with the highest bit.
+            if layer.extra_edge_list_offset is None:
+                raise CommitGraphException("commit-graph refers to a missing EDGE chunk")
+            edge_index = parent2 & ~PARENT_EXTRA_EDGE_LIST
+            while True:
+                edge: int = struct.unpack_from(">I", layer.file, layer.extra_edge_list_offset + 4 * edge_index)[0]
+                parents.append(edge & ~EXTRA_EDGE_LIST_LAST)
+                if edge & EXTRA_EDGE_LIST_LAST:
+                    break
+                edge_index += 1
+        elif parent2 != PARENT_NONE:
+            parents.append(parent2)
+        return generation, parents
+
+    # Returns None if the commit is not in the graph (yet), or if the graph doesn't provide a usable generation number for it.
+    # Generation numbers are strictly lower for the parents than for the children.
+    def get_generation_or_none(self, commit_hash: str) -> Optional[int]:
+        position = self.__get_position(commit_hash)
+        if position is None:
+            return None
+        try:
+            return self.__get_generation_and_parents(position)[0]
+        except CommitGraphException:
+            return None
+
+    # Returns all the best common ancestors of the given commits (just like `git merge-base --all`),
+    # or None if the question can't be answered from the commit-graph alone (e.g. when either of the commits is not in the graph yet)
+    # or if it would require walking too many commits to be worth it.
+    # Since the commit-graph is closed under reachability, every ancestor of a commit included in the graph is also in the graph.
+    def get_merge_bases_or_none(self, hash1: str, hash2: str) -> Optional[List[str]]:
+        position1, position2 = self.__get_position(hash1), self.__get_position(hash2)
+        if position1 is None or position2 is None:
+            return None
+        if position1 == position2:
+            return [hash1]
+        try:
+            merge_base_positions = self.__paint_down_to_common(position1, position2)
+            if merge_base_positions is None:
+                debug("merge-base of %s and %s requires walking more than %s commits, giving up on commit-graph",
+                      hash1, hash2, MAX_COMMITS_TO_WALK_IN_COMMIT_GRAPH, subsystem="git")
+                return None
+            return [self.__get_hash(position) for position in merge_base_positions]
+        except (ValueError, struct.error, CommitGraphException) as e:
+            debug("commit-graph could not be used for merge-base of %s and %s: %s", hash1, hash2, e, subsystem="git")
+            return None
+
+    # Mirrors `paint_down_to_common` from git's commit-reach.c:
+    # commits are visited in the order of decreasing generation numbers, which guarantees that each commit
+    # is visited only after all its descendants reachable from either of the starting commits.
+    def __paint_down_to_common(self, position1: int, position2: int) -> Optional[List[int]]:
+        flags_by_position: Dict[int, int] = {position1: FLAG_PARENT1, position2: FLAG_PARENT2}
+        generation_by_position: Dict[int, int] = {}
+        parents_by_position: Dict[int, List[int]] = {}
+        for position in (position1, position2):
+            generation_by_position[position], parents_by_position[position] = self.__get_generation_and_parents(position)
+        generation1, generation2 = generation_by_position[position1], generation_by_position[position2]
+        # Before the walk from the commit with the higher generation number gets anywhere near the other commit,
+        # at least one commit from each of the generations in between needs to be visited.
+        if abs(generation1 - generation2) > MAX_COMMITS_TO_WALK_IN_COMMIT_GRAPH:
+            return None
+
+        queue: List[Tuple[int, int]] = [(-generation1, position1), (-generation2, position2)]
+        heapq.heapify(queue)
+        queued_non_stale_count = 2
+        result: List[int] = []
+        walked_commit_count = 0
+        while queued_non_stale_count > 0:
+            walked_commit_count += 1
+            if walked_commit_count > MAX_COMMITS_TO_WALK_IN_COMMIT_GRAPH:
+                return None
+            _, position = heapq.heappop(queue)
+            flags = flags_by_position[position]
+            if not flags & FLAG_STALE:
+                queued_non_stale_count -= 1
+            if flags & (FLAG_PARENT1 | FLAG_PARENT2) == FLAG_PARENT1 | FLAG_PARENT2 and not flags & FLAG_STALE:
+                if position in (position1, position2):
+                    # One of the commits is an ancestor of the other, so it's the sole merge-base;
+                    # no need to walk the rest of the history to exclude other candidates.
+                    return [position]
+                result.append(position)
+                flags |= FLAG_STALE
+            for parent in parents_by_position.pop(position):
+                parent_flags = flags_by_position.get(parent)
+                if parent_flags is None:
+                    parent_generation, parents_by_position[parent] = self.__get_generation_and_parents(parent)
+                    # Generation numbers must be strictly greater for children than for parents,
+                    # otherwise the order of visiting the commits is no longer correct.
+                    if parent_generation >= generation_by_position[position]:
+                        raise CommitGraphException("commit-graph has inconsistent generation numbers")
+                    generation_by_position[parent] = parent_generation
+                    flags_by_position[parent] = flags
+                    heapq.heappush(queue, (-parent_generation, parent))
+                    if not flags & FLAG_STALE:
+                        queued_non_stale_count += 1
+                elif parent_flags & flags != flags:
+                    # The parent is already in the queue (it can't have been visited yet, as its generation number is lower);
+                    # let's just update its flags.
+                    if not parent_flags & FLAG_STALE and flags & FLAG_STALE:
+                        queued_non_stale_count -= 1
+                    flags_by_position[parent] = parent_flags | flags
+            del generation_by_position[position]
+        # Whatever is left in the queue is stale, i.e. an ancestor of an already found merge-base.
+        return result
@@ -0,0 +1,135 @@
+import threading
+from typing import (Callable, Dict, Generator, Iterator, List, Optional, Set,
+                    Tuple)
+
+# A commit as listed by `git log --format='%H %P'`: hash and parent hashes.
+LogEntry = Tuple[str, List[str]]
+# Segment (identified by the hash of its first commit) and the offset within the segment.
+_Location = Tuple[bytes, int]
+
+
+class _Segment:
+    __slots__ = ("hashes", "last_cut_offset", "next_location", "is_complete")
+
+    def __init__(self) -> None:
+        # Binary hashes of the consecutive commits, concatenated.
+        self.hashes: bytearray = bytearray()
+        # Offset of the last commit in the segment known to be a cut (see below).
+        self.last_cut_offset: int = 0
+        # Where the history continues once the commits of this segment have been exhausted.
+        self.next_location: Optional[_Location] = None
+        self.is_complete: bool = False
+
+
+# Histories (in `git log` order) of branches in a repository tend to share the vast majority of their commits,
+# e.g. the entire history of the trunk. Rather than keeping a separate list of commits for each branch,
+# all histories read so far are stored as chains of segments of (binary) commit hashes,
+# so that the memory usage only grows with the number of unique commits rather than with the number of branches.
+#
+# `git log` walks the commits in the order of committer dates, keeping a queue of the commits yet to be shown.
+# Whenever the queue consists of just a single commit which has no ancestors among the commits shown so far,
+# the rest of the output is exactly the history of that commit (a "cut" in the history),
+# and hence can be shared with any other history that reaches the same commit as a cut.
+# Since committer dates can't be relied upon to rule out such ancestors (due to clock skew),
+# generation numbers from the commit-graph are used instead: no commit with a generation number at least as high
+# as that of the given commit can be its ancestor. Without the commit-graph, the histories are still stored compactly,
+# but only the histories starting from the same commit are shared.
+#
+# Histories can be read from multiple threads at once. If the same segment gets extended by more than one thread,
+# each of them reads the same `git log` output, and whichever gets to a given position first stores the commit.
+class CommitHistoryStore:
+
+    def __init__(self, get_generation_or_none: Callable[[str], Optional[int]]) -> None:
+        self.__get_generation_or_none = get_generation_or_none
+        self.__segments: Dict[bytes, _Segment] = {}
+        self.__cut_locations: Dict[bytes, _Location] = {}
+        self.__lock = threading.Lock()
+
+    # Whether the history of the given commit has already been (at least partially) read.
+    def has_history(self, commit_hash: str) -> bool:
+        with self.__lock:
+            return bytes.fromhex(commit_hash) in self.__cut_locations
+
+    # `read_log` should return the (lazily read) `git log` entries for the given commit;
+    # the returned generator gets closed as soon as no more entries are needed.
+    def get_history(self, commit_hash: str, read_log: Callable[[str], Generator[LogEntry, None, None]]) -> Iterator[str]:
+        binary_hash = bytes.fromhex(commit_hash)
+        with self.__lock:
+            if binary_hash not in self.__cut_locations:
+                self.__segments[binary_hash] = _Segment()
+                self.__cut_locations[binary_hash] = (binary_hash, 0)
+            segment_start, offset = self.__cut_locations[binary_hash]
+        hash_length = len(binary_hash)
+
+        while True:
+            segment = self.__segments[segment_start]
+            while offset * hash_length < len(segment.hashes):
+                yield segment.hashes[offset * hash_length:(offset + 1) * hash_length].hex()
+                offset += 1
+            if segment.next_location is not None:
+                segment_start, offset = segment.next_location
+                continue
+            if segment.is_complete:
+                return
+
+            # The segment needs to be extended by reading the history of its last cut;
+            # the already stored commits past the cut still need to be read (rather than skipped via `git log --skip`)
+            # to reconstruct the queue of commits yet to be shown by `git log`.
+            with self.__lock:
+                last_cut_offset = segment.last_cut_offset
+                last_cut = bytes(segment.hashes[last_cut_offset * hash_length:(last_cut_offset + 1) * hash_length]) or segment_start
+            log_entries = read_log(last_cut.hex())
+            try:
+                for new_commit_hash in self.__extend_segment(segment_start, segment, last_cut, last_cut_offset, offset, log_entries):
+                    yield new_commit_hash
+                    offset += 1
+            finally:
+                log_entries.close()
+
+    # Yields the commits from the given position onwards, as they're added to the segment
+    # (either by this call, or concurrently by another thread).
+    def __extend_segment(self, segment_start: bytes, segment: _Segment, last_cut: bytes, last_cut_offset: int,
+                         known_commit_count: int, log_entries: Iterator[LogEntry]) -> Iterator[str]:
+        hash_length = len(segment_start)
+        queued: Set[str] = {last_cut.hex()}
+        seen: Set[str] = set(queued)
+        # Lowest generation number of the commits shown since the last cut. Commits outside of the commit-graph can be ignored,
+        # as the commit-graph is closed under reachability, so they can't be ancestors of any commit in the graph.
+        min_shown_generation: Optional[int] = None
+        for position, (commit_hash, parent_hashes) in enumerate(log_entries, start=last_cut_offset):
+            generation = self.__get_generation_or_none(commit_hash)
+            is_cut = len(queued) == 1 and commit_hash in queued and generation is not None and \
+                (min_shown_generation is None or generation <= min_shown_generation)
+            queued.discard(commit_hash)
+            if is_cut:
+                # None of the commits seen so far (other than the cut itself) are reachable from the cut,
+                # and hence none of them can be encountered again.
+                seen = {commit_hash}
+                min_shown_generation = None
+            for parent_hash in parent_hashes:
+                if parent_hash not in seen:
+                    seen.add(parent_hash)
+                    queued.add(parent_hash)
+            if generation is not None:
+                min_shown_generation = generation if min_shown_generation is None else min(min_shown_generation, generation)
+            if position < known_commit_count:
+                continue
+
+            with self.__lock:
+                if position * hash_length == len(segment.hashes):
+                    if segment.next_location is not None or segment.is_complete:
+                        # Another thread has already got to the end of the segment, the rest is to be read from the store.
+                        return
+                    binary_hash = bytes.fromhex(commit_hash)
+                    if is_cut and position > 0:
+                        existing_location = self.__cut_locations.get(binary_hash)
+                        if existing_location is not None:
+                            segment.next_location = existing_location
+                            return
+                        self.__cut_locations[binary_hash] = (segment_start, position)
+                        segment.last_cut_offset = position
+                    segment.hashes += binary_hash
+            yield commit_hash
+        with self.__lock:
+            if segment.next_location is None:
+                segment.is_complete = True
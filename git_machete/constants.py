@@ -1,6 +1,18 @@
 from enum import Enum, IntEnum
 
-MAX_COUNT_FOR_INITIAL_LOG = 10
+# Above this number of commits, passing all of them as arguments to a single git command might exceed the command line length limit
+MAX_COMMITS_FOR_BATCH_ANCESTRY = 500
+# Same for the refs passed as patterns to `git for-each-ref`
+MAX_REFS_FOR_BATCH_FOR_EACH_REF = 500
+# Walking the commit-graph in Python is way slower per commit than `git merge-base`, which only pays off for shorter walks
+MAX_COMMITS_TO_WALK_IN_COMMIT_GRAPH = 2000
+# Past this number of commits in the joint history of all branches, the branches whose fork point hasn't been found yet
+# (typically the long-forgotten ones) are better off with their own `git log`, rather than waiting for the joint walk to reach them
+MAX_COMMITS_TO_WALK_FOR_FORK_POINTS = 5000
+# Per each of the caches kept under .git/machete-cache/
+MAX_PERSISTENT_CACHE_ENTRY_COUNT = 20000
+# Total for all the upstream branches indexed in .git/machete-cache/tree-hash-index
+MAX_TREE_HASH_INDEX_ENTRY_COUNT = 200000
 DISCOVER_DEFAULT_FRESH_BRANCH_COUNT = 10
 
 PICK_FIRST_ROOT: int = 0
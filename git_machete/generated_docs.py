@@ -8,6 +8,7 @@ short_docs: Dict[str, str] = {
     "add": "Add a branch to the tree of branch dependencies",
     "advance": "Fast-forward merge one of children to the current branch, push it and then slide out the child",
     "anno": "Manage custom annotations",
+    "cache": "Manage the cache of git history computations",
     "clean": "Delete untracked and unmanaged branches and also optionally check out user's open GitHub PRs",
     "config": "Display docs for the git machete configuration keys and environment variables",
     "delete-unmanaged": "Delete local branches that are not present in the definition file",
@@ -182,6 +183,27 @@ long_docs: Dict[str, str] = {
            `GITHUB_TOKEN`
               GitHub API token.
 
+   """,
+    "cache": """
+        <b>Usage:</b><b>
+           git machete cache <subcommand></b>
+
+        where `<subcommand>` is one of: `clear`.
+
+        Manages the cache of git history computations (like merge-bases of pairs of commits or the results of squash merge detection) that git machete keeps under `.git/machete-cache/`.
+        The results cached there only depend on the (immutable) commits involved, so there is normally no need to clear the cache;
+        it's also capped in size, with the least recently used entries evicted first.
+
+        For squash merge detection, git machete additionally keeps an index of the tree hashes of the commits of each parent branch,
+        which is brought up to date incrementally (by only looking at the commits added since the previous invocation) whenever the parent branch moves.
+        The version of the git executable is cached there as well, until the executable is modified (e.g. upgraded).
+
+        The cache can be disabled altogether by `git config machete.cache.enabled false`.
+
+        <b>Subcommands:</b>
+           `clear`:
+              Removes all the cached data.
+
    """,
     "clean": """
         <b>Usage:</b><b>
@@ -250,6 +272,11 @@ long_docs: Dict[str, str] = {
         Note: `config` is not a command as such, just a help topic (there is no `git machete config` command).
 
         <b>Git config keys:</b>
+           `machete.cache.enabled`:
+              The default value of this key is `true`, which means that the results of certain git history computations
+              (like merge-bases of pairs of commits or the results of squash merge detection) are cached under `.git/machete-cache/` and reused across git machete invocations.
+              To disable the cache, set `git config machete.cache.enabled false`. See also `cache`.
+
            `machete.github.{domain,remote,organization,repository}`:
  
               When executing `git machete github <subcommand>` command, the following will happen:
@@ -272,6 +299,10 @@ long_docs: Dict[str, str] = {
               Note that you do <b>not</b> need to set all four keys at once.
               For example, in a typical usage of GitHub Enterprise, it should be enough to just set `machete.github.domain`.
 
+           `machete.jobs`:
+              The number of branches that `git machete status` (also when invoked by `discover` or `traverse`) runs the git queries for at once.
+              Defaults to the number of CPUs. Setting `git config machete.jobs 1` makes all the queries run sequentially.
+
            `machete.overrideForkPoint.<branch>.to`:
  
               Executing `git machete fork-point --override-to[-parent|-inferred|=<revision>] [<branch>]` sets up a fork point override for <branch>.
@@ -318,14 +349,37 @@ long_docs: Dict[str, str] = {
               set `git config machete.worktree.useTopLevelMacheteFile false`.
 
         <b>Environment variables:</b>
+           `GIT_MACHETE_DEBUG`
+              Comma-separated list of subsystems (`fork-point`, `git`, `github`, `hooks`) to log the debug info for,
+              example: `GIT_MACHETE_DEBUG=fork-point,hooks git machete status`. Turns on `--debug` mode, but limited to the given subsystems:
+              the commands executed on behalf of the other subsystems are only logged as in `--verbose` mode.
+
            `GIT_MACHETE_EDITOR`
               Name of the editor used by `git machete e[dit]`, example: `vim` or `nano`.
 
+           `GIT_MACHETE_PROFILE`
+              Either `cpu` or `mem`. Same as the `--profile=cpu|mem` general option: once the command is done,
+              prints (to stderr) the functions that took the most CPU time, or the sites that allocated the most memory.
+
            `GIT_MACHETE_REBASE_OPTS`
               Used to pass extra options to the underlying `git rebase` invocation (called by the executed command,
               such as: `reapply`, `slide-out`, `traverse`, `update`)
               Example: `GIT_MACHETE_REBASE_OPTS="--keep-empty --rebase-merges" git machete update`.
 
+           `GIT_MACHETE_RECORD`
+              Path of the file to record the executed git commands to, along with their outputs (and the branch layout file).
+              The recording can then be replayed with `GIT_MACHETE_REPLAY`.
+              While recording, the repository is only read via git commands (rather than directly from the files under `.git/`).
+
+           `GIT_MACHETE_REPLAY`
+              Path of the file recorded with `GIT_MACHETE_RECORD`. The git commands are then not executed,
+              their recorded results are used instead, so the repository doesn't even need to be available,
+              example: `GIT_MACHETE_REPLAY=status.json git machete status`. Useful for profiling git machete itself.
+
+           `GIT_MACHETE_TRACE`
+              Path of the file to record the timings of the executed git commands and GitHub API requests to, in Chrome trace event format
+              (same as the `--trace=FILE` general option). The file can be loaded into a trace viewer like https://ui.perfetto.dev.
+
            `GITHUB_TOKEN`
               Used to store GitHub API token. Used by commands such as: `anno`, `clean`, `github`.
 
@@ -907,7 +961,7 @@ long_docs: Dict[str, str] = {
    """,
     "status": """
         <b>Usage:</b><b>
-           git machete s[tatus] [--color=WHEN] [-l|--list-commits] [-L|--list-commits-with-hashes] [--no-detect-squash-merges]</b>
+           git machete s[tatus] [--color=WHEN] [-l|--list-commits] [-L|--list-commits-with-hashes] [--no-detect-squash-merges] [--jobs=N]</b>
 
         Displays a tree-shaped status of the branches listed in the definition file.
 
@@ -935,6 +989,10 @@ long_docs: Dict[str, str] = {
 
         Grey/dimmed edge suggests that the downstream branch can be slid out (see help for `slide-out` and `traverse`).
 
+        The git queries for each branch (like the sync status with its parent and with its remote counterpart, or the commits to list)
+        are run concurrently, by default in as many threads as there are CPUs; the output doesn't depend on the number of threads.
+        The `machete-status-branch` hook (if present) is still run for one branch at a time, in the order of the output.
+
         Using colors can be disabled with a `--color` flag set to `never`.
         With `--color=always`, git machete always emits colors and with `--color=auto`, it emits colors only when standard output is connected to a terminal.
         `--color=auto` is the default. When colors are disabled, relation between branches is represented in the following way (not including the hash-comments):
@@ -982,8 +1040,15 @@ long_docs: Dict[str, str] = {
            <b>--no-detect-squash-merges</b>
               Only consider strict (fast-forward or 2-parent) merges, rather than rebase/squash merges,
               when detecting if a branch is merged into its upstream (parent).
+           <b>--jobs=N</b>
+              Run the git queries for up to N branches at once. Defaults to `machete.jobs` git config key,
+              or to the number of CPUs if the key is not set.
 
         <b>Config keys:</b>
+           `machete.jobs`
+              The number of branches to run the git queries for at once, unless overridden with `--jobs`.
+              Defaults to the number of CPUs.
+
            `machete.status.extraSpaceBeforeBranchName`
               To make it easier to select branch name from the `status` output on certain terminals
               (e.g. Alacritty), you can add an extra space between └─ and `branch name`
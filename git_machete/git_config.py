@@ -0,0 +1,381 @@
+import os
+import re
+import string
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .utils import debug, get_git_executable_path_or_none
+
+# See https://git-scm.com/docs/git-config#_configuration_file for the description of the syntax
+# and https://git-scm.com/docs/git-config#FILES for the files that `git config --list` reads (and in what order).
+
+INCLUDE_MAX_DEPTH = 10  # just like in git itself
+# Files modified less than this many seconds before being parsed might get modified again without a change of their mtime
+# (as the resolution of mtime can be as coarse as the scheduler tick), so they're not cached (see the "racy git" problem).
+RACY_MTIME_THRESHOLD_SECONDS = 2
+# Well-known installation prefixes of git; for any of these, the system config is under `$(prefix)/etc/gitconfig`,
+# except for `/usr`, where it's `/etc/gitconfig` (see `sysconfdir` in git's Makefile).
+# For the other installations (e.g. on Windows or with the git bundled with Xcode), the location can't be reliably inferred.
+KNOWN_GIT_PREFIXES = ("/", "/usr", "/usr/local", "/opt/homebrew", "/opt/local", "/home/linuxbrew/.linuxbrew")
+
+
+_VARIABLE_NAME_CHARS = string.ascii_letters + string.digits + "-"
+_SECTION_NAME_CHARS = _VARIABLE_NAME_CHARS + "."
+
+
+class ConfigException(Exception):
+    pass
+
+
+# (key, value), where the value is None for a key without `=` (which stands for true).
+# The section and variable names in the keys are lowercased, just like in the output of `git config --list`.
+_ConfigEntry = Tuple[str, Optional[str]]
+
+# Path -> (inode, size, mtime in ns) of the file at the time of parsing, and the entries of the file (without the includes resolved).
+_parsed_files_cached: Dict[str, Tuple[Tuple[int, int, int], List[_ConfigEntry]]] = {}
+
+
+class _ConfigFileParser:
+
+    def __init__(self, text: str, path: str) -> None:
+        self.__text = text[1:] if text.startswith("\ufeff") else text
+        self.__text = self.__text.replace("\r\n", "\n")
+        self.__path = path
+        self.__position = 0
+
+    def __get_next_char(self) -> str:
+        # Just like in git, the end of file is treated as the end of line.
+        if self.__position >= len(self.__text):
+            self.__position += 1
+            return "\n"
+        char = self.__text[self.__position]
+        self.__position += 1
+        return char
+
+    def __is_eof(self) -> bool:
+        return self.__position > len(self.__text)
+
+    def __error(self, message: str) -> ConfigException:
+        line = self.__text.count("\n", 0, min(self.__position, len(self.__text))) + 1
+        return ConfigException(f"{self.__path}, line {line}: {message}")
+
+    def parse(self) -> List[_ConfigEntry]:
+        entries: List[_ConfigEntry] = []
+        section: Optional[str] = None
+        is_comment = False
+        while True:
+            char = self.__get_next_char()
+            if self.__is_eof():
+                return entries
+            if char == "\n":
+                is_comment = False
+            elif is_comment or char.isspace():
+                continue
+            elif char in "#;":
+                is_comment = True
+            elif char == "[":
+                section = self.__parse_section()
+            elif char in string.ascii_letters:
+                if section is None:
+                    raise self.__error("key outside of any section")
+                name = self.__parse_name(char)
+                entries.append((f"{section}.{name}", self.__parse_value_or_none()))
+            else:
+                raise self.__error(f"unexpected character {char!r}")
+
+    def __parse_section(self) -> str:
+        section = ""
+        while True:
+            char = self.__get_next_char()
+            if self.__is_eof() or char == "\n":
+                raise self.__error("unterminated section header")
+            if char == "]":
+                # The deprecated `[section.subsection]` syntax, lowercased as a whole.
+                return section.lower()
+            if char.isspace():
+                return section.lower() + "." + self.__parse_quoted_subsection()
+            if char not in _SECTION_NAME_CHARS:
+                raise self.__error(f"invalid character {char!r} in section name")
+            section += char
+
+    def __parse_quoted_subsection(self) -> str:
+        char = self.__get_next_char()
+        while char.isspace() and char != "\n":
+            char = self.__get_next_char()
+        if char != '"':
+            raise self.__error("missing opening quote of subsection name")
+        subsection = ""
+        while True:
+            char = self.__get_next_char()
+            if char == "\n":
+                raise self.__error("unterminated subsection name")
+            if char == '"':
+                break
+            if char == "\\":
+                char = self.__get_next_char()
+                if char == "\n":
+                    raise self.__error("unterminated subsection name")
+            subsection += char
+        if self.__get_next_char() != "]":
+            raise self.__error("missing closing bracket of section header")
+        return subsection
+
+    def __parse_name(self, first_char: str) -> str:
+        name = first_char
+        while self.__position < len(self.__text):
+            char = self.__text[self.__position]
+            if char not in _VARIABLE_NAME_CHARS:
+                break
+            name += char
+            self.__position += 1
+        return name.lower()
+
+    def __parse_value_or_none(self) -> Optional[str]:
+        char = self.__get_next_char()
+        while char in " \t":
+            char = self.__get_next_char()
+        if char == "\n":
+            return None
+        if char != "=":
+            raise self.__error("missing `=` after key")
+
+        value = ""
+        pending_space_count = 0
+        is_quoted = False
+        is_comment = False
+        while True:
+            char = self.__get_next_char()
+            if char == "\n":
+                if is_quoted:
+                    raise self.__error("unterminated quoted value")
+                return value
+            if is_comment:
+                continue
+            if char.isspace() and not is_quoted:
+                # Leading and trailing whitespace is dropped, any whitespace inside the value becomes a space.
+                if value:
+                    pending_space_count += 1
+                continue
+            if char in "#;" and not is_quoted:
+                is_comment = True
+                continue
+            value += " " * pending_space_count
+            pending_space_count = 0
+            if char == "\\":
+                char = self.__get_next_char()
+                if char == "\n":
+                    if self.__is_eof():
+                        raise self.__error("backslash at the end of file")
+                    continue  # line continuation
+                escaped = {"t": "\t", "b": "\b", "n": "\n", "\\": "\\", '"': '"'}.get(char)
+                if escaped is None:
+                    raise self.__error(f"invalid escape sequence `\\{char}`")
+                value += escaped
+            elif char == '"':
+                is_quoted = not is_quoted
+            else:
+                value += char
+
+
+def _parse_file_or_none(path: str) -> Optional[List[_ConfigEntry]]:
+    try:
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            cached = _parsed_files_cached.get(path)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            content = file.read()
+    except (FileNotFoundError, NotADirectoryError):
+        return None  # just like git, let's silently skip the missing files
+    try:
+        entries = _ConfigFileParser(content.decode("utf-8"), path).parse()
+    except UnicodeDecodeError as e:
+        raise ConfigException(f"{path}: {e}")
+    if time.time() - stat.st_mtime > RACY_MTIME_THRESHOLD_SECONDS:
+        _parsed_files_cached[path] = (signature, entries)
+    return entries
+
+
+# Translates a pattern of git's `wildmatch` (with WM_PATHNAME flag, as used by `includeIf`) into a regular expression:
+# `*` and `?` don't match a slash, while `**/` (at the beginning or after a slash) and `/**` (at the end) match any number of directories.
+def _wildmatch_to_regex(pattern: str) -> str:
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        is_at_segment_start = index == 0 or pattern[index - 1] == "/"
+        if pattern.startswith("**/", index) and is_at_segment_start:
+            regex += "(?:.*/)?"
+            index += 3
+        elif pattern.startswith("**", index) and is_at_segment_start and index + 2 == len(pattern):
+            regex += ".*"
+            index += 2
+        elif char == "*":
+            regex += "[^/]*"
+            while index < len(pattern) and pattern[index] == "*":
+                index += 1
+        elif char == "?":
+            regex += "[^/]"
+            index += 1
+        elif char == "[":
+            end = pattern.find("]", index + (3 if pattern[index + 1:index + 2] in ("!", "^") else 2))
+            if end == -1 or "[:" in pattern[index + 1:end]:
+                raise ConfigException(f"unsupported pattern `{pattern}`")
+            negation = pattern[index + 1] in "!^"
+            body = pattern[index + 2 if negation else index + 1:end]
+            regex += ("[^/" if negation else "[") + body.replace("\\", "\\\\").replace("[", "\\[") + "]"
+            index = end + 1
+        elif char == "\\" and index + 1 < len(pattern):
+            regex += re.escape(pattern[index + 1])
+            index += 2
+        else:
+            regex += re.escape(char)
+            index += 1
+    return regex
+
+
+def _wildmatch(pattern: str, text: str, ignore_case: bool = False) -> bool:
+    return re.fullmatch(_wildmatch_to_regex(pattern), text, flags=re.DOTALL | (re.IGNORECASE if ignore_case else 0)) is not None
+
+
+class _ConfigReader:
+
+    def __init__(self, worktree_git_dir: str, common_git_dir: str) -> None:
+        self.__worktree_git_dir = worktree_git_dir
+        self.__common_git_dir = common_git_dir
+        self.__entries: List[_ConfigEntry] = []
+
+    def read_file(self, path: str, depth: int = 0) -> None:
+        file_entries = _parse_file_or_none(path)
+        for key, value in file_entries or []:
+            self.__entries.append((key, value))
+            if value is not None and self.__is_include_path(key) and self.__is_include_condition_met(key, path):
+                if depth >= INCLUDE_MAX_DEPTH:
+                    raise ConfigException(f"exceeded maximum include depth ({INCLUDE_MAX_DEPTH}) while including {value} from {path}")
+                self.read_file(self.__resolve_include_path(value, path), depth + 1)
+
+    def get_entries(self) -> List[_ConfigEntry]:
+        return self.__entries
+
+    def get_worktree_config_enabled(self) -> bool:
+        # Note that `extensions.worktreeConfig` is honored regardless of `core.repositoryFormatVersion`.
+        values = [value for key, value in self.__entries if key == "extensions.worktreeconfig"]
+        return bool(values) and (values[-1] is None or values[-1].lower() in ("true", "yes", "on", "1"))
+
+    @staticmethod
+    def __is_include_path(key: str) -> bool:
+        return key == "include.path" or (key.startswith("includeif.") and key.endswith(".path"))
+
+    @staticmethod
+    def __expand_home(path: str) -> str:
+        if path.startswith("%(prefix)/"):
+            raise ConfigException(f"unsupported path `{path}`")
+        return os.path.expanduser(path) if path.startswith("~") else path
+
+    def __resolve_include_path(self, include_path: str, including_file_path: str) -> str:
+        include_path = self.__expand_home(include_path)
+        if os.path.isabs(include_path):
+            return include_path
+        return os.path.join(os.path.dirname(including_file_path), include_path)
+
+    def __is_include_condition_met(self, key: str, including_file_path: str) -> bool:
+        if key == "include.path":
+            return True
+        condition = key[len("includeif."):-len(".path")]
+        if condition.startswith("gitdir:") or condition.startswith("gitdir/i:"):
+            ignore_case = condition.startswith("gitdir/i:")
+            return self.__is_git_dir_matching(condition.partition(":")[2], including_file_path, ignore_case)
+        if condition.startswith("onbranch:"):
+            return self.__is_branch_matching(condition[len("onbranch:"):])
+        if condition.startswith("hasconfig:"):
+            # Requires knowing the entire config (including the files yet to read) upfront.
+            raise ConfigException(f"unsupported include condition `{condition}`")
+        return False  # just like git, let's ignore the unknown conditions
+
+    def __is_git_dir_matching(self, pattern: str, including_file_path: str, ignore_case: bool) -> bool:
+        pattern = self.__expand_home(pattern)
+        if pattern.startswith("./"):
+            pattern = os.path.dirname(os.path.realpath(including_file_path)) + pattern[1:]
+        if not os.path.isabs(pattern) and not pattern.startswith("**/"):
+            pattern = "**/" + pattern
+        if pattern.endswith("/"):
+            pattern += "**"
+        return any(_wildmatch(pattern, git_dir, ignore_case)
+                   for git_dir in (os.path.realpath(self.__worktree_git_dir), os.path.abspath(self.__worktree_git_dir)))
+
+    def __is_branch_matching(self, pattern: str) -> bool:
+        if os.path.exists(os.path.join(self.__common_git_dir, "reftable")):
+            raise ConfigException("unsupported include condition `onbranch` with reftable")
+        try:
+            with open(os.path.join(self.__worktree_git_dir, "HEAD")) as head_file:
+                head = head_file.read().strip()
+        except OSError as e:
+            raise ConfigException(f"cannot read HEAD: {e}")
+        if not head.startswith("ref: refs/heads/"):
+            return False  # detached HEAD
+        if pattern.endswith("/"):
+            pattern += "**"
+        return _wildmatch(pattern, head[len("ref: refs/heads/"):])
+
+
+def _is_env_true(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
+
+def _get_system_config_path_or_none() -> Optional[str]:
+    if _is_env_true("GIT_CONFIG_NOSYSTEM"):
+        return None
+    if "GIT_CONFIG_SYSTEM" in os.environ:
+        return os.environ["GIT_CONFIG_SYSTEM"]
+    if sys.platform == "win32":
+        raise ConfigException("location of the system config can't be inferred on Windows")
+    git_path = get_git_executable_path_or_none()
+    # Note that the symlinks are NOT resolved, as in e.g. Homebrew, `$(prefix)/bin/git` links to the actual installation directory.
+    prefix = os.path.dirname(os.path.dirname(git_path)) if git_path else None
+    if prefix not in KNOWN_GIT_PREFIXES or (sys.platform == "darwin" and prefix == "/usr"):
+        raise ConfigException(f"location of the system config can't be inferred for git at {git_path}")
+    return "/etc/gitconfig" if prefix in ("/", "/usr") else os.path.join(prefix, "etc", "gitconfig")
+
+
+def _get_global_config_paths() -> List[str]:
+    if "GIT_CONFIG_GLOBAL" in os.environ:
+        return [os.environ["GIT_CONFIG_GLOBAL"]]
+    home = os.environ.get("HOME")
+    xdg_config_home = os.environ.get("XDG_CONFIG_HOME") or (os.path.join(home, ".config") if home else None)
+    paths = [os.path.join(xdg_config_home, "git", "config")] if xdg_config_home else []
+    return paths + ([os.path.join(home, ".gitconfig")] if home else [])
+
+
+def get_common_git_dir(worktree_git_dir: str) -> str:
+    # Each linked worktree's git directory points to the git directory shared by all worktrees.
+    try:
+        with open(os.path.join(worktree_git_dir, "commondir")) as commondir_file:
+            return os.path.normpath(os.path.join(worktree_git_dir, commondir_file.read().strip()))
+    except FileNotFoundError:
+        return worktree_git_dir
+
+
+# Returns the same (key, value) pairs, in the same order, as `git config --list` would print them
+# (except for the keys without a value, which are skipped),
+# or None if the config can't be read this way (for instance, due to an unsupported syntax),
+# so that `git config --list` should be used instead.
+def read_config_or_none(worktree_git_dir: str) -> Optional[List[Tuple[str, str]]]:
+    try:
+        # These override the files to read (`GIT_CONFIG`) or add config entries on top of them (`git -c`, `git --config-env`).
+        for name in ("GIT_CONFIG", "GIT_CONFIG_PARAMETERS", "GIT_CONFIG_COUNT"):
+            if name in os.environ:
+                raise ConfigException(f"{name} environment variable is set")
+        common_git_dir = get_common_git_dir(worktree_git_dir)
+        reader = _ConfigReader(worktree_git_dir, common_git_dir)
+        system_config_path = _get_system_config_path_or_none()
+        for path in ([system_config_path] if system_config_path else []) + _get_global_config_paths():
+            reader.read_file(path)
+        reader.read_file(os.path.join(common_git_dir, "config"))
+        if reader.get_worktree_config_enabled():
+            reader.read_file(os.path.join(worktree_git_dir, "config.worktree"))
+        return [(key, value) for key, value in reader.get_entries() if value is not None]
+    except (OSError, ConfigException) as e:
+        debug("git config could not be read directly from the files: %s", e, subsystem="git")
+        return None
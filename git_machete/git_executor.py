@@ -0,0 +1,201 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from typing import (Any, Deque, Dict, Generator, List, NamedTuple, Optional,
+                    Tuple)
+
+from . import utils
+from .exceptions import UnderlyingGitException
+from .utils import CommandResult
+
+# Git commands executed by git machete (along with their outputs) can be recorded into a file with `GIT_MACHETE_RECORD=FILE`,
+# and then replayed from that file with `GIT_MACHETE_REPLAY=FILE`, without running git (or even having the repository) at all.
+# This way, a slow command can be recorded once (e.g. on a large repository) and then git machete's own logic
+# can be profiled on the recording repeatedly and deterministically, with no noise coming from git itself.
+
+RECORD_ENV_VAR = "GIT_MACHETE_RECORD"
+REPLAY_ENV_VAR = "GIT_MACHETE_REPLAY"
+
+RECORDING_FORMAT_VERSION = 1
+
+
+class RepositoryLocation(NamedTuple):
+    root_dir: Optional[str]  # None in a bare repository
+    worktree_git_dir: str
+    common_git_dir: str
+    main_git_dir: str
+
+
+# Executes the git commands of GitContext. The default executor simply runs git.
+class GitExecutor:
+    # Whether the repository can also be read directly (refs, reflogs, config, commit-graph etc.), bypassing git commands.
+    # If not, GitContext reads everything via the git commands of the executor, so that nothing escapes the recording.
+    can_read_repository_directly: bool = True
+
+    # The output goes directly to the terminal.
+    def run(self, git_cmd: str, *args: str) -> int:
+        return utils.run_cmd("git", git_cmd, *args, debug_subsystem="git")
+
+    def popen(self, git_cmd: str, *args: str, env: Optional[Dict[str, str]] = None) -> CommandResult:
+        exit_code, stdout, stderr = utils.popen_cmd("git", git_cmd, *args, env=env, debug_subsystem="git")
+        return CommandResult(stdout, stderr, exit_code)
+
+    # Lines of the output (without the line terminators), read lazily; the command is killed once the generator gets closed.
+    def stream_lines(self, git_cmd: str, *args: str) -> Generator[str, None, None]:
+        process = utils.spawn_cmd("git", git_cmd, *args, debug_subsystem="git")
+        try:
+            assert process.stdout is not None
+            for line in process.stdout:
+                utils.count_spawned_cmd_output(process, len(line))
+                yield line.decode('utf-8').rstrip("\n")
+            if process.wait() != 0:
+                raise UnderlyingGitException(f"`{utils.get_cmd_shell_repr('git', git_cmd, *args, env=None)}` returned {process.returncode}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            for stream in (process.stdin, process.stdout):
+                if stream:  # pragma: no branch
+                    stream.close()
+            # Note that the exit code of a process killed once no more lines were needed is negative (e.g. -9 for SIGKILL).
+            utils.trace_spawned_cmd(process)
+
+    # Called once the repository has been located; returns the location that GitContext should use from then on.
+    def on_repository_located(self, location: RepositoryLocation) -> RepositoryLocation:
+        return location
+
+    def close(self) -> None:
+        pass
+
+
+# Runs git and records each command along with its exit code and output.
+# The branch layout file is recorded as well, as it's read directly rather than via git.
+class RecordingGitExecutor(GitExecutor):
+    can_read_repository_directly = False
+
+    def __init__(self, recording_path: str, machete_args: List[str]) -> None:
+        self.__recording_path = recording_path
+        self.__machete_args = machete_args
+        self.__branch_layout: Optional[str] = None
+        self.__commands: List[Dict[str, Any]] = []
+        # Commands can be executed from multiple threads at once (see `git machete status --jobs`).
+        self.__lock = threading.Lock()
+
+    def __record(self, args: Tuple[str, ...], exit_code: Optional[int], stdout: str, stderr: str) -> None:
+        with self.__lock:
+            self.__commands.append({"args": list(args), "exit_code": exit_code, "stdout": stdout, "stderr": stderr})
+
+    def run(self, git_cmd: str, *args: str) -> int:
+        exit_code = super().run(git_cmd, *args)
+        self.__record((git_cmd,) + args, exit_code, "", "")
+        return exit_code
+
+    def popen(self, git_cmd: str, *args: str, env: Optional[Dict[str, str]] = None) -> CommandResult:
+        result = super().popen(git_cmd, *args, env=env)
+        self.__record((git_cmd,) + args, result.exit_code, result.stdout, result.stderr)
+        return result
+
+    # Only the lines actually read get recorded (with no exit code, unless the whole output has been read),
+    # so that e.g. the entire history of a branch isn't recorded when just its first few commits are needed.
+    def stream_lines(self, git_cmd: str, *args: str) -> Generator[str, None, None]:
+        lines: List[str] = []
+        exit_code: Optional[int] = None
+        try:
+            for line in super().stream_lines(git_cmd, *args):
+                lines.append(line)
+                yield line
+            exit_code = 0
+        finally:
+            self.__record((git_cmd,) + args, exit_code, "".join(line + "\n" for line in lines), "")
+
+    def on_repository_located(self, location: RepositoryLocation) -> RepositoryLocation:
+        branch_layout_path = os.path.join(location.main_git_dir, "machete")
+        if os.path.isfile(branch_layout_path):
+            with open(branch_layout_path) as branch_layout_file:
+                self.__branch_layout = branch_layout_file.read()
+        return location
+
+    def close(self) -> None:
+        # Imported only here (just like in ReplayingGitExecutor), so as not to slow down the startup when not recording or replaying.
+        import json
+        with self.__lock:
+            recording = {
+                "version": RECORDING_FORMAT_VERSION,
+                "args": self.__machete_args,
+                "branch_layout": self.__branch_layout,
+                "commands": self.__commands
+            }
+        with open(self.__recording_path, "w") as recording_file:
+            json.dump(recording, recording_file)
+
+
+# Serves the results of git commands from a recording made by RecordingGitExecutor, without running git.
+# The repository is then located in a scratch directory, which only contains the recorded branch layout file.
+class ReplayingGitExecutor(GitExecutor):
+    can_read_repository_directly = False
+
+    def __init__(self, recording_path: str) -> None:
+        import json
+        try:
+            with open(recording_path) as recording_file:
+                recording: Dict[str, Any] = json.load(recording_file)
+        except (OSError, ValueError) as e:
+            raise UnderlyingGitException(f"Cannot read the recording of git commands from `{recording_path}`: {e}")
+        if not isinstance(recording, dict) or recording.get("version") != RECORDING_FORMAT_VERSION:
+            raise UnderlyingGitException(
+                f"`{recording_path}` is not a recording of git commands made by this version of git machete "
+                f"(expected format version {RECORDING_FORMAT_VERSION})")
+        self.__branch_layout: Optional[str] = recording["branch_layout"]
+        self.__results_by_args: Dict[Tuple[str, ...], Deque[Dict[str, Any]]] = {}
+        for command in recording["commands"]:
+            self.__results_by_args.setdefault(tuple(command["args"]), deque()).append(command)
+        self.__scratch_dir: Optional[str] = None
+        self.__lock = threading.Lock()
+
+    # The results of the same command are served in the order they've been recorded (since they could change in the meantime,
+    # e.g. after a rebase), with the last one repeated once they run out.
+    def __get_result(self, git_cmd: str, *args: str, env: Optional[Dict[str, str]] = None, suffix: str = "") -> Dict[str, Any]:
+        utils.log_cmd("git", git_cmd, *args, env=env, debug_subsystem="git", suffix=suffix)
+        with self.__lock:
+            results = self.__results_by_args.get((git_cmd,) + args)
+            if not results:
+                raise UnderlyingGitException(f"`{utils.get_cmd_shell_repr('git', git_cmd, *args, env=None)}` has not been recorded")
+            return results.popleft() if len(results) > 1 else results[0]
+
+    def run(self, git_cmd: str, *args: str) -> int:
+        exit_code: int = self.__get_result(git_cmd, *args)["exit_code"]
+        return exit_code
+
+    def popen(self, git_cmd: str, *args: str, env: Optional[Dict[str, str]] = None) -> CommandResult:
+        result = self.__get_result(git_cmd, *args, env=env)
+        return CommandResult(result["stdout"], result["stderr"], result["exit_code"])
+
+    def stream_lines(self, git_cmd: str, *args: str) -> Generator[str, None, None]:
+        result = self.__get_result(git_cmd, *args, suffix=" &")
+        for line in result["stdout"].splitlines():
+            yield line
+        shell_repr = utils.get_cmd_shell_repr('git', git_cmd, *args, env=None)
+        if result["exit_code"] is None:
+            raise UnderlyingGitException(f"Only a part of the output of `{shell_repr}` has been recorded")
+        if result["exit_code"] != 0:
+            raise UnderlyingGitException(f"`{shell_repr}` returned {result['exit_code']}")
+
+    def on_repository_located(self, location: RepositoryLocation) -> RepositoryLocation:
+        with self.__lock:
+            if self.__scratch_dir is None:
+                self.__scratch_dir = tempfile.mkdtemp(prefix="git-machete-replay-")
+                os.mkdir(os.path.join(self.__scratch_dir, ".git"))
+                if self.__branch_layout is not None:
+                    with open(os.path.join(self.__scratch_dir, ".git", "machete"), "w") as branch_layout_file:
+                        branch_layout_file.write(self.__branch_layout)
+            scratch_dir = self.__scratch_dir
+        git_dir = os.path.join(scratch_dir, ".git")
+        return RepositoryLocation(root_dir=scratch_dir if location.root_dir is not None else None,
+                                  worktree_git_dir=git_dir, common_git_dir=git_dir, main_git_dir=git_dir)
+
+    def close(self) -> None:
+        if self.__scratch_dir is not None:
+            shutil.rmtree(self.__scratch_dir, ignore_errors=True)
+            self.__scratch_dir = None
@@ -1,16 +1,34 @@
 import io
+import itertools
 import os
 import re
 import string
+import subprocess
 import sys
-from pathlib import Path
-from typing import (Any, Dict, Iterator, List, Match, NamedTuple, Optional,
-                    Set, Tuple)
-
-from . import utils
-from .constants import (MAX_COUNT_FOR_INITIAL_LOG, GitFormatPatterns,
+import threading
+import weakref
+from typing import (Any, Dict, Generator, Iterable, Iterator, List, Match,
+                    NamedTuple, Optional, Set, Tuple)
+
+from . import git_config_keys, utils
+from .commit_graph import CommitGraph
+from .commit_history import CommitHistoryStore, LogEntry
+from .constants import (MAX_COMMITS_FOR_BATCH_ANCESTRY,
+                        MAX_PERSISTENT_CACHE_ENTRY_COUNT,
+                        MAX_REFS_FOR_BATCH_FOR_EACH_REF,
+                        MAX_TREE_HASH_INDEX_ENTRY_COUNT, GitFormatPatterns,
                         SyncToRemoteStatuses)
 from .exceptions import UnderlyingGitException
+from .git_config import get_common_git_dir, read_config_or_none
+from .git_executor import GitExecutor, RepositoryLocation
+from .memory_cache import CacheStats, MemoryCache, MemoryCachedValue
+from .persistent_cache import (EQUIVALENT_TREE_REACHABLE_CACHE_NAME,
+                               GIT_VERSION_CACHE_NAME, MERGE_BASE_CACHE_NAME,
+                               PERSISTENT_CACHE_DIR_NAME, TREE_HASH_INDEX_NAME,
+                               PersistentCache, PersistentGitVersionCache,
+                               PersistentTreeHashIndex)
+from .reflog import read_reflog_file_or_none
+from .refs import SYMREF_PREFIX, read_named_refs_or_none, read_refs_or_none
 from .utils import (GITHUB_NEW_ISSUE_MESSAGE, AnsiEscapeCodes, CommandResult,
                     colored, debug, fmt)
 
@@ -72,7 +90,7 @@ class LocalBranchFullName(AnyBranchName):
         return self
 
     def to_short_name(self) -> "LocalBranchShortName":
-        return LocalBranchShortName.of(re.sub("^refs/heads/", "", self))
+        return LocalBranchShortName.of(self[len("refs/heads/"):] if self.startswith("refs/heads/") else self)
 
 
 class RemoteBranchShortName(AnyBranchName):
@@ -111,7 +129,7 @@ class RemoteBranchFullName(AnyBranchName):
         return self
 
     def to_short_name(self) -> "RemoteBranchShortName":
-        return RemoteBranchShortName.of(re.sub("^refs/remotes/", "", self))
+        return RemoteBranchShortName.of(self[len("refs/remotes/"):] if self.startswith("refs/remotes/") else self)
 
 
 class FullCommitHash(AnyRevision):
@@ -179,47 +197,266 @@ class BranchPair(NamedTuple):
 HEAD = AnyRevision.of("HEAD")
 
 
+# A single long-lived `git cat-file` process that resolves revisions (incl. `<rev>^{commit}` and `<rev>^{tree}`) to object hashes.
+# Saves spawning a separate `git rev-parse` for each lookup, which on large repos (and especially on Windows) dominates the runtime.
+class GitCatFileProcess:
+    def __init__(self, use_batch_command: bool) -> None:
+        # `--batch-command` (git >= 2.36.0) lets us explicitly ask for just the object info;
+        # on older versions, `--batch-check` with a custom format does the same for every line of input.
+        self.__use_batch_command = use_batch_command
+        mode = "--batch-command" if use_batch_command else "--batch-check"
+        self.__process: Optional["subprocess.Popen[bytes]"] = utils.spawn_cmd(
+            "git", "cat-file", f"{mode}=%(objectname) %(objecttype)", debug_subsystem="git")
+        # Requests and responses from concurrent threads must not interleave.
+        self.__lock = threading.Lock()
+        self.__finalizer = weakref.finalize(self, GitCatFileProcess.__shut_down, self.__process)
+
+    @staticmethod
+    def __shut_down(process: "subprocess.Popen[bytes]") -> None:
+        # Closing stdin is enough for `git cat-file` to exit cleanly.
+        try:
+            if process.stdin:  # pragma: no branch
+                process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):  # pragma: no cover
+            process.kill()
+        finally:
+            if process.stdout:  # pragma: no branch
+                process.stdout.close()
+            utils.trace_spawned_cmd(process)
+
+    def close(self) -> None:
+        self.__finalizer()
+        self.__process = None
+
+    # Returns None if the revision doesn't resolve to an object of the given type (or is ambiguous).
+    def get_object_hash_or_none(self, revision: str, expected_type: str) -> Optional[str]:
+        process = self.__process
+        if process is None or process.stdin is None or process.stdout is None:  # pragma: no cover
+            raise UnderlyingGitException("`git cat-file` process is no longer running")
+        request = f"info {revision}\n" if self.__use_batch_command else f"{revision}\n"
+        try:
+            with self.__lock:
+                process.stdin.write(request.encode('utf-8'))
+                process.stdin.flush()
+                response_bytes = process.stdout.readline()
+            utils.count_spawned_cmd_output(process, len(response_bytes))
+            response = response_bytes.decode('utf-8')
+        except OSError:  # pragma: no cover
+            response = ''
+        if not response:  # pragma: no cover; the process must have died, let the caller fall back to one-off git commands
+            self.close()
+            raise UnderlyingGitException("`git cat-file` process terminated unexpectedly")
+        # For the revisions that can't be resolved, the response is `<revision> missing` or `<revision> ambiguous`.
+        object_hash_and_type = response.rstrip("\n").split(" ")
+        if len(object_hash_and_type) == 2 and object_hash_and_type[1] == expected_type:
+            return object_hash_and_type[0]
+        return None
+
+
+# Snapshot of the branches, replaced as a whole (rather than updated in place) so that it can be read concurrently.
+class _Branches(NamedTuple):
+    local_branches: List[LocalBranchShortName]
+    # Same as `local_branches` and `remote_branches`, for O(1) membership checks.
+    local_branch_set: Set[LocalBranchShortName]
+    remote_branches: List[RemoteBranchShortName]
+    remote_branch_set: Set[RemoteBranchShortName]
+    # The remote branches that have been looked for when loading the branches (None if all of them have been loaded).
+    remote_branches_in_scope: Optional[Set[RemoteBranchShortName]]
+    counterparts_for_fetching: Dict[LocalBranchShortName, Optional[RemoteBranchShortName]]
+
+
 class GitContext:
 
-    def __init__(self) -> None:
+    def __init__(self, executor: Optional[GitExecutor] = None) -> None:
         self.owner: Optional[Any] = None
+        self.__executor: GitExecutor = executor or GitExecutor()
+        # The read paths (like the ones used by `git machete status`) can be called from multiple threads at once.
+        # The lazily loaded caches are then loaded by just one of the threads while the others wait,
+        # and only published once complete. The per-key caches are filled without locking,
+        # as the results are the same no matter which thread computes them first.
+        self.__lock = threading.RLock()
+        self.__tree_hash_index_lock = threading.Lock()
 
         self.__git_version: Optional[Tuple[int, int, int]] = None
+        self.__cat_file_process: Optional[GitCatFileProcess] = None
+        self.__commit_graph: Optional[CommitGraph] = None
+        self.__is_commit_graph_loaded: bool = False
+        self.__persistent_caches: Optional[Dict[str, PersistentCache]] = None
+        self.__tree_hash_index: Optional[PersistentTreeHashIndex] = None
+        # Upstream -> (tip, boundary) of its tree hash index, for the upstreams whose index has already been loaded in this run.
+        self.__tree_hash_index_tip_and_boundary_cache: MemoryCache[str, Tuple[FullCommitHash, FullCommitHash]] = \
+            MemoryCache("tree-hash-index-tip-and-boundary")
         self.__root_dir: Optional[str] = None
+        self.__common_git_dir: Optional[str] = None
         self.__main_git_dir: Optional[str] = None
         self.__worktree_git_dir: Optional[str] = None
 
-        self.__commit_hash_by_revision_cached: Optional[Dict[AnyRevision, Optional[FullCommitHash]]] = None
-        self.__committer_unix_timestamp_by_revision_cached: Optional[Dict[AnyRevision, int]] = None
-        self.__config_cached: Optional[Dict[str, str]] = None
-        self.__counterparts_for_fetching_cached: Optional[Dict[LocalBranchShortName, Optional[RemoteBranchShortName]]] = None
+        self.__commit_history_store: CommitHistoryStore = CommitHistoryStore(self.__get_generation_or_none)
+        self.__branches_cache: MemoryCachedValue[_Branches] = MemoryCachedValue("branches", self.__lock)
+        # Filled up with the commit hashes of all the branches whenever the branches are loaded.
+        self.__commit_hash_by_revision_cache: MemoryCache[AnyRevision, Optional[FullCommitHash]] = MemoryCache("commit-hash-by-revision")
+        self.__committer_unix_timestamp_by_commit_hash_cache: MemoryCache[FullCommitHash, int] = \
+            MemoryCache("committer-timestamp-by-commit-hash")
+        self.__config_cache: MemoryCachedValue[Dict[str, List[str]]] = MemoryCachedValue("config", self.__lock)
         self.__fetch_done_for: Set[str] = set()
-        self.__initial_log_hashes_cached: Dict[FullCommitHash, List[FullCommitHash]] = {}
-        self.__is_equivalent_tree_reachable_cached: Dict[Tuple[FullCommitHash, FullCommitHash], bool] = {}
-        self.__local_branches_cached: Optional[List[LocalBranchShortName]] = None
-        self.__merge_base_cached: Dict[Tuple[FullCommitHash, FullCommitHash], Optional[FullCommitHash]] = {}
-        self.__reflogs_cached: Optional[Dict[AnyBranchName, List[GitReflogEntry]]] = None
-        self.__remaining_log_hashes_cached: Dict[FullCommitHash, List[FullCommitHash]] = {}
-        self.__remote_branches_cached: Optional[List[RemoteBranchShortName]] = None
-        self.__remotes_cached: Optional[List[str]] = None
-        self.__short_commit_hash_by_revision_cached: Dict[AnyRevision, Optional[ShortCommitHash]] = {}
-        self.__tree_hash_by_commit_hash_cached: Optional[Dict[FullCommitHash, Optional[FullTreeHash]]] = None
+        self.__inferred_counterpart_for_fetching_cache: MemoryCache[LocalBranchShortName, Optional[RemoteBranchShortName]] = \
+            MemoryCache("inferred-counterpart-for-fetching")
+        self.__is_equivalent_tree_reachable_cache: MemoryCache[Tuple[FullCommitHash, FullCommitHash], bool] = \
+            MemoryCache("equivalent-tree-reachable")
+        self.__merge_base_cache: MemoryCache[Tuple[FullCommitHash, FullCommitHash], Optional[FullCommitHash]] = MemoryCache("merge-base")
+        self.__reflogs_cache: MemoryCachedValue[Dict[AnyBranchName, List[GitReflogEntry]]] = MemoryCachedValue("reflogs", self.__lock)
+        # Only used with git older than 2.14.2 (see `get_reflog`).
+        self.__reflog_by_branch_cache: MemoryCache[AnyBranchName, List[GitReflogEntry]] = MemoryCache("reflog-by-branch")
+        self.__remotes_cache: MemoryCachedValue[List[str]] = MemoryCachedValue("remotes", self.__lock)
+        self.__short_commit_hash_by_revision_cache: MemoryCache[AnyRevision, Optional[ShortCommitHash]] = \
+            MemoryCache("short-commit-hash-by-revision")
+        self.__short_commit_hash_length: Optional[int] = None
+        self.__tree_hash_by_commit_hash_cache: MemoryCache[FullCommitHash, Optional[FullTreeHash]] = MemoryCache("tree-hash-by-commit-hash")
 
     def flush_caches(self) -> None:
         if self.owner:  # pragma: no branch
             self.owner.flush_caches()
-        self.__commit_hash_by_revision_cached = None
-        self.__committer_unix_timestamp_by_revision_cached = None
-        self.__config_cached = None
-        self.__counterparts_for_fetching_cached = None
-        self.__local_branches_cached = None
-        self.__reflogs_cached = None
-        self.__remote_branches_cached = None
-        self.__remotes_cached = None
-        self.__short_commit_hash_by_revision_cached = {}
+        # Committer timestamps, merge-bases, tree hashes and equivalent tree reachability
+        # only depend on the (immutable) commits, so they're kept.
+        for cache in (self.__branches_cache, self.__commit_hash_by_revision_cache, self.__config_cache,
+                      self.__inferred_counterpart_for_fetching_cache, self.__reflogs_cache, self.__reflog_by_branch_cache,
+                      self.__remotes_cache, self.__short_commit_hash_by_revision_cache, self.__tree_hash_index_tip_and_boundary_cache):
+            cache.flush()
+        # `git cat-file` caches the refs once read, so it would not notice the changes made in the meantime.
+        self.__close_cat_file_process()
+        # The commit-graph might have been rewritten in the meantime (e.g. by `git fetch` or `git gc`) to include new commits.
+        self.__close_commit_graph()
+
+    # Statistics of all the in-memory caches (including the ones of the owner), followed by the persistent caches used in this run.
+    def get_cache_stats(self) -> List[CacheStats]:
+        stats = [cache.get_stats() for cache in (
+            self.__branches_cache, self.__commit_hash_by_revision_cache, self.__committer_unix_timestamp_by_commit_hash_cache,
+            self.__config_cache, self.__inferred_counterpart_for_fetching_cache, self.__is_equivalent_tree_reachable_cache,
+            self.__merge_base_cache, self.__reflogs_cache, self.__reflog_by_branch_cache, self.__remotes_cache,
+            self.__short_commit_hash_by_revision_cache, self.__tree_hash_by_commit_hash_cache,
+            self.__tree_hash_index_tip_and_boundary_cache)]
+        if self.owner:
+            stats += self.owner.get_cache_stats()
+        stats.sort(key=lambda cache_stats: cache_stats.name)
+        for name, persistent_cache in sorted((self.__persistent_caches or {}).items()):
+            stats.append(persistent_cache.get_stats(f"{name} (persistent)"))
+        return stats
+
+    def __get_cat_file_process(self) -> Optional[GitCatFileProcess]:
+        if not self.__executor.can_read_repository_directly:
+            return None
+        if self.__cat_file_process is None:
+            git_version = self.get_git_version()
+            if git_version < (1, 8, 5):  # earliest version of git to support 'cat-file --batch-check=<format>'
+                return None  # pragma: no cover
+            with self.__lock:
+                if self.__cat_file_process is None:
+                    self.__cat_file_process = GitCatFileProcess(use_batch_command=git_version >= (2, 36, 0))
+        return self.__cat_file_process
+
+    def __close_cat_file_process(self) -> None:
+        if self.__cat_file_process is not None:
+            self.__cat_file_process.close()
+            self.__cat_file_process = None
+
+    def __is_commit_graph_usable(self) -> bool:
+        # Just like git itself, let's not rely on the commit-graph when the parents of commits can be overridden
+        # by a shallow clone, grafts or replace refs, since the graph doesn't reflect these.
+        if not self.__executor.can_read_repository_directly:
+            return False
+        if not self.get_boolean_config_attr("core.commitGraph", default_value=True):
+            return False
+        if os.path.exists(self.__get_common_git_subpath("shallow")) or os.path.exists(self.__get_common_git_subpath("info", "grafts")):
+            return False
+        if os.path.exists(self.__get_common_git_subpath("reftable")):
+            return False  # pragma: no cover; we can't cheaply check for replace refs in this case
+        if not os.environ.get("GIT_NO_REPLACE_OBJECTS"):
+            replace_refs_dir = self.__get_common_git_subpath("refs", "replace")
+            if os.path.isdir(replace_refs_dir) and any(files for _, _, files in os.walk(replace_refs_dir)):
+                return False
+            packed_refs_path = self.__get_common_git_subpath("packed-refs")
+            if os.path.isfile(packed_refs_path):
+                with open(packed_refs_path, "rb") as packed_refs:
+                    if b" refs/replace/" in packed_refs.read():
+                        return False
+        return True
+
+    def __get_commit_graph(self) -> Optional[CommitGraph]:
+        if not self.__is_commit_graph_loaded:
+            with self.__lock:
+                if not self.__is_commit_graph_loaded:
+                    if self.__is_commit_graph_usable():
+                        objects_dir = os.environ.get("GIT_OBJECT_DIRECTORY") or self.__get_common_git_subpath("objects")
+                        self.__commit_graph = CommitGraph.load_or_none(objects_dir)
+                    self.__is_commit_graph_loaded = True
+        return self.__commit_graph
+
+    def __get_generation_or_none(self, commit_hash: str) -> Optional[int]:
+        commit_graph = self.__get_commit_graph()
+        return commit_graph.get_generation_or_none(commit_hash) if commit_graph else None
+
+    def __close_commit_graph(self) -> None:
+        if self.__commit_graph is not None:
+            self.__commit_graph.close()
+            self.__commit_graph = None
+        self.__is_commit_graph_loaded = False
+
+    def __ensure_persistent_caches_loaded(self) -> None:
+        if self.__persistent_caches is not None:
+            return
+        with self.__lock:
+            if self.__persistent_caches is not None:
+                return
+            persistent_caches: Dict[str, PersistentCache] = {}
+            # Whether a recorded git command is needed (or not) shouldn't depend on what's been cached by the previous runs.
+            if self.__executor.can_read_repository_directly and \
+                    self.get_boolean_config_attr(git_config_keys.CACHE_ENABLED, default_value=True):
+                for cache_name in (MERGE_BASE_CACHE_NAME, EQUIVALENT_TREE_REACHABLE_CACHE_NAME):
+                    persistent_caches[cache_name] = PersistentCache(
+                        self.get_main_git_subpath(PERSISTENT_CACHE_DIR_NAME, cache_name), max_entry_count=MAX_PERSISTENT_CACHE_ENTRY_COUNT)
+                self.__tree_hash_index = PersistentTreeHashIndex(
+                    self.get_main_git_subpath(PERSISTENT_CACHE_DIR_NAME, TREE_HASH_INDEX_NAME),
+                    max_entry_count=MAX_TREE_HASH_INDEX_ENTRY_COUNT)
+            self.__persistent_caches = persistent_caches
+
+    def __get_persistent_cache(self, name: str) -> Optional[PersistentCache]:
+        self.__ensure_persistent_caches_loaded()
+        assert self.__persistent_caches is not None
+        return self.__persistent_caches.get(name)
+
+    def __get_tree_hash_index(self) -> Optional[PersistentTreeHashIndex]:
+        self.__ensure_persistent_caches_loaded()
+        return self.__tree_hash_index
+
+    # To be called once the command is done, so that the results computed in this run can be reused by the subsequent ones.
+    def persist_caches(self) -> None:
+        for persistent_cache in (self.__persistent_caches or {}).values():
+            persistent_cache.flush()
+            persistent_cache.close()
+        if self.__tree_hash_index is not None:
+            self.__tree_hash_index.close()
+
+    # To be called once the command is done as well, e.g. so that the recording of the git commands (if any) gets written.
+    # Shuts down the processes spawned so far (so that they also make it into the trace, if enabled) and closes the executor.
+    def close(self) -> None:
+        self.__close_cat_file_process()
+        self.__executor.close()
+
+    def clear_persistent_caches(self) -> None:
+        for persistent_cache in (self.__persistent_caches or {}).values():
+            persistent_cache.close()
+        self.__persistent_caches = None
+        if self.__tree_hash_index is not None:
+            self.__tree_hash_index.close()
+        self.__tree_hash_index = None
+        self.__tree_hash_index_tip_and_boundary_cache.flush()
+        PersistentCache.clear_all(self.get_main_git_subpath(PERSISTENT_CACHE_DIR_NAME))
 
     def _run_git(self, git_cmd: str, *args: str, flush_caches: bool, allow_non_zero: bool = False) -> int:
-        exit_code = utils.run_cmd("git", git_cmd, *args)
+        # On Windows, memory-mapped files can't be replaced, which would get into the way of git (auto-)maintenance.
+        self.__close_commit_graph()
+        exit_code = self.__executor.run(git_cmd, *args)
         if flush_caches:
             self.flush_caches()
         if not allow_non_zero and exit_code != 0:
@@ -229,55 +466,94 @@ class GitContext:
 
     def _popen_git(self, git_cmd: str, *args: str,
                    allow_non_zero: bool = False, env: Optional[Dict[str, str]] = None) -> CommandResult:
-        exit_code, stdout, stderr = utils.popen_cmd("git", git_cmd, *args, env=env)
+        stdout, stderr, exit_code = result = self.__executor.popen(git_cmd, *args, env=env)
         if not allow_non_zero and exit_code != 0:
             exit_code_msg: str = fmt(f"`{utils.get_cmd_shell_repr('git', git_cmd, *args, env=env)}` returned {exit_code}\n")
             stdout_msg: str = f"\n{utils.bold('stdout')}:\n{utils.dim(stdout)}" if stdout else ""
             stderr_msg: str = f"\n{utils.bold('stderr')}:\n{utils.dim(stderr)}" if stderr else ""
             # Not applying the formatter to avoid transforming whatever characters might be in the output of the command.
             raise UnderlyingGitException(exit_code_msg + stdout_msg + stderr_msg, apply_fmt=False)
-        return CommandResult(stdout, stderr, exit_code)
+        return result
 
     def get_git_version(self) -> Tuple[int, int, int]:
         if not self.__git_version:
-            # We need to cut out the x.y.z part and not just take the result of 'git version' as is,
-            # because the version string in certain distributions of git (esp. on OS X) has an extra suffix,
-            # which is irrelevant for our purpose (checking whether certain git CLI features are available/bugs are fixed).
-            raw = re.search(r"(\d+).(\d+).(\d+)", self._popen_git("version").stdout)
-            if not raw:  # unlikely, never observed so far; mostly to satisfy mypy
-                return 0, 0, 0  # pragma: no cover
-            self.__git_version = (int(raw.group(1)), int(raw.group(2)), int(raw.group(3)))
+            git_version_cache = self.__get_git_version_cache_or_none()
+            git_executable_path = utils.get_git_executable_path_or_none()
+            git_version = git_version_cache.get(git_executable_path) if git_version_cache and git_executable_path else None
+            if git_version is None:
+                git_version = self.__find_git_version()
+                if git_version_cache and git_executable_path:
+                    git_version_cache.put(git_executable_path, git_version)
+            self.__git_version = git_version
         return self.__git_version
 
-    def get_root_dir(self) -> str:
-        if not self.__root_dir:
-            try:
-                self.__root_dir = self._popen_git("rev-parse", "--show-toplevel").stdout.strip()
-            except UnderlyingGitException:
+    def __find_git_version(self) -> Tuple[int, int, int]:
+        # We need to cut out the x.y.z part and not just take the result of 'git version' as is,
+        # because the version string in certain distributions of git (esp. on OS X) has an extra suffix,
+        # which is irrelevant for our purpose (checking whether certain git CLI features are available/bugs are fixed).
+        raw = re.search(r"(\d+).(\d+).(\d+)", self._popen_git("version").stdout)
+        if not raw:  # unlikely, never observed so far; mostly to satisfy mypy
+            return 0, 0, 0  # pragma: no cover
+        return int(raw.group(1)), int(raw.group(2)), int(raw.group(3))
+
+    def __get_git_version_cache_or_none(self) -> Optional[PersistentGitVersionCache]:
+        try:
+            if not self.__executor.can_read_repository_directly or \
+                    not self.get_boolean_config_attr(git_config_keys.CACHE_ENABLED, default_value=True):
+                return None
+            return PersistentGitVersionCache(self.get_main_git_subpath(PERSISTENT_CACHE_DIR_NAME, GIT_VERSION_CACHE_NAME))
+        except UnderlyingGitException:  # not in a git repository
+            return None
+
+    # Everything needed to locate the repository is retrieved with a single `git rev-parse`, rather than with one per each directory.
+    def __ensure_repository_located(self) -> None:
+        if self.__worktree_git_dir is not None:
+            return
+        with self.__lock:
+            if self.__worktree_git_dir is not None:
+                return
+            # `--show-toplevel` fails in a bare repository, but only after the output for the preceding options is already printed.
+            result = self._popen_git("rev-parse", "--git-dir", "--git-common-dir", "--show-toplevel", allow_non_zero=True)
+            lines = result.stdout.splitlines()
+            if len(lines) < 2:
                 raise UnderlyingGitException("Not a git repository")
+            git_dir, common_git_dir = lines[0], lines[1]
+            if common_git_dir == "--git-common-dir":  # pragma: no cover; git older than 2.5.0 just echoes an unknown option
+                common_git_dir = get_common_git_dir(git_dir)
+            location = self.__executor.on_repository_located(RepositoryLocation(
+                root_dir=lines[2] if result.exit_code == 0 and len(lines) >= 3 else None,
+                worktree_git_dir=git_dir, common_git_dir=common_git_dir, main_git_dir=self.__get_main_git_dir(git_dir)))
+            self.__root_dir = location.root_dir
+            self.__common_git_dir = location.common_git_dir
+            self.__main_git_dir = location.main_git_dir
+            self.__worktree_git_dir = location.worktree_git_dir
+
+    # Not necessarily the same as the common git dir: the machete file and caches of a linked worktree
+    # are only shared with the other worktrees if the worktree's git dir is located under `.git/worktrees/`.
+    @staticmethod
+    def __get_main_git_dir(git_dir: str) -> str:
+        worktrees_dir = os.path.dirname(os.path.normpath(git_dir))
+        if os.path.basename(worktrees_dir) == 'worktrees' and os.path.basename(os.path.dirname(worktrees_dir)) == '.git':
+            main_git_dir = os.path.dirname(worktrees_dir)
+            debug('git dir pointing to %s - we are in a worktree; using %s as the effective git dir instead',
+                  git_dir, main_git_dir, subsystem="git")
+            return main_git_dir
+        return git_dir
+
+    def get_root_dir(self) -> str:
+        self.__ensure_repository_located()
+        if self.__root_dir is None:  # e.g. in a bare repository
+            raise UnderlyingGitException("Not a git repository")
         return self.__root_dir
 
     def get_worktree_git_dir(self) -> str:
-        if not self.__worktree_git_dir:
-            try:
-                self.__worktree_git_dir = self._popen_git("rev-parse", "--git-dir").stdout.strip()
-            except UnderlyingGitException:
-                raise UnderlyingGitException("Not a git repository")
+        self.__ensure_repository_located()
+        assert self.__worktree_git_dir is not None
         return self.__worktree_git_dir
 
     def get_main_git_dir(self) -> str:
-        if not self.__main_git_dir:
-            try:
-                git_dir: str = self._popen_git("rev-parse", "--git-dir").stdout.strip()
-                git_dir_parts = Path(git_dir).parts
-                if len(git_dir_parts) >= 3 and git_dir_parts[-3] == '.git' and git_dir_parts[-2] == 'worktrees':
-                    self.__main_git_dir = os.path.join(*git_dir_parts[:-2])
-                    debug(f'git dir pointing to {git_dir} - we are in a worktree; '
-                          f'using {self.__main_git_dir} as the effective git dir instead')
-                else:
-                    self.__main_git_dir = git_dir
-            except UnderlyingGitException:
-                raise UnderlyingGitException("Not a git repository")
+        self.__ensure_repository_located()
+        assert self.__main_git_dir is not None
         return self.__main_git_dir
 
     def get_worktree_git_subpath(self, *fragments: str) -> str:
@@ -286,6 +562,15 @@ class GitContext:
     def get_main_git_subpath(self, *fragments: str) -> str:
         return os.path.join(self.get_main_git_dir(), *fragments)
 
+    # The directory with the data shared by all worktrees (refs, reflogs of branches, objects etc.), as reported by git itself.
+    def __get_common_git_dir(self) -> str:
+        self.__ensure_repository_located()
+        assert self.__common_git_dir is not None
+        return self.__common_git_dir
+
+    def __get_common_git_subpath(self, *fragments: str) -> str:
+        return os.path.join(self.__get_common_git_dir(), *fragments)
+
     def get_git_timespec_parsed_to_unix_timestamp(self, date: str) -> int:
         try:
             return int(self._popen_git("rev-parse", "--since=" + date).stdout.replace("--max-age=", "").strip())
@@ -293,54 +578,97 @@ class GitContext:
         except (UnderlyingGitException, ValueError):  # pragma: no cover
             raise UnderlyingGitException(f"Cannot parse timespec: `{date}`")
 
-    def __ensure_config_loaded(self) -> None:
-        if self.__config_cached is None:
-            self.__config_cached = {}
-            for config_line in utils.get_non_empty_lines(self._popen_git("config", "--list").stdout):
-                k_v = config_line.split("=", 1)
-                if len(k_v) == 2:  # pragma: no branch; should always be true
-                    k, v = k_v
-                    self.__config_cached[k.lower()] = v
+    def __get_config(self) -> Dict[str, List[str]]:
+        return self.__config_cache.get_or_load(self.__load_config)
+
+    def __load_config(self) -> Dict[str, List[str]]:
+        config: Dict[str, List[str]] = {}
+        for k, v in self.__read_config_from_files_or_none() or self.__read_config_via_git_config():
+            config.setdefault(self.__normalize_config_key(k), []).append(v)
+        return config
+
+    # Config is loaded by pretty much every command, let's avoid spawning `git config --list` for that.
+    def __read_config_from_files_or_none(self) -> Optional[List[Tuple[str, str]]]:
+        if not self.__executor.can_read_repository_directly:
+            return None
+        try:
+            worktree_git_dir = self.get_worktree_git_dir()
+        except UnderlyingGitException:
+            return None
+        return read_config_or_none(worktree_git_dir)
+
+    def __read_config_via_git_config(self) -> List[Tuple[str, str]]:
+        result: List[Tuple[str, str]] = []
+        for config_line in utils.get_non_empty_lines(self._popen_git("config", "--list").stdout):
+            k_v = config_line.split("=", 1)
+            if len(k_v) == 2:  # pragma: no branch; should always be true
+                result.append((k_v[0], k_v[1]))
+        return result
 
     def get_config_attr_or_none(self, key: str) -> Optional[str]:
-        self.__ensure_config_loaded()
-        assert self.__config_cached is not None
-        return self.__config_cached.get(key.lower())
+        values = self.get_config_attr_values(key)
+        # Just like `git config --get`, the last value wins.
+        return values[-1] if values else None
+
+    def get_config_attr_values(self, key: str) -> List[str]:
+        return self.__get_config().get(self.__normalize_config_key(key), [])
+
+    # Section and variable names are case-insensitive, but subsection names (like branch names in `branch.<name>.remote`) are not.
+    @staticmethod
+    def __normalize_config_key(key: str) -> str:
+        section, section_dot, rest = key.partition(".")
+        subsection, subsection_dot, name = rest.rpartition(".")
+        return section.lower() + section_dot + subsection + subsection_dot + name.lower()
 
     def get_boolean_config_attr(self, key: str, default_value: bool) -> bool:
         value = self.get_boolean_config_attr_or_none(key)
         return value if value is not None else default_value
 
     def get_boolean_config_attr_or_none(self, key: str) -> Optional[bool]:
-        self.__ensure_config_loaded()
-        assert self.__config_cached is not None
-        if self.__config_cached.get(key.lower()) is not None:
-            return self.__config_cached.get(key.lower()) == 'true'
+        value = self.get_config_attr_or_none(key)
+        if value is not None:
+            return value == 'true'
         return None
 
     def set_config_attr(self, key: str, value: str) -> None:
         self._run_git("config", "--", key, value, flush_caches=False)
-        self.__ensure_config_loaded()
-        assert self.__config_cached is not None
-        self.__config_cached[key.lower()] = value
+        self.__get_config()[self.__normalize_config_key(key)] = [value]
 
     def unset_config_attr(self, key: str) -> None:
-        self.__ensure_config_loaded()
-        assert self.__config_cached is not None
         if self.get_config_attr_or_none(key):
             self._run_git("config", "--unset", key, flush_caches=False)
-            del self.__config_cached[key.lower()]
+            del self.__get_config()[self.__normalize_config_key(key)]
 
     def add_remote(self, name: str, url: str) -> None:
         self._run_git('remote', 'add', name, url, flush_caches=True)
 
     def get_remotes(self) -> List[str]:
-        if self.__remotes_cached is None:
-            self.__remotes_cached = utils.get_non_empty_lines(self._popen_git("remote").stdout)
-        return self.__remotes_cached
+        return self.__remotes_cache.get_or_load(self.__load_remotes)
+
+    def __load_remotes(self) -> List[str]:
+        if self.__are_legacy_remotes_defined():
+            return utils.get_non_empty_lines(self._popen_git("remote").stdout)
+        return self.__get_remotes_from_config()
+
+    # Same remotes as `git remote` would list (in the same, sorted order),
+    # except for the ones defined in the legacy files under `remotes/` and `branches/`.
+    def __get_remotes_from_config(self) -> List[str]:
+        remotes: Set[str] = set()
+        for key in self.__get_config():
+            section, _, rest = key.partition(".")
+            remote, dot, _ = rest.rpartition(".")
+            if section == "remote" and dot:
+                remotes.add(remote)
+        return sorted(remotes)
+
+    def __are_legacy_remotes_defined(self) -> bool:
+        for legacy_remotes_dir in ("remotes", "branches"):
+            legacy_remotes_path = self.__get_common_git_subpath(legacy_remotes_dir)
+            if os.path.isdir(legacy_remotes_path) and os.listdir(legacy_remotes_path):
+                return True
+        return False
 
     def get_url_of_remote(self, remote: str) -> Optional[str]:
-        self.__ensure_config_loaded()
         url = self.get_config_attr_or_none(f"remote.{remote}.url")  # 'git remote get-url' method has only been added in git v2.5.1
         return url.strip() if url else None
 
@@ -381,63 +709,90 @@ class GitContext:
         # so a separate 'git branch --set-upstream-to' is needed.
         self.set_upstream_to(remote_branch)
 
-    def __find_short_commit_hash_by_revision(self, revision: AnyRevision) -> ShortCommitHash:
-        return ShortCommitHash.of(self._popen_git("rev-parse", "--short", revision + "^{commit}").stdout.rstrip())  # noqa: FS003
+    def __find_short_commit_hash_by_revision(self, revision: AnyRevision) -> Optional[ShortCommitHash]:
+        if self.__short_commit_hash_length is not None:
+            commit_hash = self.__find_commit_hash_by_revision(revision)
+            if not commit_hash:
+                return None
+            process = self.__get_cat_file_process()
+            assert process is not None
+            # Mimic what `git rev-parse --short` does: take the default abbreviation length,
+            # and extend it until the abbreviated hash becomes unambiguous.
+            length = self.__short_commit_hash_length
+            while length < len(commit_hash) and process.get_object_hash_or_none(commit_hash[:length], "commit") != commit_hash:
+                length += 1
+            return ShortCommitHash.of(commit_hash[:length])
+
+        try:
+            short_hash = self._popen_git("rev-parse", "--short", revision + "^{commit}").stdout.rstrip()  # noqa: FS003
+        except UnderlyingGitException:
+            return None
+        # The default abbreviation length (`core.abbrev` or the one derived from the number of objects) is only known to git.
+        # Let's deduce it from the first result, unless the result has been extended to avoid ambiguity.
+        # In the latter case, we'll just try again with the next revision.
+        process = self.__get_cat_file_process()
+        commit_hash = self.__find_commit_hash_by_revision(revision)
+        if process and commit_hash and process.get_object_hash_or_none(commit_hash[:len(short_hash) - 1], "commit") == commit_hash:
+            self.__short_commit_hash_length = len(short_hash)
+        return ShortCommitHash.of(short_hash)
 
     def get_short_commit_hash_by_revision_or_none(self, revision: AnyRevision) -> Optional[ShortCommitHash]:
-        if revision not in self.__short_commit_hash_by_revision_cached:
-            try:
-                self.__short_commit_hash_by_revision_cached[revision] = self.__find_short_commit_hash_by_revision(revision)
-            except UnderlyingGitException:
-                self.__short_commit_hash_by_revision_cached[revision] = None
-        return self.__short_commit_hash_by_revision_cached[revision]
+        return self.__short_commit_hash_by_revision_cache.get_or_compute(revision, self.__find_short_commit_hash_by_revision)
 
-    def __find_commit_hash_by_revision(self, revision: AnyRevision) -> Optional[FullCommitHash]:
+    def __find_object_hash_by_revision(self, revision: AnyRevision, object_type: str) -> Optional[str]:
+        # Newline would terminate the request early (and the remainder would be interpreted as another request).
+        process = self.__get_cat_file_process() if "\n" not in revision else None
+        if process:
+            try:
+                return process.get_object_hash_or_none(f"{revision}^{{{object_type}}}", object_type)
+            except UnderlyingGitException:  # pragma: no cover
+                pass
         # Without ^{commit}, 'git rev-parse --verify' will not only accept references to other kinds of objects (like trees and blobs),
         # but just echo the argument (and exit successfully) even if the argument doesn't match anything in the object store.
         try:
-            return FullCommitHash.of(self._popen_git("rev-parse", "--verify", "--quiet", revision + "^{commit}").stdout.rstrip())  # noqa: FS003, E501
+            return self._popen_git("rev-parse", "--verify", "--quiet", f"{revision}^{{{object_type}}}").stdout.rstrip()
         except UnderlyingGitException:
             return None
 
+    def __find_commit_hash_by_revision(self, revision: AnyRevision) -> Optional[FullCommitHash]:
+        commit_hash = self.__find_object_hash_by_revision(revision, "commit")
+        return FullCommitHash.of(commit_hash) if commit_hash else None
+
     def get_commit_hash_by_revision(self, revision: AnyRevision) -> Optional[FullCommitHash]:
         if self.is_full_hash(revision.full_name()):
             return FullCommitHash.of(revision)
-        if self.__commit_hash_by_revision_cached is None:
-            self.__load_branches()
-        assert self.__commit_hash_by_revision_cached is not None
-        if revision not in self.__commit_hash_by_revision_cached:
-            self.__commit_hash_by_revision_cached[revision] = self.__find_commit_hash_by_revision(revision)
-        return self.__commit_hash_by_revision_cached[revision]
+        # Checked without going through `__get_branches`, so that the lookups of commit hashes don't count as hits of the branches cache.
+        if self.__branches_cache.get_if_loaded_or_none() is None:
+            self.__get_branches()
+        return self.__commit_hash_by_revision_cache.get_or_compute(revision, self.__find_commit_hash_by_revision)
 
     def __find_tree_hash_by_revision(self, revision: AnyRevision) -> Optional[FullTreeHash]:
-        try:
-            return FullTreeHash.of(self._popen_git("rev-parse", "--verify", "--quiet", revision + "^{tree}").stdout.rstrip())  # noqa: FS003
-        except UnderlyingGitException:
-            return None
+        tree_hash = self.__find_object_hash_by_revision(revision, "tree")
+        return FullTreeHash.of(tree_hash) if tree_hash else None
 
     def get_tree_hash_by_commit_hash(self, commit_hash: FullCommitHash) -> Optional[FullTreeHash]:
-        if self.__tree_hash_by_commit_hash_cached is None:
-            self.__load_branches()
-        assert self.__tree_hash_by_commit_hash_cached is not None
-        if commit_hash not in self.__tree_hash_by_commit_hash_cached:
-            self.__tree_hash_by_commit_hash_cached[commit_hash] = self.__find_tree_hash_by_revision(commit_hash)
-        return self.__tree_hash_by_commit_hash_cached[commit_hash]
+        return self.__tree_hash_by_commit_hash_cache.get_or_compute(commit_hash, self.__find_tree_hash_by_revision)
 
     @staticmethod
     def is_full_hash(revision: AnyRevision) -> Optional[Match[str]]:
         return re.match("^[0-9a-f]{40}$", revision)  # noqa: FS003
 
     def get_committer_unix_timestamp_by_revision(self, revision: AnyBranchName) -> int:
-        if self.__committer_unix_timestamp_by_revision_cached is None:
-            self.__load_branches()
-        assert self.__committer_unix_timestamp_by_revision_cached is not None
-        return self.__committer_unix_timestamp_by_revision_cached.get(revision.full_name(), 0)
+        commit_hash = self.get_commit_hash_by_revision(revision.full_name())
+        if not commit_hash:
+            return 0
+        return self.__committer_unix_timestamp_by_commit_hash_cache.get_or_compute(
+            commit_hash, self.__find_committer_unix_timestamp_by_revision)
+
+    def __find_committer_unix_timestamp_by_revision(self, revision: AnyRevision) -> int:
+        try:
+            return int(self._popen_git("log", "-1", "--format=%ct", revision, "--").stdout.strip() or 0)
+        except (UnderlyingGitException, ValueError):
+            return 0
 
     def __get_remotes_containing_branch(self, branch: LocalBranchShortName, remotes: Optional[List[str]] = None) -> List[str]:
         remotes = remotes if remotes else self.get_remotes()
-        remote_branches = self.get_remote_branches()
-        return [remote for remote in remotes if f'{remote}/{branch}' in remote_branches]
+        return [remote for remote in remotes if self.is_remote_branch(RemoteBranchShortName(f'{remote}/{branch}'))]
 
     def get_inferred_remote_for_fetching_of_branch(self,
                                                    branch: LocalBranchShortName,
@@ -445,9 +800,8 @@ class GitContext:
                                                    ) -> Optional[str]:
         remotes_containing_branch: List[str] = self.__get_remotes_containing_branch(branch=branch, remotes=remotes)
         if len(remotes_containing_branch) > 1 or len(remotes_containing_branch) == 0:
-            debug(f'Can\'t infer remote for fetching of branch.\n'
-                  f'There are {len(remotes_containing_branch)} remotes: {", ".join(remotes_containing_branch)} '
-                  f'containing {branch} branch.')
+            debug('Can\'t infer remote for fetching of branch.\nThere are %s remotes: %s containing %s branch.',
+                  len(remotes_containing_branch), ", ".join(remotes_containing_branch), branch, subsystem="git")
             return None
         else:
             return remotes_containing_branch[0]
@@ -464,20 +818,20 @@ class GitContext:
         return self.get_strict_remote_for_fetching_of_branch(branch) or self.get_inferred_remote_for_fetching_of_branch(branch, remotes)
 
     def __get_inferred_counterpart_for_fetching_of_branch(self, branch: LocalBranchShortName) -> Optional[RemoteBranchShortName]:
+        return self.__inferred_counterpart_for_fetching_cache.get_or_compute(
+            branch, self.__find_inferred_counterpart_for_fetching_of_branch)
+
+    def __find_inferred_counterpart_for_fetching_of_branch(self, branch: LocalBranchShortName) -> Optional[RemoteBranchShortName]:
         remotes_containing_branch: List[str] = self.__get_remotes_containing_branch(branch)
         if len(remotes_containing_branch) > 1 or len(remotes_containing_branch) == 0:
-            debug(f'Can\'t infer local branch\'s remote counterpart for fetching of branch.\n'
-                  f'There are {len(remotes_containing_branch)} remotes: {", ".join(remotes_containing_branch)} '
-                  f'containing branch {branch}.')
+            debug('Can\'t infer local branch\'s remote counterpart for fetching of branch.\nThere are %s remotes: %s containing branch %s.',
+                  len(remotes_containing_branch), ", ".join(remotes_containing_branch), branch, subsystem="git")
             return None
         else:
             return RemoteBranchShortName.of(f"{remotes_containing_branch[0]}/{branch}")
 
     def get_strict_counterpart_for_fetching_of_branch(self, branch: LocalBranchShortName) -> Optional[RemoteBranchShortName]:
-        if self.__counterparts_for_fetching_cached is None:
-            self.__load_branches()
-        assert self.__counterparts_for_fetching_cached is not None
-        return self.__counterparts_for_fetching_cached.get(branch)
+        return self.__get_branches().counterparts_for_fetching.get(branch)
 
     def get_combined_counterpart_for_fetching_of_branch(self, branch: LocalBranchShortName) -> Optional[RemoteBranchShortName]:
         # Since many people don't use '--set-upstream' flag of 'push' or 'branch',
@@ -504,49 +858,51 @@ class GitContext:
         self._run_git("checkout", "--quiet", branch, "--", flush_caches=True)
 
     def get_local_branches(self) -> List[LocalBranchShortName]:
-        if self.__local_branches_cached is None:
-            self.__load_branches()
-        assert self.__local_branches_cached is not None
-        return self.__local_branches_cached
+        return self.__get_branches().local_branches
 
     def get_remote_branches(self) -> List[RemoteBranchShortName]:
-        if self.__remote_branches_cached is None:
-            self.__load_branches()
-        assert self.__remote_branches_cached is not None
-        return self.__remote_branches_cached
-
-    def __load_branches(self) -> None:
-        self.__commit_hash_by_revision_cached = {}
-        self.__committer_unix_timestamp_by_revision_cached = {}
-        self.__counterparts_for_fetching_cached = {}
-        self.__local_branches_cached = []
-        self.__remote_branches_cached = []
-        self.__tree_hash_by_commit_hash_cached = {}
-
-        # Using 'committerdate:raw' instead of 'committerdate:unix' since the latter isn't supported by some older versions of git.
-        raw_remote = utils.get_non_empty_lines(
-            self._popen_git("for-each-ref", "--format=%(refname)\t%(objectname)\t%(tree)\t%(committerdate:raw)", "refs/remotes").stdout)
-        for line in raw_remote:
-            values = line.split("\t")
-            if len(values) != 4:
-                continue  # pragma: no cover; invalid, shouldn't happen
-            branch, commit_hash, tree_hash, committer_unix_timestamp_and_time_zone = values
-            b_stripped_remote = RemoteBranchFullName.of(branch).to_short_name()
-            self.__remote_branches_cached += [b_stripped_remote]
-            self.__commit_hash_by_revision_cached[RemoteBranchFullName.of(branch)] = FullCommitHash.of(commit_hash)
-            self.__tree_hash_by_commit_hash_cached[FullCommitHash.of(commit_hash)] = FullTreeHash.of(tree_hash)
-            self.__committer_unix_timestamp_by_revision_cached[RemoteBranchFullName.of(branch)] = int(
-                committer_unix_timestamp_and_time_zone.split(' ')[0])
-
-        raw_local = utils.get_non_empty_lines(
-            self._popen_git("for-each-ref", "--format=%(refname)\t%(objectname)\t%(tree)\t%(committerdate:raw)\t%(upstream)",
-                            "refs/heads").stdout)
-
-        for line in raw_local:
-            values = line.split("\t")
-            if len(values) != 5:
-                continue  # pragma: no cover; invalid, shouldn't happen
-            branch, commit_hash, tree_hash, committer_unix_timestamp_and_time_zone, fetch_counterpart = values
+        branches = self.__get_branches()
+        if branches.remote_branches_in_scope is not None:
+            branches = self.__load_all_remote_branches()
+        return branches.remote_branches
+
+    def is_local_branch(self, branch: LocalBranchShortName) -> bool:
+        return branch in self.__get_branches().local_branch_set
+
+    def is_remote_branch(self, branch: RemoteBranchShortName) -> bool:
+        branches = self.__get_branches()
+        if branch in branches.remote_branch_set:
+            return True
+        if branches.remote_branches_in_scope is None or branch in branches.remote_branches_in_scope:
+            return False
+        # A remote branch that has not been loaded (see `__get_remote_refs_in_scope`), let's check it individually.
+        return self.get_commit_hash_by_revision(branch.full_name()) is not None
+
+    def __get_branches(self) -> _Branches:
+        return self.__branches_cache.get_or_load(self.__load_branches)
+
+    def __load_branches(self) -> _Branches:
+        counterparts_for_fetching: Dict[LocalBranchShortName, Optional[RemoteBranchShortName]] = {}
+        local_branches: List[LocalBranchShortName] = []
+        remote_branches: List[RemoteBranchShortName] = []
+
+        # Tree hashes and committer dates are NOT loaded upfront for all the branches (see `get_tree_hash_by_commit_hash`
+        # and `get_committer_unix_timestamp_by_revision`), since that requires opening the commit object of each branch.
+        local_refs_and_upstreams = self.__read_local_refs_from_files_or_none()
+        if local_refs_and_upstreams is None:
+            local_refs_and_upstreams = self.__read_local_refs_via_for_each_ref()
+        # Remotes can have way more branches than the repository has local branches,
+        # so only the remote branches that can possibly be the counterparts of local branches are loaded upfront.
+        remote_refs_in_scope = self.__get_remote_refs_in_scope(local_refs_and_upstreams)
+        remote_refs = self.__read_remote_refs(remote_refs_in_scope)
+
+        for branch, commit_hash in remote_refs:
+            b_full_remote = RemoteBranchFullName.of(branch)
+            remote_branches += [b_full_remote.to_short_name()]
+            self.__commit_hash_by_revision_cache.put(b_full_remote, FullCommitHash.of(commit_hash))
+        remote_branch_set = set(remote_branches)
+
+        for branch, commit_hash, fetch_counterpart in local_refs_and_upstreams:
             b_stripped_local = LocalBranchFullName.of(branch).to_short_name()
             # fetch_counterpart might be empty, or might even point to a local branch
             # (in case `branch.BRANCH.remote` config is set to `.`).
@@ -554,35 +910,156 @@ class GitContext:
                 fetch_counterpart_stripped = RemoteBranchFullName.of(fetch_counterpart).to_short_name()
             else:
                 fetch_counterpart_stripped = None
-            self.__local_branches_cached += [b_stripped_local]
-            self.__commit_hash_by_revision_cached[LocalBranchFullName.of(branch)] = FullCommitHash.of(commit_hash)
-            self.__tree_hash_by_commit_hash_cached[FullCommitHash.of(commit_hash)] = FullTreeHash.of(tree_hash)
-            self.__committer_unix_timestamp_by_revision_cached[LocalBranchFullName.of(branch)] = int(
-                committer_unix_timestamp_and_time_zone.split(' ')[0])
-            if fetch_counterpart_stripped in self.__remote_branches_cached:
-                self.__counterparts_for_fetching_cached[b_stripped_local] = fetch_counterpart_stripped
-
-    def __get_log_hashes(self, revision: AnyRevision, max_count: Optional[int]) -> List[FullCommitHash]:
-        opts = ([f"--max-count={str(max_count)}"] if max_count else []) + ["--format=%H", revision.full_name()]
-        return list(map(FullCommitHash.of, utils.get_non_empty_lines(self._popen_git("log", *opts).stdout)))
+            local_branches += [b_stripped_local]
+            self.__commit_hash_by_revision_cache.put(LocalBranchFullName.of(branch), FullCommitHash.of(commit_hash))
+            if fetch_counterpart_stripped in remote_branch_set:
+                counterparts_for_fetching[b_stripped_local] = fetch_counterpart_stripped
+
+        return _Branches(
+            local_branches=local_branches,
+            local_branch_set=set(local_branches),
+            remote_branches=remote_branches,
+            remote_branch_set=remote_branch_set,
+            remote_branches_in_scope={RemoteBranchFullName.of(ref).to_short_name() for ref in remote_refs_in_scope},
+            counterparts_for_fetching=counterparts_for_fetching)
+
+    # Only needed when all the remote branches are to be listed (like in `git machete list addable`).
+    def __load_all_remote_branches(self) -> _Branches:
+        with self.__lock:
+            branches = self.__get_branches()
+            if branches.remote_branches_in_scope is None:
+                return branches
+            debug("loading all remote branches", subsystem="git")
+            remote_branches: List[RemoteBranchShortName] = []
+            for branch, commit_hash in self.__read_remote_refs(None):
+                b_full_remote = RemoteBranchFullName.of(branch)
+                remote_branches += [b_full_remote.to_short_name()]
+                self.__commit_hash_by_revision_cache.put(b_full_remote, FullCommitHash.of(commit_hash))
+            branches = branches._replace(
+                remote_branches=remote_branches, remote_branch_set=set(remote_branches), remote_branches_in_scope=None)
+            self.__branches_cache.set(branches)
+            return branches
+
+    # The remote branches that can be the counterparts for fetching of the given local branches:
+    # their upstreams, and the same-named branches of each remote (see `__get_inferred_counterpart_for_fetching_of_branch`).
+    def __get_remote_refs_in_scope(self, local_refs_and_upstreams: List[Tuple[str, str, str]]) -> List[str]:
+        # Remote branches of the remotes defined in the legacy files (if any) will be checked individually when needed.
+        remotes = self.__get_remotes_from_config()
+        remote_refs_in_scope: Set[str] = set()
+        for branch, _, upstream in local_refs_and_upstreams:
+            if RemoteBranchFullName.is_valid(upstream):
+                remote_refs_in_scope.add(upstream)
+            branch_short_name = LocalBranchFullName.of(branch).to_short_name()
+            remote_refs_in_scope.update(f"refs/remotes/{remote}/{branch_short_name}" for remote in remotes)
+        return sorted(remote_refs_in_scope)
+
+    # Reads the given remote refs (or all of them, if `ref_names` is None) that exist.
+    def __read_remote_refs(self, ref_names: Optional[List[str]]) -> List[Tuple[str, str]]:
+        if self.__can_read_refs_from_files():
+            if ref_names is None:
+                refs = read_refs_or_none(self.__get_common_git_dir(), "refs/remotes/")
+            else:
+                refs = read_named_refs_or_none(self.__get_common_git_dir(), ref_names)
+            if refs is not None:
+                return refs
+        # For-each-ref patterns match the given refs (and any refs nested under them, hence the filtering),
+        # but the patterns are only passed on the command line when there aren't too many of them.
+        patterns = ref_names if ref_names is not None and len(ref_names) <= MAX_REFS_FOR_BATCH_FOR_EACH_REF else ["refs/remotes"]
+        ref_name_set = set(ref_names) if ref_names is not None else None
+        remote_refs: List[Tuple[str, str]] = []
+        if not patterns:
+            return remote_refs
+        for line in utils.get_non_empty_lines(self._popen_git("for-each-ref", "--format=%(refname)\t%(objectname)", *patterns).stdout):
+            values = line.split("\t")
+            if len(values) != 2:
+                continue  # pragma: no cover; invalid, shouldn't happen
+            if ref_name_set is None or values[0] in ref_name_set:
+                remote_refs.append((values[0], values[1]))
+        return remote_refs
+
+    def __read_local_refs_via_for_each_ref(self) -> List[Tuple[str, str, str]]:
+        local_refs_and_upstreams: List[Tuple[str, str, str]] = []
+        for line in utils.get_non_empty_lines(
+                self._popen_git("for-each-ref", "--format=%(refname)\t%(objectname)\t%(upstream)", "refs/heads").stdout):
+            values = line.split("\t")
+            if len(values) != 3:
+                continue  # pragma: no cover; invalid, shouldn't happen
+            local_refs_and_upstreams.append((values[0], values[1], values[2]))
+        return local_refs_and_upstreams
+
+    def __read_local_refs_from_files_or_none(self) -> Optional[List[Tuple[str, str, str]]]:
+        if not self.__can_read_refs_from_files():
+            return None
+        local_refs = read_refs_or_none(self.__get_common_git_dir(), "refs/heads/")
+        if local_refs is None:
+            return None
+        return [(ref, commit_hash, self.__get_upstream(LocalBranchFullName.of(ref).to_short_name())) for ref, commit_hash in local_refs]
+
+    def __can_read_refs_from_files(self) -> bool:
+        if not self.__is_files_ref_storage():
+            return False
+        # Remotes can also be defined in the legacy files under `remotes/` and `branches/`, let `git for-each-ref` handle these.
+        return not self.__are_legacy_remotes_defined()
+
+    # Mirrors `%(upstream)` of `git for-each-ref`: the remote-tracking branch that `branch.<branch>.merge`
+    # is fetched into, as per the fetch refspecs of `branch.<branch>.remote`; or `branch.<branch>.merge` itself
+    # if the remote is `.` (i.e. the local repository).
+    def __get_upstream(self, branch: LocalBranchShortName) -> str:
+        remote = self.get_config_attr_or_none(f"branch.{branch}.remote")
+        merge_values = self.get_config_attr_values(f"branch.{branch}.merge")
+        if not remote or not merge_values:
+            return ""
+        merge = merge_values[0]
+        if remote == ".":
+            return merge
+        # Note that git doesn't take negative refspecs into account here.
+        for refspec in self.get_config_attr_values(f"remote.{remote}.fetch"):
+            src, separator, dst = refspec.lstrip("+").partition(":")
+            if refspec.startswith("^") or not separator or not dst:
+                continue
+            tracking_ref = self.__match_refspec_side(src, merge, dst)
+            if tracking_ref is not None:
+                return tracking_ref
+        return ""
+
+    # Returns `replacement` with `*` substituted by the part of `name` matched by `*` in `pattern` (if any),
+    # or None if `name` doesn't match `pattern`.
+    @staticmethod
+    def __match_refspec_side(pattern: str, name: str, replacement: str) -> Optional[str]:
+        if "*" not in pattern:
+            return replacement if name == pattern else None
+        prefix, _, suffix = pattern.partition("*")
+        if len(name) < len(prefix) + len(suffix) or not name.startswith(prefix) or not name.endswith(suffix):
+            return None
+        return replacement.replace("*", name[len(prefix):len(name) - len(suffix)], 1)
+
+    def __read_log_lazily(self, *commit_hashes: str) -> Generator[LogEntry, None, None]:
+        lines = self.__executor.stream_lines("log", "--format=%H %P", *commit_hashes)
+        try:
+            for line in lines:
+                commit_hash_, *parent_hashes = line.split()
+                yield commit_hash_, parent_hashes
+        finally:
+            lines.close()
 
     # Since getting the full history of a branch can be an expensive operation for large repositories
-    # (compared to all other underlying git operations), there's a simple optimization in place:
-    # we first fetch only a couple of first commits in the history, and only fetch the rest if needed.
-    def spoonfeed_log_hashes(self, branch_full_hash: FullCommitHash) -> Iterator[FullCommitHash]:
-        if branch_full_hash not in self.__initial_log_hashes_cached:
-            self.__initial_log_hashes_cached[branch_full_hash] = self.__get_log_hashes(branch_full_hash,
-                                                                                       max_count=MAX_COUNT_FOR_INITIAL_LOG)
-        for hash in self.__initial_log_hashes_cached[branch_full_hash]:
-            yield FullCommitHash.of(hash)
-
-        if branch_full_hash not in self.__remaining_log_hashes_cached:
-            self.__remaining_log_hashes_cached[branch_full_hash] = self.__get_log_hashes(branch_full_hash,
-                                                                                         max_count=None)[MAX_COUNT_FOR_INITIAL_LOG:]
-        for hash in self.__remaining_log_hashes_cached[branch_full_hash]:
-            yield FullCommitHash.of(hash)
-
-    def __load_all_reflogs(self) -> None:
+    # (compared to all other underlying git operations), while the callers typically only need the first few hundred commits,
+    # the history is streamed from a single `git log` process, which gets killed as soon as the caller stops iterating.
+    # The commits read so far are kept in a store shared between the histories of all branches,
+    # so that `git log` is only spawned again if the iteration gets past them.
+    def get_log_hashes_lazily(self, branch_full_hash: FullCommitHash) -> Generator[FullCommitHash, None, None]:
+        for commit_hash in self.__commit_history_store.get_history(branch_full_hash, self.__read_log_lazily):
+            yield FullCommitHash(commit_hash)
+
+    def is_log_stored(self, branch_full_hash: FullCommitHash) -> bool:
+        return self.__commit_history_store.has_history(branch_full_hash)
+
+    # The union of the histories of all the given commits, streamed from a single `git log` (just like in `get_log_hashes_lazily`),
+    # along with the parents of each commit. Unlike the history of a single commit, it's not kept in the store.
+    def get_log_entries_lazily(self, commit_hashes: List[FullCommitHash]) -> Generator[LogEntry, None, None]:
+        return self.__read_log_lazily(*commit_hashes)
+
+    def __load_all_reflogs(self) -> Dict[AnyBranchName, List[GitReflogEntry]]:
         # %gd - reflog selector (refname@{num})
         # %H - full hash
         # %gs - reflog subject
@@ -597,9 +1074,13 @@ class GitContext:
 
         all_branches: List[str] = local_branches + counterpart_branches
 
+        reflogs_from_files = self.__read_reflog_files_or_none(all_branches)
+        if reflogs_from_files is not None:
+            return reflogs_from_files
+
         # The trailing '--' is necessary to avoid ambiguity in case there is a file called just exactly like one of the branches.
         entries = utils.get_non_empty_lines(self._popen_git("reflog", "show", "--format=%gD\t%H\t%gs", *(all_branches + ["--"])).stdout)
-        self.__reflogs_cached = {}
+        reflogs: Dict[AnyBranchName, List[GitReflogEntry]] = {}
         for entry in entries:
             values = entry.split("\t")
             if len(values) != 3:
@@ -610,31 +1091,55 @@ class GitContext:
                 continue  # pragma: no cover; invalid, shouldn't happen
             branch, _ = branch_and_index
             any_branch_name = AnyBranchName.of(branch)
-            if any_branch_name not in self.__reflogs_cached:
-                self.__reflogs_cached[any_branch_name] = []
-            self.__reflogs_cached[any_branch_name] += [GitReflogEntry(hash=FullCommitHash.of(hash), reflog_subject=subject)]
+            if any_branch_name not in reflogs:
+                reflogs[any_branch_name] = []
+            reflogs[any_branch_name] += [GitReflogEntry(hash=FullCommitHash.of(hash), reflog_subject=subject)]
+        return reflogs
+
+    def __is_files_ref_storage(self) -> bool:
+        if not self.__executor.can_read_repository_directly:
+            return False
+        # With reftable (or any other ref storage backend that we don't know about), there are no plain ref and reflog files to read.
+        ref_storage = self.get_config_attr_or_none("extensions.refStorage")
+        if ref_storage is not None and ref_storage.lower() != "files":
+            return False
+        return not os.path.exists(self.__get_common_git_subpath("reftable"))
+
+    # Reads the reflogs of the given refs directly from `logs/` under the main git directory
+    # (reflogs of branches, unlike the one of HEAD, are shared between all worktrees).
+    # Returns None if any of the reflogs can't be read this way, so that `git reflog show` should be used instead.
+    def __read_reflog_files_or_none(self, branches: List[str]) -> Optional[Dict[AnyBranchName, List[GitReflogEntry]]]:
+        if not self.__is_files_ref_storage():
+            return None
+        result: Dict[AnyBranchName, List[GitReflogEntry]] = {}
+        for branch in branches:
+            entries = read_reflog_file_or_none(self.__get_common_git_subpath("logs", *branch.split("/")))
+            if entries is None:
+                return None
+            if entries:
+                result[AnyBranchName.of(branch)] = [GitReflogEntry(hash=FullCommitHash.of(hash), reflog_subject=subject)
+                                                    for hash, subject in entries]
+        return result
 
     def get_reflog(self, branch: AnyBranchName) -> List[GitReflogEntry]:
         # git version 2.14.2 fixed a bug that caused fetching reflog of more than
         # one branch at the same time unreliable in certain cases
         if self.get_git_version() >= (2, 14, 2):
-            if self.__reflogs_cached is None:
-                self.__load_all_reflogs()
-            assert self.__reflogs_cached is not None
-            return self.__reflogs_cached.get(branch, [])
+            return self.__reflogs_cache.get_or_load(self.__load_all_reflogs).get(branch, [])
         else:
-            if self.__reflogs_cached is None:
-                self.__reflogs_cached = {}
-            if branch not in self.__reflogs_cached:
-                # %H - full hash
-                # %gs - reflog subject
-                self.__reflogs_cached[branch] = list(map(lambda x: GitReflogEntry(hash=FullCommitHash(x[0]), reflog_subject=x[1]),
-                                                         [entry.split(":", 1) for entry in utils.get_non_empty_lines(
-                                                             # The trailing '--' is necessary to avoid ambiguity in case there is a file
-                                                             # called just exactly like the branch 'branch'.
-                                                             self._popen_git("reflog", "show", "--format=%H:%gs", branch, "--").stdout)]
-                                                         ))
-            return self.__reflogs_cached[branch]
+            return self.__reflog_by_branch_cache.get_or_compute(branch, self.__load_reflog)
+
+    def __load_reflog(self, branch: AnyBranchName) -> List[GitReflogEntry]:
+        reflog_from_file = self.__read_reflog_files_or_none([branch])
+        if reflog_from_file is not None:
+            return reflog_from_file.get(branch, [])
+        # %H - full hash
+        # %gs - reflog subject
+        return list(map(lambda x: GitReflogEntry(hash=FullCommitHash(x[0]), reflog_subject=x[1]),
+                        [entry.split(":", 1) for entry in utils.get_non_empty_lines(
+                            # The trailing '--' is necessary to avoid ambiguity in case there is a file
+                            # called just exactly like the branch 'branch'.
+                            self._popen_git("reflog", "show", "--format=%H:%gs", branch, "--").stdout)]))
 
     def create_branch(self, branch: LocalBranchShortName, out_of_revision: AnyRevision, switch_head: bool) -> None:
         self._run_git("branch", branch, out_of_revision, flush_caches=True)
@@ -675,11 +1180,28 @@ class GitContext:
             return LocalBranchFullName.of(raw).to_short_name()
 
     def get_currently_checked_out_branch_or_none(self) -> Optional[LocalBranchShortName]:
+        raw = self.__read_head_file_or_none()
+        if raw is None:
+            try:
+                raw = self._popen_git("symbolic-ref", "--quiet", "HEAD").stdout.strip()
+            except UnderlyingGitException:
+                return None
+        return LocalBranchFullName.of(raw).to_short_name() if raw else None
+
+    # Returns the branch that HEAD points to ("" if HEAD is detached),
+    # or None if it can't be read directly from the file (so that `git symbolic-ref` should be used instead).
+    def __read_head_file_or_none(self) -> Optional[str]:
+        if not self.__is_files_ref_storage():
+            return None
         try:
-            raw = self._popen_git("symbolic-ref", "--quiet", "HEAD").stdout.strip()
-            return LocalBranchFullName.of(raw).to_short_name()
-        except UnderlyingGitException:
+            with open(self.get_worktree_git_subpath("HEAD")) as head_file:
+                head = head_file.read().strip()
+        except OSError:
             return None
+        if head.startswith(SYMREF_PREFIX):
+            target = head[len(SYMREF_PREFIX):].strip()
+            return target if target.startswith("refs/heads/") else None
+        return "" if len(head) in (40, 64) and all(c in string.hexdigits for c in head) else None
 
     def expect_no_operation_in_progress(self) -> None:
         rebased_branch = self.get_currently_rebased_branch_or_none()
@@ -709,6 +1231,35 @@ class GitContext:
             raise UnderlyingGitException("Not currently on any branch")
         return result
 
+    # Merge-base of two given commits never changes, so it can be safely reused across git-machete invocations.
+    # An empty string stands for no merge-base at all (unrelated histories).
+    def __get_merge_base_from_persistent_cache(self, hash1: FullCommitHash, hash2: FullCommitHash) -> Tuple[bool, Optional[FullCommitHash]]:
+        persistent_cache = self.__get_persistent_cache(MERGE_BASE_CACHE_NAME)
+        merge_base = persistent_cache.get(hash1 + hash2) if persistent_cache else None
+        if merge_base is None:
+            return False, None
+        return True, FullCommitHash.of(merge_base) if merge_base else None
+
+    def __cache_merge_base(self, hash1: FullCommitHash, hash2: FullCommitHash, merge_base: Optional[FullCommitHash],
+                           persist: bool = True) -> None:
+        self.__merge_base_cache.put((hash1, hash2), merge_base)
+        if persist:
+            self.__persist_merge_base(hash1, hash2, merge_base)
+
+    def __persist_merge_base(self, hash1: FullCommitHash, hash2: FullCommitHash, merge_base: Optional[FullCommitHash]) -> None:
+        persistent_cache = self.__get_persistent_cache(MERGE_BASE_CACHE_NAME)
+        if persistent_cache:
+            persistent_cache.put(hash1 + hash2, merge_base or "")
+
+    def __get_merge_base_from_commit_graph(self, hash1: FullCommitHash, hash2: FullCommitHash) -> Tuple[bool, Optional[FullCommitHash]]:
+        commit_graph = self.__get_commit_graph()
+        merge_bases = commit_graph.get_merge_bases_or_none(hash1, hash2) if commit_graph else None
+        # In the rare case of criss-cross histories (more than one merge-base),
+        # let's defer to `git merge-base` to pick the same merge-base as git would.
+        if merge_bases is None or len(merge_bases) > 1:
+            return False, None
+        return True, FullCommitHash.of(merge_bases[0]) if merge_bases else None
+
     def __get_merge_base_for_commit_hashes(self, hash1: FullCommitHash, hash2: FullCommitHash) -> Optional[FullCommitHash]:
         # This if statement is not changing the outcome of the later return, but
         # it enhances the efficiency of the script. If both hashes are the same,
@@ -717,20 +1268,118 @@ class GitContext:
             return hash1
         if hash1 > hash2:
             hash1, hash2 = hash2, hash1
-        if not (hash1, hash2) in self.__merge_base_cached:
-            # Note that we don't pass '--all' flag to 'merge-base', so we'll get only one merge-base
-            # even if there is more than one (in the rare case of criss-cross histories).
-            # This is still okay from the perspective of is-ancestor checks that are our sole use of merge-base:
-            # * if any of hash1, hash2 is an ancestor of another,
-            #   then there is exactly one merge-base - the ancestor,
-            # * if neither of hash1, hash2 is an ancestor of another,
-            #   then none of the (possibly more than one) merge-bases is equal to either of hash1/hash2 anyway.
-            # In the rare case when hash1, hash2 have no common commits, the flag: allow_non_zero=True
-            # (allows, non zero exit code to be returned by git merge-base command, without raising an exception)
-            # is used and the __get_merge_base function returns None.
-            merge_base = self._popen_git("merge-base", hash1, hash2, allow_non_zero=True).stdout.strip()
-            self.__merge_base_cached[hash1, hash2] = FullCommitHash.of(merge_base) if merge_base else None
-        return self.__merge_base_cached[hash1, hash2]
+        return self.__merge_base_cache.get_or_compute((hash1, hash2), self.__find_merge_base)
+
+    def __find_merge_base(self, hash_pair: Tuple[FullCommitHash, FullCommitHash]) -> Optional[FullCommitHash]:
+        hash1, hash2 = hash_pair
+        # Note that we don't pass '--all' flag to 'merge-base', so we'll get only one merge-base
+        # even if there is more than one (in the rare case of criss-cross histories).
+        # This is still okay from the perspective of is-ancestor checks that are our sole use of merge-base:
+        # * if any of hash1, hash2 is an ancestor of another,
+        #   then there is exactly one merge-base - the ancestor,
+        # * if neither of hash1, hash2 is an ancestor of another,
+        #   then none of the (possibly more than one) merge-bases is equal to either of hash1/hash2 anyway.
+        # In the rare case when hash1, hash2 have no common commits, the flag: allow_non_zero=True
+        # (allows, non zero exit code to be returned by git merge-base command, without raising an exception)
+        # is used and the __get_merge_base function returns None.
+        is_found_in_persistent_cache, merge_base = self.__get_merge_base_from_persistent_cache(hash1, hash2)
+        if is_found_in_persistent_cache:
+            return merge_base
+        is_found_in_commit_graph, merge_base = self.__get_merge_base_from_commit_graph(hash1, hash2)
+        if not is_found_in_commit_graph:
+            merge_base_from_git = self._popen_git("merge-base", hash1, hash2, allow_non_zero=True).stdout.strip()
+            merge_base = FullCommitHash.of(merge_base_from_git) if merge_base_from_git else None
+        self.__persist_merge_base(hash1, hash2, merge_base)
+        return merge_base
+
+    # Answers the merge-base (and hence, is-ancestor) queries for all the given pairs of revisions at once,
+    # so that subsequent calls to is_ancestor_or_equal/get_merge_base for these pairs are served from the cache.
+    # Rather than running `git merge-base` for each pair separately, we take the common ancestor of all the involved commits
+    # and do a single walk over the commits between this common ancestor and the given commits.
+    # Pairs that can be answered from the commit-graph are resolved in-process right away and excluded from the walk.
+    def compute_ancestry(self, pairs: Iterable[Tuple[AnyRevision, AnyRevision]]) -> None:
+        hash_pairs: Set[Tuple[FullCommitHash, FullCommitHash]] = set()
+        for revision1, revision2 in pairs:
+            hash1, hash2 = self.get_commit_hash_by_revision(revision1), self.get_commit_hash_by_revision(revision2)
+            if hash1 and hash2 and hash1 != hash2:
+                hash_pair = (hash1, hash2) if hash1 < hash2 else (hash2, hash1)
+                if hash_pair not in self.__merge_base_cache:
+                    is_found_in_persistent_cache, merge_base = self.__get_merge_base_from_persistent_cache(*hash_pair)
+                    if is_found_in_persistent_cache:
+                        self.__cache_merge_base(*hash_pair, merge_base, persist=False)
+                        continue
+                    is_found_in_commit_graph, merge_base = self.__get_merge_base_from_commit_graph(*hash_pair)
+                    if is_found_in_commit_graph:
+                        self.__cache_merge_base(*hash_pair, merge_base)
+                    else:
+                        hash_pairs.add(hash_pair)
+        # With just a single pair, a regular `git merge-base` is going to be the cheapest anyway.
+        if len(hash_pairs) <= 1:
+            return
+
+        tips: List[FullCommitHash] = sorted(set(itertools.chain.from_iterable(hash_pairs)))
+        if len(tips) > MAX_COMMITS_FOR_BATCH_ANCESTRY:
+            return  # pragma: no cover; let's not hit the limits of command line length
+        # `merge-base --octopus` returns a single merge-base of all the commits at once.
+        # Any merge-base of a pair of these commits can NOT be a strict ancestor of the octopus merge-base,
+        # hence it's enough to walk the history until the octopus merge-base (inclusive).
+        octopus_merge_base = self._popen_git("merge-base", "--octopus", *tips, allow_non_zero=True).stdout.strip()
+        if not octopus_merge_base:
+            # No common history of all commits; let's fall back to resolving each pair with a separate `git merge-base`.
+            return
+
+        bit_by_tip: Dict[str, int] = {tip: 1 << index for index, tip in enumerate(tips)}
+        # For each commit, a bitmask of the tips that the commit is reachable from.
+        # Thanks to --topo-order, all children of the given commit are processed before the commit itself.
+        # Commits prefixed with `-` are the boundary commits (the octopus merge-base and its ancestors), listed at the very end.
+        reachable_from: Dict[str, int] = dict(bit_by_tip)
+        # Pair index -> bitmask of the tips in the pair.
+        pair_masks: List[int] = [bit_by_tip[hash1] | bit_by_tip[hash2] for hash1, hash2 in sorted(hash_pairs)]
+        pair_by_mask: Dict[int, Tuple[FullCommitHash, FullCommitHash]] = {
+            bit_by_tip[hash1] | bit_by_tip[hash2]: (hash1, hash2) for hash1, hash2 in hash_pairs}
+        merge_base_by_pair_mask: Dict[int, FullCommitHash] = {}
+        ambiguous_pair_masks: Set[int] = set()
+        # For each commit, a bitmask of the pairs for which a merge-base is a descendant of the commit (or the commit itself).
+        # Once a common ancestor of a pair is NOT a descendant of an already found merge-base,
+        # then we're in a criss-cross history and there's more than one merge-base.
+        stale_pairs: Dict[str, int] = {}
+        # Commits whose tip bitmask may differ from the bitmask of each of their children,
+        # since only at such commits a new pair of tips can meet.
+        merge_points: Set[str] = set(tips)
+
+        output = self._popen_git("rev-list", "--topo-order", "--parents", "--boundary", *tips, "^" + octopus_merge_base).stdout
+        for line in output.splitlines():
+            commit, *parents = line.lstrip("-").split(" ")
+            is_boundary = line.startswith("-")
+            if is_boundary and commit != octopus_merge_base:
+                # Strict ancestors of the octopus merge-base can't be a merge-base of any pair.
+                continue
+            mask = reachable_from.pop(commit, 0)
+            stale = stale_pairs.pop(commit, 0)
+            is_merge_point = commit in merge_points
+            merge_points.discard(commit)
+            if is_merge_point and mask & (mask - 1):  # at least two tips can reach this commit
+                for pair_index, pair_mask in enumerate(pair_masks):
+                    if mask & pair_mask == pair_mask and not stale & (1 << pair_index):
+                        if pair_mask in merge_base_by_pair_mask:
+                            ambiguous_pair_masks.add(pair_mask)
+                        else:
+                            merge_base_by_pair_mask[pair_mask] = FullCommitHash.of(commit)
+                        stale |= 1 << pair_index
+            if is_boundary:
+                continue
+            for parent in parents:
+                parent_mask = reachable_from.get(parent, 0)
+                if parent_mask and parent_mask | mask != parent_mask:
+                    merge_points.add(parent)
+                reachable_from[parent] = parent_mask | mask
+                if stale:
+                    stale_pairs[parent] = stale_pairs.get(parent, 0) | stale
+
+        for pair_mask, merge_base in merge_base_by_pair_mask.items():
+            # We only cache merge-bases that are unique, so that the result is always the same as for `git merge-base`.
+            if pair_mask not in ambiguous_pair_masks:
+                self.__cache_merge_base(*pair_by_mask[pair_mask], merge_base)
 
     # Note: the 'git rev-parse --verify' validation is not performed in case for either of earlier/later
     # if the corresponding prefix is empty AND the revision is a 40 hex digit hash.
@@ -756,6 +1405,77 @@ class GitContext:
             return None
         return self.__get_merge_base_for_commit_hashes(earlier_hash, later_hash)
 
+    def __get_commit_and_tree_hashes(self, *revisions: str) -> List[Tuple[FullCommitHash, FullTreeHash]]:
+        result: List[Tuple[FullCommitHash, FullTreeHash]] = []
+        for line in utils.get_non_empty_lines(self._popen_git("log", "--format=%H %T", *revisions).stdout):
+            commit_hash, tree_hash = line.split(" ")
+            result.append((FullCommitHash(commit_hash), FullTreeHash(tree_hash)))
+        return result
+
+    # Brings the tree hash index of the given upstream up to date, so that it covers all commits reachable from `upstream_hash`
+    # but not from `equivalent_to_hash` (possibly more), and looks up the commits with the given tree in the index.
+    # Returns None if the index can't be used, in which case the caller should resort to scanning the history directly.
+    def __is_equivalent_tree_reachable_via_tree_hash_index(
+            self,
+            equivalent_to_hash: FullCommitHash,
+            equivalent_to_tree_hash: Optional[FullTreeHash],
+            upstream: AnyRevision,
+            upstream_hash: FullCommitHash
+    ) -> Optional[bool]:
+        tree_hash_index = self.__get_tree_hash_index()
+        # Let's only index actual branches (rather than arbitrary commits) to make sure the index gets reused.
+        if not equivalent_to_tree_hash or not tree_hash_index or not tree_hash_index.is_available() or self.is_full_hash(upstream):
+            return None
+
+        new_commit_and_tree_hashes: List[Tuple[FullCommitHash, FullTreeHash]] = []
+        tip_and_boundary = self.__tree_hash_index_tip_and_boundary_cache.get_or_none(upstream)
+        if tip_and_boundary is None:
+            stored_tip_and_boundary = tree_hash_index.get_tip_and_boundary(upstream)
+            # The previously indexed commits might have been garbage-collected in the meantime.
+            if stored_tip_and_boundary and all(self.__find_commit_hash_by_revision(AnyRevision.of(h)) for h in stored_tip_and_boundary):
+                tip_and_boundary = FullCommitHash(stored_tip_and_boundary[0]), FullCommitHash(stored_tip_and_boundary[1])
+                tree_hash_index.mark_used(upstream)
+        if tip_and_boundary is None:
+            boundary = self.get_merge_base(equivalent_to_hash, upstream_hash)
+            if not boundary:
+                return None
+            debug("building tree hash index for %s from %s to %s", upstream, boundary, upstream_hash, subsystem="git")
+            new_commit_and_tree_hashes = self.__get_commit_and_tree_hashes(upstream_hash, "^" + boundary)
+            if not tree_hash_index.update(upstream, upstream_hash, boundary, new_commit_and_tree_hashes, replace=True):
+                return None
+            tip, boundary = upstream_hash, boundary
+        else:
+            tip, boundary = tip_and_boundary
+            # If the index covers all commits reachable from the old tip but not from the boundary,
+            # then to cover all commits reachable from the new tip, it's enough to add the ones not reachable from the old tip
+            # (regardless of whether the upstream has been fast-forwarded or e.g. rebased).
+            if tip != upstream_hash:
+                debug("extending tree hash index for %s from %s to %s", upstream, tip, upstream_hash, subsystem="git")
+                new_commit_and_tree_hashes += self.__get_commit_and_tree_hashes(upstream_hash, "^" + tip, "^" + boundary)
+                tip = upstream_hash
+            # Similarly, the index needs to cover all commits reachable from the upstream but not from equivalent_to;
+            # that's guaranteed once the boundary is an ancestor of equivalent_to.
+            if not self.is_ancestor_or_equal(boundary, equivalent_to_hash):
+                new_boundary = self.get_merge_base(boundary, equivalent_to_hash)
+                if not new_boundary:
+                    return None
+                debug("extending tree hash index for %s back from %s to %s", upstream, boundary, new_boundary, subsystem="git")
+                new_commit_and_tree_hashes += self.__get_commit_and_tree_hashes(boundary, "^" + new_boundary)
+                boundary = new_boundary
+            if (tip, boundary) != tip_and_boundary:
+                if not tree_hash_index.update(upstream, tip, boundary, new_commit_and_tree_hashes):
+                    return None
+        self.__tree_hash_index_tip_and_boundary_cache.put(upstream, (tip, boundary))
+
+        candidate_commit_hashes = tree_hash_index.get_commit_hashes_by_tree_hash(upstream, equivalent_to_tree_hash)
+        if candidate_commit_hashes is None:
+            return None
+        # The index might also contain commits that are no longer reachable from the upstream (e.g. if it's been rebased),
+        # or reachable from both the upstream and equivalent_to; neither of these is relevant.
+        return any(self.is_ancestor_or_equal(AnyRevision.of(commit_hash), upstream_hash) and
+                   not self.is_ancestor_or_equal(AnyRevision.of(commit_hash), equivalent_to_hash)
+                   for commit_hash in candidate_commit_hashes)
+
     # Determine if reachable_from, or any ancestors of reachable_from that are NOT ancestors of equivalent_to,
     # contain a tree with identical contents to equivalent_to, indicating that
     # reachable_from contains a rebase or squash merge of equivalent_to.
@@ -772,30 +1492,52 @@ class GitContext:
         if equivalent_to_commit_hash == reachable_from_commit_hash:
             return True
 
-        if (equivalent_to_commit_hash, reachable_from_commit_hash) in self.__is_equivalent_tree_reachable_cached:
-            return self.__is_equivalent_tree_reachable_cached[equivalent_to_commit_hash, reachable_from_commit_hash]
+        # No commits are reachable from reachable_from but not from equivalent_to (like for a branch that's in sync with its parent).
+        if self.is_ancestor_or_equal(reachable_from_commit_hash, equivalent_to_commit_hash):
+            return False
+
+        return self.__is_equivalent_tree_reachable_cache.get_or_compute(
+            (equivalent_to_commit_hash, reachable_from_commit_hash),
+            lambda hash_pair: self.__find_is_equivalent_tree_reachable(hash_pair, reachable_from))
+
+    def __find_is_equivalent_tree_reachable(self, hash_pair: Tuple[FullCommitHash, FullCommitHash], reachable_from: AnyRevision) -> bool:
+        equivalent_to_commit_hash, reachable_from_commit_hash = hash_pair
+        # Just like the merge-base, the result only depends on the (immutable) commits, so it can be reused across invocations.
+        persistent_cache = self.__get_persistent_cache(EQUIVALENT_TREE_REACHABLE_CACHE_NAME)
+        persisted_result = persistent_cache.get(equivalent_to_commit_hash + reachable_from_commit_hash) if persistent_cache else None
+        if persisted_result is not None:
+            result = persisted_result == "1"
+            debug("result = %s (from persistent cache)", result, subsystem="git")
+            return result
 
         earlier_tree_hash = self.get_tree_hash_by_commit_hash(equivalent_to_commit_hash)
 
-        # `git log ^equivalent_to_commit_hash reachable_from_commit_hash`
-        # shows all commits reachable from reachable_from_commit_hash but NOT from equivalent_to_commit_hash
-        intermediate_tree_hashes = utils.get_non_empty_lines(
-            self._popen_git(
-                "log",
-                "--format=%T",  # full commit's tree hash
-                "^" + equivalent_to_commit_hash,
-                reachable_from_commit_hash
-            ).stdout
-        )
-
-        result = earlier_tree_hash in intermediate_tree_hashes
-        debug(f"result = {result}")
-        self.__is_equivalent_tree_reachable_cached[equivalent_to_commit_hash, reachable_from_commit_hash] = result
+        # The index for the given upstream is brought up to date on lookup, so lookups can't run concurrently.
+        with self.__tree_hash_index_lock:
+            result_from_tree_hash_index = self.__is_equivalent_tree_reachable_via_tree_hash_index(
+                equivalent_to_commit_hash, earlier_tree_hash, reachable_from, reachable_from_commit_hash)
+        if result_from_tree_hash_index is not None:
+            result = result_from_tree_hash_index
+        else:
+            # `git log ^equivalent_to_commit_hash reachable_from_commit_hash`
+            # shows all commits reachable from reachable_from_commit_hash but NOT from equivalent_to_commit_hash
+            intermediate_tree_hashes = utils.get_non_empty_lines(
+                self._popen_git(
+                    "log",
+                    "--format=%T",  # full commit's tree hash
+                    "^" + equivalent_to_commit_hash,
+                    reachable_from_commit_hash
+                ).stdout
+            )
+
+            result = earlier_tree_hash in intermediate_tree_hashes
+        debug("result = %s", result, subsystem="git")
+        if persistent_cache:
+            persistent_cache.put(equivalent_to_commit_hash + reachable_from_commit_hash, "1" if result else "0")
         return result
 
     def get_sole_remote_branch(self, branch: LocalBranchShortName) -> Optional[RemoteBranchShortName]:
-        remote_branches = self.get_remote_branches()
-        matching_remotes = [remote for remote in self.get_remotes() if (remote + "/" + branch) in remote_branches]
+        matching_remotes = self.__get_remotes_containing_branch(branch)
         return RemoteBranchShortName(matching_remotes[0] + "/" + branch) if len(matching_remotes) == 1 else None
 
     def get_merged_local_branches(self) -> List[LocalBranchShortName]:
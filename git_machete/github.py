@@ -1,15 +1,9 @@
-import http
-import json
 import os
 import re
 import shutil
-import urllib.error
-# Deliberately NOT using much more convenient `requests` to avoid external dependencies in production code
-import urllib.request
-from pathlib import Path
 from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
-from git_machete import git_config_keys
+from git_machete import git_config_keys, tracing
 
 from .exceptions import MacheteException, UnprocessableEntityHTTPError
 from .git_operations import GitContext, LocalBranchShortName
@@ -87,7 +81,7 @@ class GitHubToken(NamedTuple):
 
     @classmethod
     def __get_token_from_env(cls) -> Optional["GitHubToken"]:
-        debug(f"1. Trying to authenticate via `{GITHUB_TOKEN_ENV_VAR}` environment variable...")
+        debug("1. Trying to authenticate via `%s` environment variable...", GITHUB_TOKEN_ENV_VAR, subsystem="github")
         github_token = os.environ.get(GITHUB_TOKEN_ENV_VAR)
         if github_token:
             return cls(value=github_token,
@@ -96,7 +90,7 @@ class GitHubToken(NamedTuple):
 
     @classmethod
     def __get_token_from_file_in_home_directory(cls, domain: str) -> Optional["GitHubToken"]:
-        debug("2. Trying to authenticate via `~/.github-token`...")
+        debug("2. Trying to authenticate via `~/.github-token`...", subsystem="github")
         required_file_name = '.github-token'
         provider = f'auth token for {domain} from `~/.github-token`'
         file_full_path = os.path.expanduser(f'~/{required_file_name}')
@@ -119,13 +113,13 @@ class GitHubToken(NamedTuple):
 
     @classmethod
     def __get_token_from_gh(cls, domain: str) -> Optional["GitHubToken"]:
-        debug("3. Trying to authenticate via `gh` GitHub CLI...")
+        debug("3. Trying to authenticate via `gh` GitHub CLI...", subsystem="github")
         # Abort without error if `gh` isn't available
         gh = shutil.which('gh')
         if not gh:
             return None
 
-        gh_version_returncode, gh_version_stdout, _ = popen_cmd(gh, "--version")
+        gh_version_returncode, gh_version_stdout, _ = popen_cmd(gh, "--version", debug_subsystem="github")
         if gh_version_returncode != 0:
             return None
 
@@ -141,14 +135,14 @@ class GitHubToken(NamedTuple):
 
         if gh_version and gh_version >= (2, 17, 0):
             gh_token_returncode, gh_token_stdout, _ = \
-                popen_cmd(gh, "auth", "token", "--hostname", domain, hide_debug_output=True)
+                popen_cmd(gh, "auth", "token", "--hostname", domain, hide_debug_output=True, debug_subsystem="github")
             if gh_token_returncode != 0:
                 return None
             if gh_token_stdout:
                 return cls(value=gh_token_stdout.strip(), provider=f'auth token for {domain} from `gh` GitHub CLI')
         else:
             gh_token_returncode, _, gh_token_stderr = \
-                popen_cmd(gh, "auth", "status", "--hostname", domain, "--show-token", hide_debug_output=True)
+                popen_cmd(gh, "auth", "status", "--hostname", domain, "--show-token", hide_debug_output=True, debug_subsystem="github")
             if gh_token_returncode != 0:
                 return None
 
@@ -169,8 +163,8 @@ class GitHubToken(NamedTuple):
 
     @classmethod
     def __get_token_from_hub(cls, domain: str) -> Optional["GitHubToken"]:
-        debug("4. Trying to authenticate via `hub` GitHub CLI...")
-        home_path: str = str(Path.home())
+        debug("4. Trying to authenticate via `hub` GitHub CLI...", subsystem="github")
+        home_path: str = os.path.expanduser("~")
         config_hub_path: str = os.path.join(home_path, ".config", "hub")
         if os.path.isfile(config_hub_path):
             with open(config_hub_path) as config_hub:
@@ -226,11 +220,28 @@ class GitHubClient:
     def repository(self) -> str:
         return self.__repository
 
+    # Note that neither the headers (which include the token) nor the bodies of the requests are recorded.
+    @staticmethod
+    def __record_trace_event(method: str, url: str, start_timestamp: int, status: int, response_bytes: Optional[int]) -> None:
+        if tracing.is_enabled():
+            trace_args: Dict[str, Any] = {"method": method.upper(), "url": url, "status": status}
+            if response_bytes is not None:
+                trace_args["response_bytes"] = response_bytes
+            tracing.record("http", f"{method.upper()} {url}", start_timestamp, trace_args)
+
     def __fire_github_api_request(self,
                                   method: str,
                                   path: str,
                                   request_body: Optional[Dict[str, Any]] = None
                                   ) -> Any:
+        # urllib.request (and what it pulls in, like http.client and ssl) takes a noticeable time to import,
+        # so it's only imported once a request is actually fired.
+        # Deliberately NOT using much more convenient `requests` to avoid external dependencies in production code
+        import http
+        import json
+        import urllib.error
+        import urllib.request
+
         headers: Dict[str, str] = {
             'Content-type': 'application/json',
             'User-Agent': 'git-machete',
@@ -247,12 +258,15 @@ class GitHubClient:
         url = url_prefix + path
         json_body: Optional[str] = json.dumps(request_body) if request_body else None
         http_request = urllib.request.Request(url, headers=headers, data=json_body.encode() if json_body else None, method=method.upper())
-        debug(f'firing a {method} request to {url} with {"a" if self.__token else "no"} '
-              f'bearer token and request body {json_body or "<none>"}')
+        debug('firing a %s request to %s with %s bearer token and request body %s',
+              method, url, "a" if self.__token else "no", json_body or "<none>", subsystem="github")
 
+        start_timestamp = tracing.get_timestamp() if tracing.is_enabled() else 0
         try:
             with urllib.request.urlopen(http_request) as response:
-                parsed_response_body: Any = json.loads(response.read().decode())
+                response_body: bytes = response.read()
+                self.__record_trace_event(method, url, start_timestamp, response.getcode(), len(response_body))
+                parsed_response_body: Any = json.loads(response_body.decode())
                 # https://docs.github.com/en/rest/guides/using-pagination-in-the-rest-api?apiVersion=2022-11-28#using-link-headers
                 link_header: str = response.info()["link"]
                 if link_header:
@@ -260,10 +274,11 @@ class GitHubClient:
                     match = re.search(f'<{url_prefix_regex}(/[^>]+)>; rel="next"', link_header)
                     if match:  # pragma: no branch; there should always be a match
                         next_page_path = match.group(1)
-                        debug(f'there is more data to retrieve under {next_page_path}')
+                        debug('there is more data to retrieve under %s', next_page_path, subsystem="github")
                         return parsed_response_body + self.__fire_github_api_request(method, next_page_path, request_body)
                 return parsed_response_body
         except urllib.error.HTTPError as err:
+            self.__record_trace_event(method, url, start_timestamp, err.code, None)
             if err.code == http.HTTPStatus.UNPROCESSABLE_ENTITY:
                 error_response = json.loads(err.read().decode())
                 error_reason: str = self.__extract_failure_info_from_422(error_response)
@@ -0,0 +1,172 @@
+import sys
+from abc import ABC, abstractmethod
+from typing import (Any, Callable, Dict, Generic, List, NamedTuple, Optional,
+                    Set, TypeVar)
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+_MISSING: Any = object()
+
+
+class CacheStats(NamedTuple):
+    name: str
+    hits: int
+    misses: int
+    evictions: int
+    flushes: int
+    # None if unknown, like for the persistent caches (whose entries are stored outside of the process).
+    entries: Optional[int]
+    approximate_bytes: Optional[int]
+
+
+# Counters of a cache. Note that the counters are not updated atomically, so they might be slightly off
+# when the cache is accessed from multiple threads at once (see `git machete status --jobs`).
+class _CacheWithStats(ABC):
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+        self.eviction_count: int = 0
+        self.flush_count: int = 0
+
+    @abstractmethod
+    def _get_entry_count(self) -> int:
+        pass
+
+    @abstractmethod
+    def _get_contents(self) -> Any:
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        pass
+
+    def get_stats(self) -> CacheStats:
+        contents = self._get_contents()
+        return CacheStats(name=self.name, hits=self.hit_count, misses=self.miss_count,
+                          evictions=self.eviction_count, flushes=self.flush_count,
+                          entries=self._get_entry_count(), approximate_bytes=get_approximate_size(contents) if contents is not None else 0)
+
+
+# Results of a computation by key, kept for the lifetime of the process or until flushed
+# (e.g. when git machete itself runs a git command that could change the results, see `GitContext.flush_caches`).
+# The values are computed without locking, as the result is the same no matter which thread computes it first.
+class MemoryCache(_CacheWithStats, Generic[K, V]):
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__values: Dict[K, V] = {}
+
+    def _get_entry_count(self) -> int:
+        return len(self.__values)
+
+    def _get_contents(self) -> Any:
+        return self.__values
+
+    def get_or_compute(self, key: K, compute: Callable[[K], V]) -> V:
+        value = self.__values.get(key, _MISSING)
+        if value is _MISSING:
+            self.miss_count += 1
+            value = self.__values[key] = compute(key)
+        else:
+            self.hit_count += 1
+        return value
+
+    # Unlike `get_or_compute`, leaves it up to the caller to compute (and `put`) the value on a miss.
+    def get_or_none(self, key: K) -> Optional[V]:
+        value = self.__values.get(key, _MISSING)
+        if value is _MISSING:
+            self.miss_count += 1
+            return None
+        self.hit_count += 1
+        return value
+
+    # Doesn't count as a hit or miss.
+    def __contains__(self, key: K) -> bool:
+        return key in self.__values
+
+    def put(self, key: K, value: V) -> None:
+        self.__values[key] = value
+
+    def flush(self) -> None:
+        self.flush_count += 1
+        self.eviction_count += len(self.__values)
+        self.__values = {}
+
+
+# A single value (like the list of all local branches), loaded on first access by just one thread while the others wait.
+class MemoryCachedValue(_CacheWithStats, Generic[V]):
+
+    def __init__(self, name: str, lock: Any) -> None:
+        super().__init__(name)
+        self.__lock = lock
+        self.__value: Optional[V] = None
+
+    def _get_entry_count(self) -> int:
+        return 1 if self.__value is not None else 0
+
+    def _get_contents(self) -> Any:
+        return self.__value
+
+    def get_or_load(self, load: Callable[[], V]) -> V:
+        value = self.__value
+        if value is None:
+            with self.__lock:
+                value = self.__value
+                if value is None:
+                    self.miss_count += 1
+                    value = self.__value = load()
+                    return value
+        self.hit_count += 1
+        return value
+
+    # Doesn't count as a hit or miss.
+    def get_if_loaded_or_none(self) -> Optional[V]:
+        return self.__value
+
+    def set(self, value: V) -> None:
+        self.__value = value
+
+    def flush(self) -> None:
+        self.flush_count += 1
+        if self.__value is not None:
+            self.eviction_count += 1
+        self.__value = None
+
+
+# Size of the object along with everything it (recursively) contains, counting each object just once.
+def get_approximate_size(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(get_approximate_size(k, seen) + get_approximate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(get_approximate_size(item, seen) for item in obj)
+    return size
+
+
+def format_cache_stats(stats: List[CacheStats]) -> str:
+    def format_bytes(byte_count: Optional[int]) -> str:
+        if byte_count is None:
+            return "-"
+        if byte_count < 1024:
+            return f"{byte_count} B"
+        if byte_count < 1024 * 1024:
+            return f"{byte_count / 1024:.1f} KiB"
+        return f"{byte_count / 1024 / 1024:.1f} MiB"
+
+    name_width = max([len("cache")] + [len(s.name) for s in stats])
+    lines = [f"{'cache':<{name_width}}  {'hits':>8}  {'misses':>8}  {'hit rate':>8}  {'evictions':>9}  {'flushes':>7}  "
+             f"{'entries':>7}  {'size':>10}"]
+    for s in stats:
+        lookups = s.hits + s.misses
+        hit_rate = f"{100 * s.hits / lookups:.0f}%" if lookups else "-"
+        entries = str(s.entries) if s.entries is not None else "-"
+        lines.append(f"{s.name:<{name_width}}  {s.hits:>8}  {s.misses:>8}  {hit_rate:>8}  {s.evictions:>9}  {s.flushes:>7}  "
+                     f"{entries:>7}  {format_bytes(s.approximate_bytes):>10}")
+    return "\n".join(lines)
@@ -18,6 +18,7 @@ class CommandLineOptions:
         self.opt_fetch: bool = False
         self.opt_fork_point: Optional[AnyRevision] = None
         self.opt_inferred: bool = False
+        self.opt_jobs: Optional[int] = None
         self.opt_list_commits: bool = False
         self.opt_list_commits_with_hashes: bool = False
         self.opt_merge: bool = False
@@ -35,6 +36,7 @@ class CommandLineOptions:
         self.opt_roots: List[LocalBranchShortName] = list()
         self.opt_start_from: str = "here"
         self.opt_stat: bool = False
+        self.opt_stats: bool = False
         self.opt_sync_github_prs: bool = False
         self.opt_unset_override: bool = False
         self.opt_verbose: bool = False
@@ -0,0 +1,306 @@
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .memory_cache import CacheStats
+from .utils import debug
+
+PERSISTENT_CACHE_DIR_NAME = "machete-cache"
+MERGE_BASE_CACHE_NAME = "merge-base"
+EQUIVALENT_TREE_REACHABLE_CACHE_NAME = "equivalent-tree-reachable"
+TREE_HASH_INDEX_NAME = "tree-hash-index"
+GIT_VERSION_CACHE_NAME = "git-version"
+
+
+def _connect_or_none(path: str, *schema_statements: str) -> Optional[Any]:
+    try:
+        # Imported lazily, as some (rare) builds of Python come without sqlite3.
+        import sqlite3
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The connection might be used from a thread other than the one that opened it (see `git machete status --jobs`);
+        # access is serialized by the callers.
+        connection = sqlite3.connect(path, timeout=1.0, check_same_thread=False)
+        for statement in schema_statements:
+            connection.execute(statement)
+        connection.commit()
+        return connection
+    except Exception as e:
+        debug("cannot open persistent cache at %s: %s", path, e, subsystem="git")
+        return None
+
+
+# A string-to-string map persisted in an sqlite database under the git directory,
+# meant for the results of computations that depend solely on immutable inputs (like commit hashes),
+# and hence never go stale. The number of entries is capped, least recently used entries are evicted first.
+# Any problem with the database (missing sqlite3 module, read-only or corrupted file, lock contention with another process)
+# results in the cache behaving as if it was empty, rather than in a failure of the command.
+class PersistentCache:
+
+    def __init__(self, path: str, max_entry_count: int) -> None:
+        self.__path = path
+        self.__max_entry_count = max_entry_count
+        self.__connection: Optional[Any] = None
+        self.__is_connection_attempted: bool = False
+        self.__is_disabled: bool = False
+        self.__values_to_store: Dict[str, str] = {}
+        self.__keys_used: Set[str] = set()
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+        self.eviction_count: int = 0
+        self.flush_count: int = 0
+        self.__lock = threading.RLock()
+
+    # The entries are stored outside of the process, so neither their count nor their size is known.
+    def get_stats(self, name: str) -> CacheStats:
+        return CacheStats(name=name, hits=self.hit_count, misses=self.miss_count, evictions=self.eviction_count,
+                          flushes=self.flush_count, entries=None, approximate_bytes=None)
+
+    def __get_connection(self) -> Optional[Any]:
+        if not self.__is_connection_attempted and not self.__is_disabled:
+            self.__is_connection_attempted = True
+            self.__connection = _connect_or_none(
+                self.__path,
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used INTEGER NOT NULL)",
+                "CREATE INDEX IF NOT EXISTS entries_by_last_used ON entries (last_used)")
+        return self.__connection
+
+    def __disable(self, e: Exception) -> None:
+        debug("disabling persistent cache at %s: %s", self.__path, e, subsystem="git")
+        self.close()
+        self.__is_disabled = True
+
+    def get(self, key: str) -> Optional[str]:
+        with self.__lock:
+            return self.__get(key)
+
+    def __get(self, key: str) -> Optional[str]:
+        value: Optional[str] = self.__values_to_store.get(key)
+        if value is None:
+            connection = self.__get_connection()
+            if connection is not None:
+                try:
+                    row = connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                    value = row[0] if row else None
+                except Exception as e:
+                    self.__disable(e)
+        if value is None:
+            self.miss_count += 1
+        else:
+            self.hit_count += 1
+            self.__keys_used.add(key)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        with self.__lock:
+            self.__values_to_store[key] = value
+
+    # All the writes are batched into a single transaction.
+    def flush(self) -> None:
+        with self.__lock:
+            self.__flush()
+
+    def __flush(self) -> None:
+        debug("persistent cache at %s: %s hit(s), %s miss(es)", self.__path, self.hit_count, self.miss_count, subsystem="git")
+        if not self.__values_to_store and not self.__keys_used:
+            return
+        connection = self.__get_connection()
+        if connection is None:
+            return
+        now = int(time.time())
+        try:
+            connection.executemany("INSERT OR REPLACE INTO entries (key, value, last_used) VALUES (?, ?, ?)",
+                                   [(key, value, now) for key, value in self.__values_to_store.items()])
+            connection.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                   [(now, key) for key in self.__keys_used if key not in self.__values_to_store])
+            entry_count: int = connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            evicted_entry_count = max(entry_count - self.__max_entry_count, 0)
+            if evicted_entry_count:
+                connection.execute("DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_used LIMIT ?)",
+                                   (evicted_entry_count,))
+            connection.commit()
+            self.eviction_count += evicted_entry_count
+            self.flush_count += 1
+            debug("stored %s new entries in persistent cache at %s, evicted %s",
+                  len(self.__values_to_store), self.__path, evicted_entry_count, subsystem="git")
+        except Exception as e:
+            self.__disable(e)
+        self.__values_to_store = {}
+        self.__keys_used = set()
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__connection is not None:
+                try:
+                    self.__connection.close()
+                except Exception:  # pragma: no cover
+                    pass
+                self.__connection = None
+            self.__is_connection_attempted = False
+            self.__values_to_store = {}
+            self.__keys_used = set()
+
+    @staticmethod
+    def clear_all(cache_dir: str) -> None:
+        if os.path.isdir(cache_dir):
+            shutil.rmtree(cache_dir)
+
+
+# For each indexed upstream branch, a mapping of tree hash -> commit hashes
+# for all commits reachable from the indexed tip of the upstream, but not from the boundary commit.
+# Unlike with PersistentCache, the entries DO go stale once the upstream branch is moved,
+# so the index is meant to be brought up to date (via walking just the new commits) by the caller before each lookup.
+# When the total number of entries exceeds the cap, the least recently used upstreams are dropped from the index as a whole.
+# Not thread-safe: since the lookups involve updating the index, the callers need to serialize them anyway.
+class PersistentTreeHashIndex:
+
+    def __init__(self, path: str, max_entry_count: int) -> None:
+        self.__path = path
+        self.__max_entry_count = max_entry_count
+        self.__connection: Optional[Any] = None
+        self.__is_connection_attempted: bool = False
+        self.__is_disabled: bool = False
+
+    def __get_connection(self) -> Optional[Any]:
+        if not self.__is_connection_attempted and not self.__is_disabled:
+            self.__is_connection_attempted = True
+            self.__connection = _connect_or_none(
+                self.__path,
+                "CREATE TABLE IF NOT EXISTS upstreams "
+                "(upstream TEXT PRIMARY KEY, tip TEXT NOT NULL, boundary TEXT NOT NULL, last_used INTEGER NOT NULL)",
+                "CREATE TABLE IF NOT EXISTS trees (upstream TEXT NOT NULL, tree TEXT NOT NULL, commit_hash TEXT NOT NULL)",
+                "CREATE INDEX IF NOT EXISTS trees_by_upstream_and_tree ON trees (upstream, tree)")
+        return self.__connection
+
+    def __disable(self, e: Exception) -> None:
+        debug("disabling persistent tree hash index at %s: %s", self.__path, e, subsystem="git")
+        self.close()
+        self.__is_disabled = True
+
+    def is_available(self) -> bool:
+        return self.__get_connection() is not None
+
+    # Returns the tip and the boundary commit of the index for the given upstream, if any.
+    def get_tip_and_boundary(self, upstream: str) -> Optional[Tuple[str, str]]:
+        connection = self.__get_connection()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute("SELECT tip, boundary FROM upstreams WHERE upstream = ?", (upstream,)).fetchone()
+            return (row[0], row[1]) if row else None
+        except Exception as e:
+            self.__disable(e)
+            return None
+
+    def mark_used(self, upstream: str) -> None:
+        connection = self.__get_connection()
+        if connection is None:
+            return
+        try:
+            connection.execute("UPDATE upstreams SET last_used = ? WHERE upstream = ?", (int(time.time()), upstream))
+            connection.commit()
+        except Exception as e:
+            self.__disable(e)
+
+    # Returns False if the index could not be updated, in which case it should no longer be relied upon.
+    def update(self, upstream: str, tip: str, boundary: str,
+               new_commit_and_tree_hashes: Iterable[Tuple[str, str]], replace: bool = False) -> bool:
+        connection = self.__get_connection()
+        if connection is None:
+            return False
+        try:
+            if replace:
+                connection.execute("DELETE FROM trees WHERE upstream = ?", (upstream,))
+            connection.executemany("INSERT INTO trees (upstream, tree, commit_hash) VALUES (?, ?, ?)",
+                                   ((upstream, tree_hash, commit_hash) for commit_hash, tree_hash in new_commit_and_tree_hashes))
+            connection.execute("INSERT OR REPLACE INTO upstreams (upstream, tip, boundary, last_used) VALUES (?, ?, ?, ?)",
+                               (upstream, tip, boundary, int(time.time())))
+            self.__evict_least_recently_used_upstreams(connection, current_upstream=upstream)
+            connection.commit()
+            return True
+        except Exception as e:
+            self.__disable(e)
+            return False
+
+    def __evict_least_recently_used_upstreams(self, connection: Any, current_upstream: str) -> None:
+        entry_count: int = connection.execute("SELECT COUNT(*) FROM trees").fetchone()[0]
+        if entry_count <= self.__max_entry_count:
+            return
+        entry_count_by_upstream = connection.execute(
+            "SELECT upstreams.upstream, COUNT(trees.tree) FROM upstreams LEFT JOIN trees ON upstreams.upstream = trees.upstream "
+            "WHERE upstreams.upstream != ? GROUP BY upstreams.upstream ORDER BY upstreams.last_used", (current_upstream,)).fetchall()
+        for upstream, upstream_entry_count in entry_count_by_upstream:
+            if entry_count <= self.__max_entry_count:
+                break
+            debug("evicting %s entries for %s from persistent tree hash index at %s",
+                  upstream_entry_count, upstream, self.__path, subsystem="git")
+            connection.execute("DELETE FROM trees WHERE upstream = ?", (upstream,))
+            connection.execute("DELETE FROM upstreams WHERE upstream = ?", (upstream,))
+            entry_count -= upstream_entry_count
+
+    def get_commit_hashes_by_tree_hash(self, upstream: str, tree_hash: str) -> Optional[List[str]]:
+        connection = self.__get_connection()
+        if connection is None:
+            return None
+        try:
+            rows = connection.execute("SELECT commit_hash FROM trees WHERE upstream = ? AND tree = ?", (upstream, tree_hash)).fetchall()
+            return [row[0] for row in rows]
+        except Exception as e:
+            self.__disable(e)
+            return None
+
+    def close(self) -> None:
+        if self.__connection is not None:
+            try:
+                self.__connection.close()
+            except Exception:  # pragma: no cover
+                pass
+            self.__connection = None
+        self.__is_connection_attempted = False
+
+
+# The version of the git executable, valid for as long as the executable under the given path isn't modified (e.g. upgraded),
+# which saves spawning `git version` in each run. Kept in a plain text file with a single line `<version> <mtime> <size> <path>`,
+# since unlike with the other caches, loading sqlite3 would take longer than the lookup itself.
+class PersistentGitVersionCache:
+
+    def __init__(self, path: str) -> None:
+        self.__path = path
+
+    @staticmethod
+    def __get_key_or_none(git_executable_path: str) -> Optional[str]:
+        try:
+            stat = os.stat(git_executable_path)
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns} {stat.st_size} {git_executable_path}"
+
+    def get(self, git_executable_path: str) -> Optional[Tuple[int, int, int]]:
+        key = self.__get_key_or_none(git_executable_path)
+        if key is None:
+            return None
+        try:
+            with open(self.__path) as file:
+                version, _, cached_key = file.read().rstrip("\n").partition(" ")
+            if cached_key != key:
+                return None
+            major, minor, patch = map(int, version.split("."))
+            return major, minor, patch
+        except (OSError, ValueError) as e:
+            debug("cannot read git version from %s: %s", self.__path, e, subsystem="git")
+            return None
+
+    def put(self, git_executable_path: str, version: Tuple[int, int, int]) -> None:
+        key = self.__get_key_or_none(git_executable_path)
+        if key is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.__path), exist_ok=True)
+            # Written to a temporary file first, so that the concurrently running processes never read a partially written one.
+            temporary_path = f"{self.__path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w") as file:
+                file.write(f"{'.'.join(map(str, version))} {key}\n")
+            os.replace(temporary_path, self.__path)
+        except OSError as e:
+            debug("cannot store git version in %s: %s", self.__path, e, subsystem="git")
@@ -0,0 +1,100 @@
+import os
+import sys
+from typing import Callable, List, Optional
+
+# Profiles the command, when enabled with `--profile[=cpu|mem]` or `GIT_MACHETE_PROFILE=cpu|mem`:
+# either where the CPU time went (with cProfile, the full profile is also saved in pstats format),
+# or where the memory got allocated (with tracemalloc).
+# The summary is printed to stderr, so that it doesn't get mixed with the output of the command.
+
+PROFILE_ENV_VAR = "GIT_MACHETE_PROFILE"
+PROFILE_MODES = ("cpu", "mem")
+
+TOP_ENTRY_COUNT = 30
+
+# cProfile only profiles the thread it's been enabled in, hence the operations otherwise executed concurrently
+# (see `utils.map_concurrently`) are executed sequentially in the main thread while CPU profiling is enabled.
+is_cpu_profiling_enabled: bool = False
+
+
+# `--profile` can't be defined via argparse with an optional value, as the value would swallow the command that follows.
+# Hence, `--profile` (with the mode either omitted or passed as a separate argument, like in `--profile mem status`)
+# is rewritten to `--profile=<mode>` before parsing.
+def normalize_args(args: List[str]) -> List[str]:
+    normalized_args: List[str] = []
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        if arg == "--":
+            return normalized_args + args[index:]
+        if arg != "--profile":
+            normalized_args.append(arg)
+        elif index + 1 < len(args) and args[index + 1] in PROFILE_MODES:
+            normalized_args.append(f"--profile={args[index + 1]}")
+            index += 1
+        else:
+            normalized_args.append("--profile=cpu")
+        index += 1
+    return normalized_args
+
+
+def get_mode_or_none(args: List[str]) -> Optional[str]:
+    for arg in normalize_args(args):
+        if arg == "--":
+            break
+        if arg.startswith("--profile="):
+            mode = arg[len("--profile="):]
+            # An invalid mode is reported by the argument parser.
+            return mode if mode in PROFILE_MODES else None
+    return os.environ.get(PROFILE_ENV_VAR) or None
+
+
+def run_profiled(mode: str, func: Callable[[], None]) -> None:
+    if mode == "cpu":
+        _run_with_cpu_profile(func)
+    else:
+        _run_with_memory_profile(func)
+
+
+def _run_with_cpu_profile(func: Callable[[], None]) -> None:
+    global is_cpu_profiling_enabled
+    # Imported lazily, as profiling is rarely enabled.
+    import cProfile
+    import pstats
+    import tempfile
+
+    profiler = cProfile.Profile()
+    is_cpu_profiling_enabled = True
+    try:
+        profiler.runcall(func)
+    finally:
+        is_cpu_profiling_enabled = False
+        stats_file_path = os.path.join(tempfile.gettempdir(), f"git-machete-{os.getpid()}.prof")
+        print(f"\nTop {TOP_ENTRY_COUNT} functions by cumulative time:", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(TOP_ENTRY_COUNT)
+        profiler.dump_stats(stats_file_path)
+        print(f"Full profile saved to {stats_file_path}, inspect it with e.g. `python -m pstats {stats_file_path}`", file=sys.stderr)
+
+
+def _run_with_memory_profile(func: Callable[[], None]) -> None:
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        func()
+    finally:
+        current_size, peak_size = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        tracemalloc.stop()
+        print(f"\nPeak allocated memory: {_format_bytes(peak_size)}, allocated at the end: {_format_bytes(current_size)}",
+              file=sys.stderr)
+        print(f"Top {TOP_ENTRY_COUNT} allocation sites of the memory allocated at the end:", file=sys.stderr)
+        for stat in snapshot.statistics("lineno")[:TOP_ENTRY_COUNT]:
+            frame = stat.traceback[0]
+            print(f"{_format_bytes(stat.size):>10}  {stat.count:>8} blocks  {frame.filename}:{frame.lineno}", file=sys.stderr)
+
+
+def _format_bytes(byte_count: int) -> str:
+    if byte_count < 1024 * 1024:
+        return f"{byte_count / 1024:.1f} KiB"
+    return f"{byte_count / 1024 / 1024:.1f} MiB"
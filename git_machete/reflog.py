@@ -0,0 +1,63 @@
+import mmap
+import os
+from typing import Iterator, List, Optional, Tuple
+
+from .utils import debug
+
+# See https://git-scm.com/docs/git-update-ref#_logging_updates for the description of the file format.
+# Each line is: <old hash> SP <new hash> SP <committer> SP <timestamp> SP <time zone> [TAB <message>] LF
+# with the entries appended in chronological order.
+
+
+class ReflogException(Exception):
+    pass
+
+
+# (new hash, subject), just like `git reflog show --format='%H %gs'` would print them.
+ReflogFileEntry = Tuple[str, str]
+
+
+def _iterate_lines_backwards(data: "mmap.mmap") -> Iterator[bytes]:
+    end = len(data)
+    while end > 0:
+        start = data.rfind(b"\n", 0, end - 1) + 1
+        yield data[start:end]
+        end = start
+
+
+def _parse_line(line: bytes) -> Optional[ReflogFileEntry]:
+    line = line.rstrip(b"\n")
+    if not line:
+        return None
+    header, _, message = line.partition(b"\t")
+    header_parts = header.split(b" ", 2)
+    if len(header_parts) != 3 or len(header_parts[1]) not in (40, 64):
+        raise ReflogException(f"malformed entry: {line!r}")
+    new_hash = header_parts[1].decode("ascii")
+    if new_hash.strip("0") == "":
+        # Just like `git reflog show`, let's skip the entries that correspond to deletion of the ref.
+        return None
+    return new_hash, message.decode("utf-8", errors="replace")
+
+
+# Returns the entries of the reflog at the given path from the latest to the earliest,
+# an empty list if there is no reflog, and None if the file can't be read or parsed.
+# The file is memory-mapped and scanned from the end, so that the latest entries (the ones usually needed) come first
+# without the need to split the entire file into lines upfront.
+def read_reflog_file_or_none(path: str) -> Optional[List[ReflogFileEntry]]:
+    try:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return []  # mmap can't map an empty file
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                result: List[ReflogFileEntry] = []
+                for line in _iterate_lines_backwards(data):
+                    entry = _parse_line(line)
+                    if entry:
+                        result.append(entry)
+                return result
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError, ReflogException) as e:
+        debug("reflog at %s could not be read: %s", path, e, subsystem="git")
+        return None
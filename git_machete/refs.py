@@ -0,0 +1,212 @@
+import mmap
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .utils import debug
+
+# See https://git-scm.com/docs/gitrepository-layout (`refs` and `packed-refs`) for the description of the files backend.
+PACKED_REFS_HEADER_PREFIX = b"# pack-refs with:"
+PACKED_REFS_TRAIT_SORTED = b"sorted"
+SYMREF_PREFIX = "ref: "
+SYMREF_MAX_DEPTH = 5  # just like in git itself
+
+
+class RefsException(Exception):
+    pass
+
+
+# The `packed-refs` file consists of lines `<hash> SP <ref name> LF`, optionally followed by `^<peeled hash> LF` for annotated tags.
+# If the header declares the file as sorted (which is the case for all versions of git since 2.15),
+# the refs under the given prefix can be found with a binary search, without reading the entire file.
+class _PackedRefs:
+
+    def __init__(self, data: Optional["mmap.mmap"]) -> None:
+        self.__data = data
+        self.__is_sorted = False
+        self.__records_offset = 0
+        if data is not None and data[:len(PACKED_REFS_HEADER_PREFIX)] == PACKED_REFS_HEADER_PREFIX:
+            header_end = data.find(b"\n")
+            header_end = len(data) if header_end == -1 else header_end + 1
+            self.__is_sorted = PACKED_REFS_TRAIT_SORTED in data[len(PACKED_REFS_HEADER_PREFIX):header_end].split()
+            self.__records_offset = header_end
+
+    @staticmethod
+    def load(path: str) -> "_PackedRefs":
+        try:
+            with open(path, "rb") as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    return _PackedRefs(None)  # mmap can't map an empty file
+                # The mapping remains valid after the file is closed.
+                return _PackedRefs(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError:
+            return _PackedRefs(None)
+
+    def close(self) -> None:
+        if self.__data is not None:
+            self.__data.close()
+
+    def __get_line_end(self, line_start: int) -> int:
+        assert self.__data is not None
+        line_end = self.__data.find(b"\n", line_start)
+        return len(self.__data) if line_end == -1 else line_end
+
+    def __parse_record(self, line_start: int) -> Tuple[bytes, bytes, int]:
+        assert self.__data is not None
+        line_end = self.__get_line_end(line_start)
+        hash_and_name = self.__data[line_start:line_end].split(b" ", 1)
+        if len(hash_and_name) != 2 or len(hash_and_name[0]) not in (40, 64):
+            raise RefsException(f"malformed packed-refs line: {self.__data[line_start:line_end]!r}")
+        record_end = line_end + 1
+        # Skip the peeled hash (if any).
+        if self.__data[record_end:record_end + 1] == b"^":
+            record_end = self.__get_line_end(record_end) + 1
+        return hash_and_name[1], hash_and_name[0], record_end
+
+    def __find_first_record_at_or_after(self, ref_name_prefix: bytes) -> int:
+        assert self.__data is not None
+        if not self.__is_sorted:
+            return self.__records_offset
+        # Invariant: `lo` and `hi` are both record starts (or the end of file),
+        # all records before `lo` have names lower than the prefix, and the record at `hi` (if any) has a name not lower than the prefix.
+        lo, hi = self.__records_offset, len(self.__data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            line_start = max(self.__data.rfind(b"\n", 0, mid) + 1, lo)
+            if self.__data[line_start:line_start + 1] == b"^":
+                # A peeled hash line, the record starts at the preceding line (which can't precede `lo`).
+                line_start = self.__data.rfind(b"\n", 0, line_start - 1) + 1
+            name, _, record_end = self.__parse_record(line_start)
+            if name < ref_name_prefix:
+                lo = record_end
+            else:
+                hi = line_start
+        return lo
+
+    def iterate_with_prefix(self, ref_name_prefix: str) -> Iterator[Tuple[str, str]]:
+        if self.__data is None:
+            return
+        prefix = ref_name_prefix.encode("utf-8")
+        if self.__is_sorted and prefix:
+            # All the records in between the first one with the prefix and the first one past the prefix can be split at once.
+            start = self.__find_first_record_at_or_after(prefix)
+            end = self.__find_first_record_at_or_after(prefix[:-1] + bytes([prefix[-1] + 1])) if prefix[-1] < 0xff else len(self.__data)
+        else:
+            start, end = self.__records_offset, len(self.__data)
+        for line in self.__data[start:end].decode("utf-8").split("\n"):
+            if not line or line[0] == "^":
+                continue
+            hash, _, name = line.partition(" ")
+            if len(hash) not in (40, 64) or not name:
+                raise RefsException(f"malformed packed-refs line: {line!r}")
+            if name.startswith(ref_name_prefix):
+                yield name, hash
+
+    def get_hash_or_none(self, ref_name: str) -> Optional[str]:
+        for name, hash in self.iterate_with_prefix(ref_name):
+            if name == ref_name:
+                return hash
+        return None
+
+    def get_hashes(self, ref_names: List[str]) -> Dict[str, str]:
+        if self.__is_sorted:
+            # A binary search for each of the refs, rather than a pass over the entire file.
+            hash_by_ref_name = ((ref_name, self.get_hash_or_none(ref_name)) for ref_name in ref_names)
+            return {ref_name: hash for ref_name, hash in hash_by_ref_name if hash is not None}
+        ref_name_set = set(ref_names)
+        return {name: hash for name, hash in self.iterate_with_prefix("") if name in ref_name_set}
+
+
+# Reads the refs directly from the files backend (loose refs under `refs/` and the `packed-refs` file) of the given git directory,
+# without spawning `git for-each-ref`, which needs to open each commit object for `%(tree)` or `%(committerdate)`.
+class RefReader:
+
+    def __init__(self, git_dir: str) -> None:
+        self.__git_dir = git_dir
+        self.__packed_refs = _PackedRefs.load(os.path.join(git_dir, "packed-refs"))
+
+    def close(self) -> None:
+        self.__packed_refs.close()
+
+    def __read_loose_ref_or_none(self, ref_name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.__git_dir, *ref_name.split("/")), "r") as file:
+                return file.read().strip()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+
+    def __iterate_loose_refs(self, ref_name_prefix: str) -> Iterator[Tuple[str, str]]:
+        prefix_dir = os.path.join(self.__git_dir, *ref_name_prefix.rstrip("/").split("/"))
+        for dir_path, _, file_names in os.walk(prefix_dir):
+            relative_dir = os.path.relpath(dir_path, self.__git_dir).replace(os.sep, "/")
+            for file_name in file_names:
+                if file_name.endswith(".lock"):
+                    continue  # ref update in progress
+                ref_name = f"{relative_dir}/{file_name}"
+                value = self.__read_loose_ref_or_none(ref_name)
+                if value is not None:
+                    yield ref_name, value
+
+    def __resolve_or_none(self, ref_name: str, value: str) -> Optional[str]:
+        for _ in range(SYMREF_MAX_DEPTH):
+            if not value.startswith(SYMREF_PREFIX):
+                if len(value) not in (40, 64):
+                    raise RefsException(f"malformed value of {ref_name}: {value!r}")
+                return value
+            target = value[len(SYMREF_PREFIX):].strip()
+            target_value = self.__read_loose_ref_or_none(target)
+            if target_value is None:
+                target_value = self.__packed_refs.get_hash_or_none(target)
+            if target_value is None:
+                debug("ignoring dangling symbolic ref %s", ref_name, subsystem="git")
+                return None
+            value = target_value
+        debug("ignoring symbolic ref %s, as it's nested too deeply", ref_name, subsystem="git")
+        return None
+
+    def __get_resolved_refs(self, value_by_ref_name: Dict[str, str]) -> List[Tuple[str, str]]:
+        result: List[Tuple[str, str]] = []
+        # Note that the order of code points is the same as the (byte) order of their UTF-8 encodings.
+        for ref_name in sorted(value_by_ref_name):
+            value = value_by_ref_name[ref_name]
+            hash = self.__resolve_or_none(ref_name, value) if value.startswith(SYMREF_PREFIX) or len(value) not in (40, 64) else value
+            if hash is not None:
+                result.append((ref_name, hash))
+        return result
+
+    # Returns (ref name, commit hash) for all the refs with the given prefix, sorted by name (just like `git for-each-ref` would list them).
+    # Symbolic refs (like `refs/remotes/origin/HEAD`) are resolved; loose refs take precedence over packed ones.
+    def get_refs(self, ref_name_prefix: str) -> List[Tuple[str, str]]:
+        value_by_ref_name: Dict[str, str] = dict(self.__packed_refs.iterate_with_prefix(ref_name_prefix))
+        value_by_ref_name.update(self.__iterate_loose_refs(ref_name_prefix))
+        return self.__get_resolved_refs(value_by_ref_name)
+
+    # Same as `get_refs`, but only for the given refs (the ones that don't exist are skipped).
+    def get_named_refs(self, ref_names: List[str]) -> List[Tuple[str, str]]:
+        value_by_ref_name: Dict[str, str] = self.__packed_refs.get_hashes(ref_names)
+        for ref_name in ref_names:
+            value = self.__read_loose_ref_or_none(ref_name)
+            if value is not None:
+                value_by_ref_name[ref_name] = value
+        return self.__get_resolved_refs(value_by_ref_name)
+
+
+# Returns None if the refs can't be read this way (for instance, due to a malformed file),
+# so that `git for-each-ref` should be used instead.
+def read_refs_or_none(git_dir: str, ref_name_prefix: str) -> Optional[List[Tuple[str, str]]]:
+    return _read_or_none(git_dir, lambda ref_reader: ref_reader.get_refs(ref_name_prefix))
+
+
+def read_named_refs_or_none(git_dir: str, ref_names: List[str]) -> Optional[List[Tuple[str, str]]]:
+    return _read_or_none(git_dir, lambda ref_reader: ref_reader.get_named_refs(ref_names))
+
+
+def _read_or_none(git_dir: str, read: Callable[[RefReader], List[Tuple[str, str]]]) -> Optional[List[Tuple[str, str]]]:
+    try:
+        ref_reader = RefReader(git_dir)
+        try:
+            return read(ref_reader)
+        finally:
+            ref_reader.close()
+    except (OSError, ValueError, RefsException) as e:
+        debug("refs under %s could not be read: %s", git_dir, e, subsystem="git")
+        return None
@@ -0,0 +1,110 @@
+import os
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Any, Dict, List, Optional
+
+# Records the subprocesses and HTTP requests fired by git-machete, when enabled with `--trace=FILE` or `GIT_MACHETE_TRACE=FILE`.
+# The events are written out in Chrome trace event format
+# (https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU),
+# so the resulting file can be loaded into a trace viewer like https://ui.perfetto.dev or chrome://tracing.
+
+TRACE_ENV_VAR = "GIT_MACHETE_TRACE"
+
+# Path of the file to write the trace to, or None if tracing is disabled (which is the default).
+trace_file_path: Optional[str] = None
+
+_events: List[Dict[str, Any]] = []
+_events_lock = threading.Lock()
+_start_timestamp: int = 0
+
+
+def is_enabled() -> bool:
+    return trace_file_path is not None
+
+
+def enable(file_path: str) -> None:
+    global trace_file_path, _start_timestamp
+    trace_file_path = file_path
+    _start_timestamp = get_timestamp()
+    with _events_lock:
+        _events.clear()
+
+
+# In microseconds, as expected by the trace event format; only the differences between timestamps are meaningful.
+def get_timestamp() -> int:
+    return int(time.perf_counter() * 1_000_000)
+
+
+# Finds the MacheteClient method (like `traverse` or `status`) that the currently executed operation has been started from.
+# Frames are only inspected when tracing is enabled, so that the overhead is not paid otherwise.
+def _get_operation_or_none() -> Optional[str]:
+    def find_outermost_client_method(frame: Optional[FrameType]) -> Optional[str]:
+        operation: Optional[str] = None
+        while frame is not None:
+            if frame.f_globals.get("__name__") == "git_machete.client" and "self" in frame.f_locals:
+                operation = f"{type(frame.f_locals['self']).__name__}.{frame.f_code.co_name}"
+            frame = frame.f_back
+        return operation
+
+    operation = find_outermost_client_method(sys._getframe(2))
+    main_thread = threading.main_thread()
+    if operation is None and threading.current_thread() is not main_thread:
+        # Operations like `status` run some of the git commands from worker threads,
+        # whose stacks don't reach the client; the main thread waits for these commands within the operation, though.
+        operation = find_outermost_client_method(sys._current_frames().get(main_thread.ident or 0))
+    return operation
+
+
+# Records a complete event that has started at `start_timestamp` (as returned by `get_timestamp`) and has just finished.
+def record(category: str, name: str, start_timestamp: int, args: Dict[str, Any]) -> None:
+    end_timestamp = get_timestamp()
+    operation = _get_operation_or_none()
+    if operation:
+        args = dict(args, operation=operation)
+    event = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": start_timestamp,
+        "dur": end_timestamp - start_timestamp,
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "args": args
+    }
+    with _events_lock:
+        _events.append(event)
+
+
+# Writes out all the events recorded so far (preceded by an event spanning the entire command) and disables tracing.
+def write(args: List[str]) -> None:
+    global trace_file_path
+    if trace_file_path is None:
+        return
+    # Imported lazily, as most of the runs don't write any JSON.
+    import json
+
+    name = " ".join(["git machete"] + args)
+    with _events_lock:
+        events = [{
+            "name": "process_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "args": {"name": name}
+        }, {
+            "name": name,
+            "cat": "command",
+            "ph": "X",
+            "ts": _start_timestamp,
+            "dur": get_timestamp() - _start_timestamp,
+            "pid": os.getpid(),
+            "tid": threading.main_thread().ident,
+            "args": {}
+        }] + _events
+        _events.clear()
+    try:
+        with open(trace_file_path, "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file, indent=1)
+    finally:
+        trace_file_path = None
@@ -1,12 +1,15 @@
-import inspect
 import os
 import re
+import shutil
 import subprocess
 import sys
 from enum import Enum, auto
+from types import FrameType
 from typing import (Any, Callable, Dict, Iterable, List, NamedTuple, Optional,
                     Set, Tuple, TypeVar)
 
+from git_machete import profiling, tracing
+
 T = TypeVar('T')
 U = TypeVar('U')
 
@@ -21,11 +24,20 @@ ascii_only: bool = not sys.stdout.isatty()
 debug_mode: bool = False
 verbose_mode: bool = False
 
+# Subsystems that the debug messages can be tagged with, see `debug`.
+DEBUG_SUBSYSTEMS = ["fork-point", "git", "github", "hooks"]
+DEBUG_SUBSYSTEMS_ENV_VAR = "GIT_MACHETE_DEBUG"
+# Subsystems whose debug messages (and outputs of the commands) are logged in debug mode, or None for all messages (the default).
+# Set with `GIT_MACHETE_DEBUG` environment variable (which also turns debug mode on), e.g. `GIT_MACHETE_DEBUG=fork-point,hooks`.
+# The commands run on behalf of the other subsystems are still logged, but only as in verbose mode (without the outputs).
+debug_subsystems: Optional[Set[str]] = None
+
 GITHUB_NEW_ISSUE_MESSAGE = 'Consider posting an issue at https://github.com/VirtusLab/git-machete/issues/new'
 
 
 def excluding(iterable: Iterable[T], s: Iterable[T]) -> List[T]:
-    return list(filter(lambda x: x not in s, iterable))
+    excluded = set(s)
+    return list(filter(lambda x: x not in excluded, iterable))
 
 
 def flat_map(func: Callable[[T], List[T]], iterable: Iterable[T]) -> List[T]:
@@ -40,6 +52,18 @@ def map_truthy_only(func: Callable[[T], Optional[U]], iterable: Iterable[T]) ->
     return list(filter(None, map(func, iterable)))
 
 
+# Like `list(map(func, iterable))`, but calls `func` from up to `max_workers` threads at once.
+# The results are returned in the order of `iterable`; the first exception raised by `func` (if any) is re-raised.
+def map_concurrently(func: Callable[[T], U], iterable: Iterable[T], max_workers: int) -> List[U]:
+    items = list(iterable)
+    if max_workers <= 1 or len(items) <= 1 or profiling.is_cpu_profiling_enabled:
+        return list(map(func, items))
+    # Imported lazily, as most of the commands never need a thread pool.
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
 def get_non_empty_lines(s: str) -> List[str]:
     return list(filter(None, s.split("\n")))
 
@@ -76,6 +100,11 @@ def is_executable(path: str) -> bool:
     return os.access(path, os.X_OK)
 
 
+# The git executable that the `git` commands are run with, as found in PATH.
+def get_git_executable_path_or_none() -> Optional[str]:
+    return shutil.which("git")
+
+
 def find_executable(executable: str) -> Optional[str]:
     base, ext = os.path.splitext(executable)
 
@@ -90,30 +119,42 @@ def find_executable(executable: str) -> Optional[str]:
     for p in paths:
         f = os.path.join(p, executable)
         if os.path.isfile(f) and is_executable(f):
-            debug(f"found {executable} at {f}")
+            debug("found %s at %s", executable, f)
             return f
     return None
 
 
-def debug(msg: str) -> None:
-    if debug_mode:
-        function_name = bold(inspect.stack()[1].function)
-        args, _, _, values = inspect.getargvalues(inspect.stack()[1].frame)
+def is_debug_enabled(subsystem: Optional[str] = None) -> bool:
+    return debug_mode and (debug_subsystems is None or subsystem in debug_subsystems)
+
+
+# Logs `msg % args` in debug mode, prefixed with the name and the arguments of the calling function.
+# Both the formatting and the lookup of the calling function only happen once the message is known to be logged,
+# so (as long as the arguments are passed via `args` rather than pre-formatted) a disabled message costs just a function call.
+def debug(msg: str, *args: Any, subsystem: Optional[str] = None) -> None:
+    if is_debug_enabled(subsystem):
+        _print_debug_message(sys._getframe(1), msg % args if args else msg)
+
+
+def _print_debug_message(frame: FrameType, msg: str) -> None:
+    code = frame.f_code
+    # The same arguments as reported by `inspect.getargvalues`, without materializing the entire stack like `inspect.stack` does.
+    args = excluding(code.co_varnames[:code.co_argcount + code.co_kwonlyargcount], {'self'})
+
+    args_to_be_redacted = {'access_token', 'password', 'secret', 'token'}
+    # https://github.blog/2021-04-05-behind-githubs-new-authentication-token-formats/
+    values_to_be_redacted = ['ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_']
 
-        args_to_be_redacted = {'access_token', 'password', 'secret', 'token'}
-        # https://github.blog/2021-04-05-behind-githubs-new-authentication-token-formats/
-        values_to_be_redacted = ['ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_']
-        for arg, value in values.items():
-            if arg in args_to_be_redacted or any(value_ in str(value) for value_ in values_to_be_redacted):
-                values[arg] = '***'
+    def get_value_repr(arg: str) -> str:
+        value = str(frame.f_locals.get(arg))
+        if arg in args_to_be_redacted or any(value_ in value for value_ in values_to_be_redacted):
+            return '***'
+        return value
 
-        excluded_args = {'self'}
-        allowed_args = excluding(args, excluded_args)
-        args_and_values_list = [arg + '=' + str(values[arg]) for arg in allowed_args]
-        args_and_values_str = ', '.join(args_and_values_list)
-        args_and_values_bold_str = bold(f'({args_and_values_str})')
+    args_and_values_str = ', '.join(arg + '=' + get_value_repr(arg) for arg in args)
+    args_and_values_bold_str = bold(f'({args_and_values_str})')
 
-        print(f"{function_name}{args_and_values_bold_str}: {dim(msg)}", file=sys.stderr)
+    print(f"{bold(code.co_name)}{args_and_values_bold_str}: {dim(msg)}", file=sys.stderr)
 
 
 def _run_cmd(cmd: str, *args: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> int:
@@ -121,23 +162,23 @@ def _run_cmd(cmd: str, *args: str, cwd: Optional[str] = None, env: Optional[Dict
     return subprocess.run([cmd] + list(args), stdout=None, stderr=None, cwd=cwd, env=env).returncode
 
 
-def run_cmd(cmd: str, *args: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> int:
+def run_cmd(cmd: str, *args: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+            debug_subsystem: Optional[str] = None) -> int:
     chdir_upwards_until_current_directory_exists()
 
-    flat_cmd: str = get_cmd_shell_repr(cmd, *args, env=env)
-    if debug_mode:
-        print(bold(f">>> {flat_cmd}"), file=sys.stderr)
-    elif verbose_mode:
-        print(flat_cmd, file=sys.stderr)
+    log_cmd(cmd, *args, env=env, debug_subsystem=debug_subsystem)
 
+    start_timestamp = tracing.get_timestamp() if tracing.is_enabled() else 0
     exit_code: int = _run_cmd(cmd, *args, cwd=cwd, env=env)
+    if tracing.is_enabled():
+        tracing.record("subprocess", get_cmd_trace_name(cmd, *args), start_timestamp, {"argv": [cmd] + list(args), "exit_code": exit_code})
 
     # Let's defensively assume that every command executed via run_cmd
     # (but not via popen_cmd) can make the current directory disappear.
     # In practice, it's mostly 'git checkout' that carries such risk.
     mark_current_directory_as_possibly_non_existent()
 
-    if debug_mode and exit_code != 0:
+    if exit_code != 0 and is_debug_enabled(debug_subsystem):
         print(dim(f"<exit code: {exit_code}>\n"), file=sys.stderr)
     return exit_code
 
@@ -157,7 +198,7 @@ def chdir_upwards_until_current_directory_exists() -> None:
                 # it doesn't propagate to the parent process (which is typically a shell).
                 os.chdir(os.path.pardir)
                 current_directory = get_current_directory_or_none()
-            debug(f"current directory did not exist, chdired up into {current_directory}")
+            debug("current directory did not exist, chdired up into %s", current_directory)
         current_directory_confirmed_to_exist = True
 
 
@@ -178,19 +219,23 @@ def _popen_cmd(cmd: str, *args: str,
     return PopenResult(exit_code, stdout, stderr)
 
 
-def popen_cmd(cmd: str, *args: str, cwd: Optional[str] = None,
-              env: Optional[Dict[str, str]] = None, hide_debug_output: bool = False) -> PopenResult:
+def popen_cmd(cmd: str, *args: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+              hide_debug_output: bool = False, debug_subsystem: Optional[str] = None) -> PopenResult:
     chdir_upwards_until_current_directory_exists()
 
-    flat_cmd = get_cmd_shell_repr(cmd, *args, env=env)
-    if debug_mode:
-        print(bold(f">>> {flat_cmd}"), file=sys.stderr)
-    elif verbose_mode:
-        print(flat_cmd, file=sys.stderr)
+    log_cmd(cmd, *args, env=env, debug_subsystem=debug_subsystem)
 
+    start_timestamp = tracing.get_timestamp() if tracing.is_enabled() else 0
     exit_code, stdout, stderr = result = _popen_cmd(cmd, *args, cwd=cwd, env=env)
-
-    if debug_mode:
+    if tracing.is_enabled():
+        tracing.record("subprocess", get_cmd_trace_name(cmd, *args), start_timestamp, {
+            "argv": [cmd] + list(args),
+            "exit_code": exit_code,
+            "stdout_bytes": len(stdout.encode('utf-8')),
+            "stderr_bytes": len(stderr.encode('utf-8'))
+        })
+
+    if is_debug_enabled(debug_subsystem):
         if exit_code != 0:
             print(colored(f"<exit code: {exit_code}>\n", AnsiEscapeCodes.RED), file=sys.stderr)
         if stdout:
@@ -207,6 +252,68 @@ def popen_cmd(cmd: str, *args: str, cwd: Optional[str] = None,
     return result
 
 
+def _spawn_cmd(cmd: str, *args: str, cwd: Optional[str] = None) -> "subprocess.Popen[bytes]":
+    return subprocess.Popen([cmd] + list(args), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=cwd)
+
+
+class _SpawnedCmdTrace:
+    __slots__ = ("start_timestamp", "stdout_byte_count")
+
+    def __init__(self, start_timestamp: int) -> None:
+        self.start_timestamp = start_timestamp
+        self.stdout_byte_count = 0
+
+
+# Processes started with spawn_cmd while tracing is enabled (by id of the process object), not yet recorded in the trace.
+_spawned_cmd_traces: Dict[int, _SpawnedCmdTrace] = {}
+
+
+# Unlike run_cmd/popen_cmd, doesn't wait for the command to complete:
+# the caller is responsible for talking to the process over its stdin/stdout and for closing it eventually.
+# For the process to show up in the trace, the caller should report the output read from the process with `count_spawned_cmd_output`
+# and call `trace_spawned_cmd` once the process has exited.
+def spawn_cmd(cmd: str, *args: str, cwd: Optional[str] = None, debug_subsystem: Optional[str] = None) -> "subprocess.Popen[bytes]":
+    chdir_upwards_until_current_directory_exists()
+
+    log_cmd(cmd, *args, env=None, debug_subsystem=debug_subsystem, suffix=" &")
+
+    start_timestamp = tracing.get_timestamp() if tracing.is_enabled() else 0
+    process = _spawn_cmd(cmd, *args, cwd=cwd)
+    if tracing.is_enabled():
+        _spawned_cmd_traces[id(process)] = _SpawnedCmdTrace(start_timestamp)
+    return process
+
+
+def count_spawned_cmd_output(process: "subprocess.Popen[bytes]", byte_count: int) -> None:
+    spawned_cmd_trace = _spawned_cmd_traces.get(id(process))
+    if spawned_cmd_trace is not None:
+        spawned_cmd_trace.stdout_byte_count += byte_count
+
+
+def trace_spawned_cmd(process: "subprocess.Popen[bytes]") -> None:
+    spawned_cmd_trace = _spawned_cmd_traces.pop(id(process), None)
+    if spawned_cmd_trace is not None and tracing.is_enabled():
+        argv: List[str] = list(process.args)  # type: ignore[arg-type]
+        tracing.record("subprocess", get_cmd_trace_name(*argv), spawned_cmd_trace.start_timestamp, {
+            "argv": argv,
+            "exit_code": process.returncode,
+            "stdout_bytes": spawned_cmd_trace.stdout_byte_count
+        })
+
+
+# The shell representation of the command is only built when it's actually going to be logged.
+def log_cmd(cmd: str, *args: str, env: Optional[Dict[str, str]], debug_subsystem: Optional[str], suffix: str = "") -> None:
+    if is_debug_enabled(debug_subsystem):
+        print(bold(f">>> {get_cmd_shell_repr(cmd, *args, env=env)}{suffix}"), file=sys.stderr)
+    elif verbose_mode or debug_mode:
+        print(get_cmd_shell_repr(cmd, *args, env=env) + suffix, file=sys.stderr)
+
+
+# E.g. `git rev-parse` for `git rev-parse --verify --quiet HEAD`, so that the events for the same subcommand are easy to group.
+def get_cmd_trace_name(cmd: str, *args: str) -> str:
+    return " ".join([cmd] + list(args[:1]))
+
+
 def get_cmd_shell_repr(cmd: str, *args: str, env: Optional[Dict[str, str]]) -> str:
     def shell_escape(arg: str) -> str:
         return arg.replace("(", "\\(") \
@@ -235,7 +342,30 @@ def slurp_file_or_empty(path: str) -> str:
         return ''
 
 
+# Values of `TERM` that are known to stand for terminals supporting at least 256 colors (other than `*-256color` and the likes),
+# and the ones known to stand for terminals supporting fewer colors.
+FULLY_FLEDGED_TERMS = ("alacritty", "foot", "iterm2", "wezterm", "xterm-ghostty", "xterm-kitty")
+LIMITED_COLOR_TERMS = ("ansi", "cygwin", "dumb", "eterm-color", "linux", "putty", "rxvt", "rxvt-unicode", "screen", "st", "tmux",
+                       "vt100", "vt102", "vt220", "xterm", "xterm-16color", "xterm-color")
+
+_is_terminal_fully_fledged_cached: Optional[bool] = None
+
+
 def is_terminal_fully_fledged() -> bool:
+    global _is_terminal_fully_fledged_cached
+    if _is_terminal_fully_fledged_cached is None:
+        _is_terminal_fully_fledged_cached = _check_if_terminal_fully_fledged()
+    return _is_terminal_fully_fledged_cached
+
+
+def _check_if_terminal_fully_fledged() -> bool:
+    term = os.environ.get("TERM", "")
+    if os.environ.get("COLORTERM") in ("truecolor", "24bit") or term in FULLY_FLEDGED_TERMS or \
+            "256color" in term or term.endswith(("-direct", "-truecolor", "-24bit")):
+        return True
+    if not term or term in LIMITED_COLOR_TERMS:
+        return False
+    # Only for the less common terminals, let's consult the terminfo database.
     try:
         stdout = popen_cmd('tput', 'colors')[1]
         number_of_supported_colors = int(stdout)
@@ -247,8 +377,6 @@ def is_terminal_fully_fledged() -> bool:
 
 class AnsiEscapeCodes:
 
-    __is_terminal_fully_fledged = is_terminal_fully_fledged()
-
     # `GIT_MACHETE_DIM_AS_GRAY` remains undocumented as for now,
     # is just needed for animated gifs to render correctly
     # (`[2m`-style dimmed text is invisible in asciicinema renders).
@@ -259,14 +387,29 @@ class AnsiEscapeCodes:
     ENDC_BOLD_DIM = '\033[22m'
     BOLD = '\033[1m'
     DIM = '\033[38;2;128;128;128m' if __dim_as_gray else '\033[2m'
-    # Let's fall back to cyan on 8-color terminals
-    UNDERLINE = '\033[4m' if __is_terminal_fully_fledged else '\033[36m'
+    UNDERLINE = '\033[4m'
     GREEN = '\033[32m'
     YELLOW = '\033[33m'
+    ORANGE = '\033[00;38;5;208m'
+    RED = '\033[91m'
+
+
+# Checking the number of colors supported by the terminal might require spawning `tput`,
+# so it's only done once something is actually to be displayed in color (rather than e.g. when this module is imported).
+ansi_escape_codes_for_limited_color_terminals: Dict[str, str] = {
+    # Let's fall back to cyan on 8-color terminals
+    AnsiEscapeCodes.UNDERLINE: '\033[36m',
     # Let's fall back to yellow on 8-color terminals
-    ORANGE = '\033[00;38;5;208m' if __is_terminal_fully_fledged else '\033[33m'
+    AnsiEscapeCodes.ORANGE: '\033[33m',
     # Let's fall back to dark red (which might be similar to yellow :/) on 8-color terminals
-    RED = '\033[91m' if __is_terminal_fully_fledged else '\033[31m'
+    AnsiEscapeCodes.RED: '\033[31m'
+}
+
+
+def adapt_to_terminal(code: str) -> str:
+    if code not in ansi_escape_codes_for_limited_color_terminals or is_terminal_fully_fledged():
+        return code
+    return ansi_escape_codes_for_limited_color_terminals[code]
 
 
 def bold(s: str) -> str:
@@ -279,7 +422,7 @@ def dim(s: str) -> str:
 
 def underline(s: str, star_if_ascii_only: bool = False) -> str:
     if s and not ascii_only:
-        return AnsiEscapeCodes.UNDERLINE + s + AnsiEscapeCodes.ENDC_UNDERLINE
+        return adapt_to_terminal(AnsiEscapeCodes.UNDERLINE) + s + AnsiEscapeCodes.ENDC_UNDERLINE
     elif s and star_if_ascii_only:
         return s + " *"
     else:
@@ -287,7 +430,7 @@ def underline(s: str, star_if_ascii_only: bool = False) -> str:
 
 
 def colored(s: str, color: str) -> str:
-    return s if ascii_only or not s else color + s + AnsiEscapeCodes.ENDC
+    return s if ascii_only or not s else adapt_to_terminal(color) + s + AnsiEscapeCodes.ENDC
 
 
 fmt_transformations: List[Callable[[str], str]] = [
@@ -41,6 +41,9 @@ class MockGitHubAPIResponse:
     def read(self) -> bytes:
         return json.dumps(self.response_data).encode()
 
+    def getcode(self) -> int:
+        return self.status_code
+
     def info(self) -> Dict[str, Any]:
         return defaultdict(lambda: "", self.headers)
 
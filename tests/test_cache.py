@@ -0,0 +1,225 @@
+import os
+import re
+import threading
+from typing import Any, Dict, List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from git_machete import utils
+from git_machete.memory_cache import (MemoryCache, MemoryCachedValue,
+                                      _CacheWithStats, format_cache_stats)
+
+from .base_test import BaseTest
+from .mockers import assert_success, launch_command, rewrite_definition_file
+
+
+def parse_cache_stats(output: str) -> Dict[str, List[str]]:
+    lines = output.splitlines()
+    header_index = next(index for index, line in enumerate(lines) if line.startswith("cache "))
+    # Cache names can contain a single space (like in `merge-base (persistent)`), while the columns are separated by at least two.
+    return {columns[0]: columns[1:] for columns in (re.split(" {2,}", line) for line in lines[header_index + 1:])}  # noqa: FS003
+
+
+class TestCache(BaseTest):
+
+    def test_cache_clear(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("develop")
+                .commit("develop commit")
+                .new_branch("feature")
+                .commit("feature commit")
+                .check_out("master")
+                .commit("another master commit")
+        )
+        rewrite_definition_file("master\n  develop\n    feature")
+        merge_base_cache_path = os.path.join(".git", "machete-cache", "merge-base")
+
+        expected_status = launch_command("status")
+        assert os.path.isfile(merge_base_cache_path)
+
+        popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+        assert launch_command("status") == expected_status
+        # All the merge-bases and the results of squash merge detection should now be taken from the persistent cache.
+        assert "merge-base" not in [call.args[1] for call in popen_cmd_spy.call_args_list]
+        assert "--format=%H %T" not in [arg for call in popen_cmd_spy.call_args_list for arg in call.args]
+
+        assert launch_command("cache", "clear") == ""
+        assert not os.path.exists(merge_base_cache_path)
+
+        popen_cmd_spy.reset_mock()
+        assert launch_command("status") == expected_status
+        assert "merge-base" in [call.args[1] for call in popen_cmd_spy.call_args_list]
+        assert "--format=%H %T" in [arg for call in popen_cmd_spy.call_args_list for arg in call.args]
+
+    def test_cache_tree_hash_index(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("develop")
+                .commit("develop commit")
+                .check_out("master")
+                .new_branch("feature")
+                .commit("feature commit")
+                .check_out("master")
+                .execute("git merge --squash develop")
+                .execute("git commit -m squash_develop")
+        )
+        rewrite_definition_file("master\n  develop\n  feature")
+        old_master_hash = self.repo_sandbox.get_commit_hash("master")
+
+        assert_success(
+            ["status"],
+            """
+            master * (untracked)
+            |
+            m-develop (untracked)
+            |
+            x-feature (untracked)
+            """
+        )
+
+        (
+            self.repo_sandbox.check_out("develop")
+                .commit("another develop commit")
+                .check_out("master")
+                .execute("git merge --squash develop")
+                .execute("git commit -m squash_develop_again")
+                .commit("another master commit")
+        )
+        new_master_hash = self.repo_sandbox.get_commit_hash("master")
+
+        popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+        assert_success(
+            ["status"],
+            """
+            master * (untracked)
+            |
+            m-develop (untracked)
+            |
+            x-feature (untracked)
+            """
+        )
+        # Only the commits added to master since the previous invocation should be walked to bring the index up to date.
+        tree_hash_index_log_calls = [call.args[2:] for call in popen_cmd_spy.call_args_list
+                                     if call.args[1] == "log" and call.args[2] == "--format=%H %T"]
+        assert len(tree_hash_index_log_calls) == 1
+        assert tree_hash_index_log_calls[0][1:3] == (new_master_hash, "^" + old_master_hash)
+
+    def test_cache_disabled(self) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("develop")
+                .commit("develop commit")
+                .set_git_config_key("machete.cache.enabled", "false")
+        )
+        rewrite_definition_file("master\n  develop")
+
+        launch_command("status")
+        assert not os.path.exists(os.path.join(".git", "machete-cache"))
+
+    def test_cache_corrupted(self) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("develop")
+                .commit("develop commit")
+        )
+        rewrite_definition_file("master\n  develop")
+        expected_status = launch_command("status")
+
+        with open(os.path.join(".git", "machete-cache", "merge-base"), "w") as cache_file:
+            cache_file.write("definitely not an sqlite database")
+        # The cache should be silently ignored rather than failing the command.
+        assert launch_command("status") == expected_status
+
+    def test_memory_cache_stats(self) -> None:
+        """
+        Verify that the in-memory caches count the hits, misses, evictions and flushes
+        """
+        cache: MemoryCache[str, int] = MemoryCache("length")
+        assert cache.get_or_compute("a", len) == 1
+        assert cache.get_or_compute("a", len) == 1
+        assert cache.get_or_compute("bb", len) == 2
+        assert cache.get_or_none("ccc") is None
+        cache.put("ccc", 3)
+        assert cache.get_or_none("ccc") == 3
+        assert "a" in cache
+        stats = cache.get_stats()
+        assert (stats.name, stats.hits, stats.misses, stats.evictions, stats.flushes, stats.entries) == ("length", 2, 3, 0, 0, 3)
+        assert stats.approximate_bytes is not None and stats.approximate_bytes > 0
+
+        cache.flush()
+        assert "a" not in cache
+        stats = cache.get_stats()
+        assert (stats.hits, stats.misses, stats.evictions, stats.flushes, stats.entries) == (2, 3, 3, 1, 0)
+
+        cached_value: MemoryCachedValue[List[str]] = MemoryCachedValue("list", threading.Lock())
+        assert cached_value.get_if_loaded_or_none() is None
+        assert cached_value.get_or_load(lambda: ["x"]) == ["x"]
+        assert cached_value.get_or_load(lambda: ["y"]) == ["x"]
+        cached_value.flush()
+        cached_value.flush()
+        stats = cached_value.get_stats()
+        assert (stats.hits, stats.misses, stats.evictions, stats.flushes, stats.entries) == (1, 1, 1, 2, 0)
+
+        assert parse_cache_stats(format_cache_stats([stats])) == {"list": ["1", "1", "50%", "1", "2", "0", "0 B"]}
+
+    def test_cache_without_stats_cannot_be_created(self) -> None:
+        """
+        Verify that a cache that doesn't implement everything needed for its stats fails already when created
+        """
+        class CacheWithoutFlush(_CacheWithStats):
+            def _get_entry_count(self) -> int:
+                return 0
+
+            def _get_contents(self) -> Any:
+                return None
+
+        with pytest.raises(TypeError):
+            CacheWithoutFlush("no-flush")  # type: ignore[abstract]
+
+    def test_cache_stats_option(self) -> None:
+        """
+        Verify that `--stats` prints the statistics of both in-memory and persistent caches once the command is done
+        """
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("develop")
+                .commit("develop commit")
+                .new_branch("feature")
+                .commit("feature commit")
+        )
+        rewrite_definition_file("master\n  develop\n    feature")
+
+        assert "hit rate" not in launch_command("status")
+        stats = parse_cache_stats(launch_command("--stats", "status"))
+        assert list(stats) == [
+            "branch-pairs-by-hash-in-reflog",
+            "branches",
+            "commit-hash-by-revision",
+            "committer-timestamp-by-commit-hash",
+            "config",
+            "equivalent-tree-reachable",
+            "inferred-counterpart-for-fetching",
+            "merge-base",
+            "reflog-by-branch",
+            "reflogs",
+            "remotes",
+            "short-commit-hash-by-revision",
+            "tree-hash-by-commit-hash",
+            "tree-hash-index-tip-and-boundary",
+            "equivalent-tree-reachable (persistent)",
+            "merge-base (persistent)"
+        ]
+        hits, misses, _, evictions, flushes, entries, _ = stats["branches"]
+        assert (misses, evictions, flushes, entries) == ("1", "0", "0", "1")
+        assert int(hits) > 0
+        # The merge-bases have all been computed by the previous `status`.
+        hits, misses, _, _, _, entries, size = stats["merge-base (persistent)"]
+        assert int(hits) > 0
+        assert (misses, entries, size) == ("0", "-", "-")
@@ -1,5 +1,8 @@
 import os
+import subprocess
+import sys
 from tempfile import mkdtemp
+from typing import Set
 
 import pytest
 from pytest_mock import MockerFixture
@@ -8,6 +11,7 @@ from git_machete.cli import alias_by_command, main
 from git_machete.exceptions import ExitCode
 
 from .base_test import BaseTest
+from .mockers import assert_failure, overridden_environment
 
 
 class TestCLI(BaseTest):
@@ -29,3 +33,33 @@ class TestCLI(BaseTest):
             self.patch_symbol(mocker, "sys.argv", ["", "file"])
             main()
         assert ExitCode.MACHETE_EXCEPTION == e.value.code
+
+    @pytest.mark.skipif(sys.version_info < (3, 7), reason="`-X importtime` is only available since Python 3.7")
+    def test_import_budget(self) -> None:
+        """
+        Verify that importing the CLI doesn't pull in any modules other than the essential ones,
+        esp. the ones needed only by some of the commands (like GitHub integration or help)
+        """
+        def get_imported_modules(statement: str) -> Set[str]:
+            result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=project_dir,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+            # Each line is of the form `import time: <self us> | <cumulative us> | <indentation by nesting level><module name>`
+            return {line.split("|")[2].strip() for line in result.stderr.splitlines()
+                    if line.count("|") == 2 and line.split("|")[1].strip().isdigit()}
+
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        # Import time measured in milliseconds is too noisy (esp. when tests are run in parallel) to serve as a budget,
+        # hence the budget is expressed in terms of modules imported on top of the essential standard library modules.
+        essential_modules = get_imported_modules(
+            "import argparse, enum, heapq, mmap, re, shutil, string, struct, subprocess, threading, typing, weakref")
+        cli_modules = get_imported_modules("import git_machete.cli")
+        assert {module for module in cli_modules - essential_modules if not module.startswith("git_machete")} == set()
+        assert {"git_machete.client", "git_machete.generated_docs", "git_machete.github"}.isdisjoint(cli_modules)
+
+    def test_debug_subsystems_from_environment(self) -> None:
+        """
+        Verify that `GIT_MACHETE_DEBUG` only accepts the known subsystems
+        """
+        with overridden_environment(GIT_MACHETE_DEBUG="git,no-such-subsystem"):
+            assert_failure(["status"], "Invalid value of GIT_MACHETE_DEBUG environment variable: no-such-subsystem. "
+                                       "Valid subsystems: fork-point, git, github, hooks.")
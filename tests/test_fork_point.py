@@ -1,9 +1,13 @@
 from tempfile import mkdtemp
 
+from pytest_mock import MockerFixture
+
+from git_machete.git_operations import GitContext
+
 from .base_test import BaseTest
 from .mockers import (assert_failure, assert_success,
                       fixed_author_and_committer_date_in_past, launch_command,
-                      rewrite_definition_file)
+                      overridden_environment, rewrite_definition_file)
 
 
 class TestForkPoint(BaseTest):
@@ -272,3 +276,38 @@ class TestForkPoint(BaseTest):
             ["fork-point"],
             "dcd2db55125a1b67b367565e890a604639949a51\n"
         )
+
+    def test_fork_points_inferred_at_once_same_as_for_each_branch_alone(self, mocker: MockerFixture) -> None:
+        """
+        Verify that the fork points inferred for all branches at once (with a single walk of their joint history)
+        are the same as the ones inferred by walking the history of each branch alone, also for non-linear histories
+        and for commits with committer dates out of order
+        """
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("hotfix")
+                .commit("hotfix commit")
+                .check_out("master")
+                .new_branch("develop")
+                .commit("develop commit")
+                .new_branch("feature")
+                .commit("feature commit")
+                .merge("hotfix")
+                .commit("another feature commit")
+                .check_out("develop")
+                .new_branch("skewed")
+        )
+        with overridden_environment(GIT_COMMITTER_DATE="2000-01-01T00:00:00+0000"):
+            self.repo_sandbox.commit("commit from the past")
+        self.repo_sandbox.commit("skewed commit").check_out("master").commit("another master commit")
+        rewrite_definition_file("master\n  develop\n    feature\n    skewed\n  hotfix")
+        branches = ["develop", "feature", "skewed", "hotfix"]
+
+        fork_points_inferred_at_once = [launch_command("fork-point", branch) for branch in branches]
+        status_output = launch_command("status", "--list-commits")
+
+        # Branches whose history has already been read are always inferred by walking their history alone.
+        mocker.patch.object(GitContext, "is_log_stored", return_value=True)
+        assert [launch_command("fork-point", branch) for branch in branches] == fork_points_inferred_at_once
+        assert launch_command("status", "--list-commits") == status_output
@@ -0,0 +1,99 @@
+import json
+import os
+from tempfile import mkdtemp
+from typing import List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from git_machete import utils
+from git_machete.exceptions import UnderlyingGitException
+
+from .base_test import BaseTest
+from .mockers import (assert_failure, launch_command, overridden_environment,
+                      rewrite_definition_file)
+
+
+class TestGitExecutor(BaseTest):
+
+    def setup_method(self) -> None:
+        super().setup_method()
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .push()
+                .new_branch("develop")
+                .commit("develop commit")
+                .push()
+                .new_branch("feature")
+                .commit("feature commit")
+                .check_out("master")
+                .commit("another master commit")
+        )
+        rewrite_definition_file("master\n  develop\n    feature")
+        self.recording_path = os.path.join(mkdtemp(), "recording.json")
+
+    def launch_command_and_replay(self, mocker: MockerFixture, *args: str) -> List[str]:
+        with overridden_environment(GIT_MACHETE_RECORD=self.recording_path):
+            recorded_output = launch_command(*args)
+        spies = [mocker.spy(utils, name) for name in ('_popen_cmd', '_run_cmd', '_spawn_cmd')]
+        # Replayed in a directory that's not a git repository at all.
+        self.repo_sandbox.chdir(mkdtemp())
+        with overridden_environment(GIT_MACHETE_REPLAY=self.recording_path):
+            replayed_output = launch_command(*args)
+        assert [call for spy in spies for call in spy.call_args_list] == []
+        return [recorded_output, replayed_output]
+
+    def test_record_and_replay(self, mocker: MockerFixture) -> None:
+        """
+        Verify that git commands recorded with `GIT_MACHETE_RECORD` can be replayed with `GIT_MACHETE_REPLAY`
+        (without spawning any subprocess) to the same effect
+        """
+        expected_output = launch_command("status", "--list-commits")
+
+        recorded_output, replayed_output = self.launch_command_and_replay(mocker, "status", "--list-commits")
+
+        assert recorded_output == expected_output
+        assert replayed_output == expected_output
+        with open(self.recording_path) as recording_file:
+            recording = json.load(recording_file)
+        assert recording["args"] == ["status", "--list-commits"]
+        assert recording["branch_layout"] == "master\n  develop\n    feature"
+        assert ["rev-parse", "--git-dir", "--git-common-dir", "--show-toplevel"] in [command["args"] for command in recording["commands"]]
+
+    def test_record_and_replay_of_command_modifying_repository(self, mocker: MockerFixture) -> None:
+        """
+        Verify that the results of the same git command are replayed in the order they've been recorded,
+        so that a command like `traverse` sees the repository changing just like it did when recorded
+        """
+        recorded_output, replayed_output = self.launch_command_and_replay(
+            mocker, "traverse", "--yes", "--no-interactive-rebase", "--no-push", "--no-push-untracked")
+
+        assert "Rebasing develop onto master..." in recorded_output
+        assert "Rebasing feature onto develop..." in recorded_output
+        assert replayed_output == recorded_output
+
+    def test_replay_errors(self) -> None:
+        """
+        Verify that replaying fails with a meaningful message when the recording is missing, invalid,
+        or doesn't contain a command that's needed
+        """
+        missing_recording_path = os.path.join(mkdtemp(), "missing.json")
+        with overridden_environment(GIT_MACHETE_REPLAY=missing_recording_path):
+            with pytest.raises(UnderlyingGitException) as e:
+                launch_command("status")
+        assert str(e.value).startswith(f"Cannot read the recording of git commands from {missing_recording_path}: ")
+
+        with open(self.recording_path, "w") as recording_file:
+            json.dump({"version": 0}, recording_file)
+        with overridden_environment(GIT_MACHETE_REPLAY=self.recording_path):
+            assert_failure(["status"], f"{self.recording_path} is not a recording of git commands made by this version of git machete "
+                                       "(expected format version 1)", expected_exception=UnderlyingGitException)
+
+        with overridden_environment(GIT_MACHETE_RECORD=self.recording_path):
+            launch_command("version")
+        with overridden_environment(GIT_MACHETE_REPLAY=self.recording_path):
+            assert_failure(["file"], "git config --list has not been recorded", expected_exception=UnderlyingGitException)
+
+        with overridden_environment(GIT_MACHETE_RECORD=self.recording_path, GIT_MACHETE_REPLAY=self.recording_path):
+            assert_failure(["status"], "GIT_MACHETE_RECORD and GIT_MACHETE_REPLAY environment variables cannot be set at the same time")
@@ -1,8 +1,18 @@
 
-from git_machete.git_operations import (AnyRevision, FullCommitHash,
-                                        GitContext, LocalBranchShortName)
+import os
+from tempfile import mkdtemp
+from typing import List, Optional
+
+from pytest_mock import MockerFixture
+
+from git_machete import utils
+from git_machete.git_operations import (AnyBranchName, AnyRevision,
+                                        FullCommitHash, GitContext,
+                                        GitReflogEntry, LocalBranchShortName,
+                                        RemoteBranchShortName)
 
 from .base_test import BaseTest
+from .mockers import launch_command, rewrite_definition_file
 
 
 class TestGitOperations(BaseTest):
@@ -45,3 +55,385 @@ class TestGitOperations(BaseTest):
                                                       later=LocalBranchShortName('master')) is False
         assert self.repo_sandbox.is_ancestor_or_equal(earlier=LocalBranchShortName('develop'),
                                                       later=LocalBranchShortName('feature')) is True
+
+    def test_revisions_resolved_via_cat_file_process(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master first commit")
+                .new_branch("develop")
+                .commit("develop commit")
+        )
+        develop_commit_hash = self.repo_sandbox.get_commit_hash("develop")
+        develop_tree_hash = self.repo_sandbox.get_commit_hash("develop^{tree}")  # noqa: FS003
+        master_short_hash = self.repo_sandbox.popen("git rev-parse --short master")
+        develop_short_hash = self.repo_sandbox.popen("git rev-parse --short develop")
+
+        git = GitContext()
+        assert git.get_commit_hash_by_revision(AnyRevision('develop~0')) == develop_commit_hash
+        assert git.get_tree_hash_by_commit_hash(FullCommitHash.of(develop_commit_hash)) == develop_tree_hash
+        assert git.get_commit_hash_by_revision(AnyRevision('no-such-branch')) is None
+        assert git.get_short_commit_hash_by_revision_or_none(AnyRevision('master')) == master_short_hash
+        assert git.get_short_commit_hash_by_revision_or_none(AnyRevision('no-such-branch')) is None
+
+        popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+        assert git.get_short_commit_hash_by_revision_or_none(AnyRevision('develop')) == develop_short_hash
+        assert git.get_tree_hash_by_commit_hash(FullCommitHash.of(40 * 'a')) is None
+        git.flush_caches()
+        assert git.get_commit_hash_by_revision(AnyRevision('master~0')) == self.repo_sandbox.get_commit_hash("master")
+        # All the lookups above should have been served by the (respawned) `git cat-file` process, with no `git rev-parse` calls
+        # (and the branches and config re-read from the files after flushing the caches,
+        # with no `git for-each-ref` or `git config` calls either).
+        assert [call.args[1] for call in popen_cmd_spy.call_args_list] == []
+
+        self.repo_sandbox.commit("another develop commit")
+        new_develop_commit_hash = self.repo_sandbox.get_commit_hash("develop")
+        new_develop_tree_hash = self.repo_sandbox.get_commit_hash("develop^{tree}")  # noqa: FS003
+        assert new_develop_commit_hash != develop_commit_hash
+        assert new_develop_tree_hash != develop_tree_hash
+        git.flush_caches()
+        # No stale results should be served after flushing the caches.
+        assert git.get_commit_hash_by_revision(AnyRevision('develop~0')) == new_develop_commit_hash
+        assert git.get_commit_hash_by_revision(AnyRevision('develop')) == new_develop_commit_hash
+        assert git.get_tree_hash_by_commit_hash(FullCommitHash.of(new_develop_commit_hash)) == new_develop_tree_hash
+        assert git.get_tree_hash_by_commit_hash(FullCommitHash.of(develop_commit_hash)) == develop_tree_hash
+
+    def test_compute_ancestry(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("root")
+                .commit("root")
+                .new_branch("develop")
+                .commit("develop commit")
+                .new_branch("feature-1")
+                .commit("feature-1 commit")
+                .check_out("develop")
+                .new_branch("feature-2")
+                .commit("feature-2 commit")
+                .check_out("root")
+                .new_branch("hotfix")
+                .commit("hotfix commit")
+                .check_out("feature-1")
+                .execute("git merge --no-edit feature-2~0")
+                .check_out("feature-2")
+                .execute("git merge --no-edit feature-1~1")
+        )
+        # The criss-cross merges above make feature-1 and feature-2 have two merge-bases.
+        branches = ["root", "develop", "feature-1", "feature-2", "hotfix"]
+        pairs = [(AnyRevision(branch1), AnyRevision(branch2)) for branch1 in branches for branch2 in branches]
+
+        git = GitContext()
+        git.compute_ancestry(pairs)
+        popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+        for branch1, branch2 in pairs:
+            assert git.is_ancestor_or_equal(branch1, branch2) is \
+                   self.repo_sandbox.is_ancestor_or_equal(LocalBranchShortName(branch1), LocalBranchShortName(branch2))
+        # Only the merge-base of the criss-crossed feature-1 and feature-2 should need to be resolved via `git merge-base`.
+        assert [call.args[1] for call in popen_cmd_spy.call_args_list] == ["merge-base"]
+
+    def test_merge_base_resolved_via_commit_graph(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("root")
+                .commit("root")
+                .new_branch("develop")
+                .commit("develop commit")
+                .new_branch("feature-1")
+                .commit("feature-1 commit")
+                .check_out("develop")
+                .new_branch("feature-2")
+                .commit("feature-2 commit")
+                .execute("git merge --no-edit feature-1")
+                .check_out("root")
+                .new_branch("hotfix")
+                .commit("hotfix commit")
+                .execute("git commit-graph write --reachable")
+                .new_branch("not-in-commit-graph")
+                .commit("not-in-commit-graph commit")
+                .execute("git checkout --orphan unrelated")
+                .commit("unrelated commit")
+        )
+        branches = ["root", "develop", "feature-1", "feature-2", "hotfix", "not-in-commit-graph", "unrelated"]
+        popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+
+        git = GitContext()
+        for branch1 in branches:
+            for branch2 in branches:
+                revision1, revision2 = AnyRevision(branch1), AnyRevision(branch2)
+                expected_merge_base = self.repo_sandbox.popen(f"git merge-base {branch1} {branch2} || true")
+                assert git.get_merge_base(revision1, revision2) == (expected_merge_base or None)
+        # Only the pairs involving the commits that aren't covered by the commit-graph should need `git merge-base`.
+        merge_base_calls = [call.args[2:] for call in popen_cmd_spy.call_args_list if call.args[1] == "merge-base"]
+        assert len(merge_base_calls) == 2 * (len(branches) - 1) - 1
+
+    def test_get_log_hashes_lazily(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit_n_times(20)
+                .execute("git commit-graph write --reachable")
+        )
+        master_commit_hash = FullCommitHash.of(self.repo_sandbox.get_commit_hash("master"))
+        expected_log_hashes = self.repo_sandbox.popen("git log --format=%H master").splitlines()
+
+        spawn_cmd_spy = mocker.spy(utils, 'spawn_cmd')
+        git = GitContext()
+        log_hashes_iterator = git.get_log_hashes_lazily(master_commit_hash)
+        assert [next(log_hashes_iterator) for _ in range(5)] == expected_log_hashes[:5]
+        log_hashes_iterator.close()
+        # The `git log` process should be killed as soon as the consumer stops iterating.
+        assert spawn_cmd_spy.spy_return.returncode is not None
+
+        # Already read hashes should be taken from the memoized prefix, with only the remaining part of the history read from git
+        # (starting from the last commit read, as the history is linear).
+        assert list(git.get_log_hashes_lazily(master_commit_hash)) == expected_log_hashes
+        assert spawn_cmd_spy.call_count == 2
+        assert spawn_cmd_spy.call_args.args[-1] == expected_log_hashes[4]
+
+        assert list(git.get_log_hashes_lazily(master_commit_hash)) == expected_log_hashes
+        assert spawn_cmd_spy.call_count == 2
+
+    def test_get_log_hashes_lazily_with_shared_history(self) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit_n_times(5)
+                .new_branch("develop")
+                .commit_n_times(3)
+                .check_out("master")
+                .commit_n_times(2)
+                .merge("develop")
+                .commit_n_times(2)
+                .new_branch("feature")
+                .commit_n_times(2)
+                .check_out("develop")
+                .commit_n_times(2)
+                .new_branch("hotfix")
+                .commit()
+        )
+        branches = ["master", "develop", "feature", "hotfix"]
+        for with_commit_graph in (False, True):
+            if with_commit_graph:
+                self.repo_sandbox.execute("git commit-graph write --reachable")
+            git = GitContext()
+            for branch in branches + list(reversed(branches)):
+                expected_log_hashes = self.repo_sandbox.popen(f"git log --format=%H {branch}").splitlines()
+                branch_commit_hash = FullCommitHash.of(self.repo_sandbox.get_commit_hash(branch))
+                assert list(git.get_log_hashes_lazily(branch_commit_hash)) == expected_log_hashes
+
+    def test_reflogs_read_from_files(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .push()
+                .new_branch("develop")
+                .commit("develop commit")
+                .push()
+                .commit("develop commit 2")
+                .execute("git reset --hard HEAD~1")
+                .new_branch("feature/nested")
+                .commit("feature commit")
+                .execute("git branch -m feature/nested feature/renamed")
+                .execute("git commit --allow-empty -m 'message  with\ttab'")
+        )
+        branches = ["refs/heads/master", "refs/heads/develop", "refs/heads/feature/renamed",
+                    "refs/remotes/origin/master", "refs/remotes/origin/develop", "refs/heads/no-such-branch"]
+
+        def get_expected_reflog(branch: str) -> List[GitReflogEntry]:
+            output = self.repo_sandbox.popen(f"git reflog show --format=%H:%gs {branch} -- 2>/dev/null || true")
+            return [GitReflogEntry(hash=FullCommitHash.of(hash), reflog_subject=subject)
+                    for hash, subject in (line.split(":", 1) for line in output.splitlines())]
+
+        popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+        git = GitContext()
+        for branch in branches:
+            assert git.get_reflog(AnyBranchName.of(branch)) == get_expected_reflog(branch)
+        assert "reflog" not in [call.args[1] for call in popen_cmd_spy.call_args_list]
+
+        # Reflog files are not available with reftable, so `git reflog show` needs to be used instead.
+        self.repo_sandbox.set_git_config_key("extensions.refStorage", "reftable")
+        popen_cmd_spy.reset_mock()
+        git = GitContext()
+        for branch in branches:
+            assert git.get_reflog(AnyBranchName.of(branch)) == get_expected_reflog(branch)
+        assert "reflog" in [call.args[1] for call in popen_cmd_spy.call_args_list]
+
+    def test_refs_read_from_files(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .push()
+                .new_branch("develop")
+                .commit("develop commit")
+                .push(tracking_branch="remote-develop")
+                .new_branch("feature/nested")
+                .commit("feature commit")
+                .push()
+                .execute("git remote set-head origin master")
+                .execute("git pack-refs --all")
+                .new_branch("loose")
+                .commit("loose commit")
+                .execute("git update-ref refs/heads/master HEAD")
+                .execute("git config branch.loose.remote .")
+                .execute("git config branch.loose.merge refs/heads/develop")
+        )
+
+        def get_expected_counterpart(branch: str) -> Optional[str]:
+            upstream = self.repo_sandbox.popen(f'git for-each-ref "--format=%(upstream:short)" refs/heads/{branch}')
+            return upstream if upstream.startswith("origin/") else None
+
+        for ref_storage in ("files", "reftable"):
+            self.repo_sandbox.set_git_config_key("extensions.refStorage", ref_storage)
+            popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+            git = GitContext()
+            local_branches = self.repo_sandbox.get_local_branches()
+            assert git.get_local_branches() == local_branches
+            remote_branches = self.repo_sandbox.popen('git for-each-ref "--format=%(refname:short)" refs/remotes').splitlines()
+            assert git.get_remote_branches() == remote_branches
+            for branch in local_branches:
+                local_branch = LocalBranchShortName.of(branch)
+                assert git.get_commit_hash_by_revision(local_branch) == self.repo_sandbox.get_commit_hash(branch)
+                assert git.get_strict_counterpart_for_fetching_of_branch(local_branch) == get_expected_counterpart(branch)
+            # With reftable, there are no plain ref files to read, so `git for-each-ref` needs to be used instead.
+            assert ("for-each-ref" in [call.args[1] for call in popen_cmd_spy.call_args_list]) == (ref_storage == "reftable")
+            mocker.stopall()
+
+    def test_remote_branch_lookups(self) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .push()
+                .add_remote("fork/nested", self.repo_sandbox.remote_path)
+                .push(remote="fork/nested", set_upstream=False)
+                .new_branch("develop")
+                .commit("develop commit")
+                .push(set_upstream=False)
+                .new_branch("local-only")
+                .commit("local-only commit")
+        )
+        git = GitContext()
+        assert git.is_local_branch(LocalBranchShortName.of("develop"))
+        assert not git.is_local_branch(LocalBranchShortName.of("origin/develop"))
+        assert git.is_remote_branch(RemoteBranchShortName.of("fork/nested/master"))
+        assert not git.is_remote_branch(RemoteBranchShortName.of("fork/nested/develop"))
+
+        # `master` exists in both remotes, but tracks the one in `origin`.
+        assert git.get_sole_remote_branch(LocalBranchShortName.of("master")) is None
+        assert git.get_combined_counterpart_for_fetching_of_branch(LocalBranchShortName.of("master")) == "origin/master"
+        assert git.get_sole_remote_branch(LocalBranchShortName.of("develop")) == "origin/develop"
+        assert git.get_combined_counterpart_for_fetching_of_branch(LocalBranchShortName.of("develop")) == "origin/develop"
+        assert git.get_inferred_remote_for_fetching_of_branch(LocalBranchShortName.of("develop")) == "origin"
+        assert git.get_sole_remote_branch(LocalBranchShortName.of("local-only")) is None
+        assert git.get_combined_counterpart_for_fetching_of_branch(LocalBranchShortName.of("local-only")) is None
+
+    def test_remote_branches_loaded_in_scope(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .push()
+                .new_branch("unrelated")
+                .commit("unrelated commit")
+                .push(tracking_branch="unrelated-remote")
+                .check_out("master")
+                .delete_branch("unrelated")
+                .new_branch("develop")
+                .commit("develop commit")
+                .push(set_upstream=False)
+        )
+
+        for ref_storage in ("files", "reftable"):
+            self.repo_sandbox.set_git_config_key("extensions.refStorage", ref_storage)
+            popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+            git = GitContext()
+            assert git.get_combined_counterpart_for_fetching_of_branch(LocalBranchShortName.of("master")) == "origin/master"
+            assert git.get_combined_counterpart_for_fetching_of_branch(LocalBranchShortName.of("develop")) == "origin/develop"
+            # Remote branches that can't be counterparts of any local branch are only looked up on demand...
+            for_each_ref_args = [call.args[2:] for call in popen_cmd_spy.call_args_list if call.args[1] == "for-each-ref"]
+            assert ("--format=%(refname)\t%(objectname)", "refs/remotes") not in for_each_ref_args
+            assert git.is_remote_branch(RemoteBranchShortName.of("origin/unrelated-remote"))
+            assert not git.is_remote_branch(RemoteBranchShortName.of("origin/unrelated"))
+            # ... or when all of them need to be listed.
+            assert git.get_remote_branches() == ["origin/develop", "origin/master", "origin/unrelated-remote"]
+            mocker.stopall()
+
+    def test_config_read_from_files(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("feature/nested")
+                .commit("feature commit")
+        )
+        global_config_dir = mkdtemp()
+        global_config_path = os.path.join(global_config_dir, "gitconfig")
+        with open(global_config_path, "w") as global_config:
+            global_config.write(
+                '[Machete "Sub.Section"]  # comment\n'
+                '\tKey = "quoted ; value"  ; comment\n'
+                '\tmulti = 1\n'
+                '[machete.deprecated]\n'
+                '\tcontinued = a\\\n'
+                '\t  b\\tc\n'
+                '[include]\n'
+                '\tpath = included\n'
+                '[includeIf "onbranch:feature/"]\n'
+                '\tpath = included-on-feature\n'
+                '[includeIf "onbranch:master"]\n'
+                '\tpath = included-on-master\n'
+                f'[includeIf "gitdir:{self.repo_sandbox.local_path}/"]\n'
+                '\tpath = included-in-sandbox\n')
+        for file_name, section in (("included", "included"), ("included-on-feature", "feature"),
+                                   ("included-on-master", "master"), ("included-in-sandbox", "sandbox")):
+            with open(os.path.join(global_config_dir, file_name), "w") as included_config:
+                included_config.write(f"[machete \"Sub.Section\"]\n\tmulti = {section}\n")
+        self.repo_sandbox.set_git_config_key("machete.Sub.Section.multi", "local")
+        keys = ["machete.Sub.Section.key", "machete.sub.section.key", "MACHETE.Sub.Section.MULTI", "machete.deprecated.continued"]
+
+        def get_expected_values(key: str) -> List[str]:
+            return self.repo_sandbox.popen(f"git config --get-all {key}").splitlines()
+
+        mocker.patch.dict(os.environ, {"GIT_CONFIG_GLOBAL": global_config_path, "GIT_CONFIG_NOSYSTEM": "1"})
+        popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+        git = GitContext()
+        for key in keys:
+            assert git.get_config_attr_values(key) == get_expected_values(key)
+        assert git.get_config_attr_values("machete.Sub.Section.multi") == ["1", "included", "feature", "sandbox", "local"]
+        assert "config" not in [call.args[1] for call in popen_cmd_spy.call_args_list]
+
+        # Config entries passed via `git -c` are only visible to `git config --list`.
+        mocker.patch.dict(os.environ, {"GIT_CONFIG_PARAMETERS": "'machete.sub.section.key=from-command-line'"})
+        git = GitContext()
+        assert git.get_config_attr_or_none("machete.Sub.Section.key") == "quoted ; value"
+        assert git.get_config_attr_or_none("machete.sub.section.key") == "from-command-line"
+        assert "config" in [call.args[1] for call in popen_cmd_spy.call_args_list]
+
+    def test_repository_located_with_a_single_git_process(self, mocker: MockerFixture) -> None:
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("develop")
+                .commit("develop commit")
+                .add_remote("upstream", "https://example.com/upstream.git")
+                .set_git_config_key("remote.no-url.skipDefaultUpdate", "true")
+        )
+        body: str = \
+            """
+            master
+                develop
+            """
+        rewrite_definition_file(body)
+
+        popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+        assert launch_command("show", "up") == "master\n"
+        assert [call.args[1] for call in popen_cmd_spy.call_args_list] == ["rev-parse"]
+
+        git = GitContext()
+        assert git.get_current_branch() == "develop"
+        assert git.get_root_dir() == self.repo_sandbox.popen("git rev-parse --show-toplevel")
+        assert git.get_remotes() == self.repo_sandbox.popen("git remote").splitlines()
+        popen_cmd_spy.reset_mock()
+        git_version = git.get_git_version()
+        assert git_version == self.repo_sandbox.get_git_version()
+        assert [call.args[1] for call in popen_cmd_spy.call_args_list] == ["version"]
+
+        # The version is cached across the runs, as long as the git executable stays the same.
+        popen_cmd_spy.reset_mock()
+        assert GitContext().get_git_version() == git_version
+        assert [call.args[1] for call in popen_cmd_spy.call_args_list] == ["rev-parse"]
+
+        self.repo_sandbox.execute("git checkout --detach")
+        assert GitContext().get_current_branch_or_none() is None
@@ -164,7 +164,8 @@ class TestGitHub(BaseTest):
                            "__get_token_from_hub(cls=<class 'git_machete.github.GitHubToken'>, domain=github.com): "
                            "4. Trying to authenticate via `hub` GitHub CLI..."]
 
-        assert launch_command('github', 'anno-prs', '--debug').splitlines()[8:12] == expected_output
+        debug_output = launch_command('github', 'anno-prs', '--debug').splitlines()
+        assert [line for line in debug_output if "Trying to authenticate via" in line] == expected_output
 
     def test_github_get_token_from_env_var(self) -> None:
         with overridden_environment(GITHUB_TOKEN='github_token_from_env_var'):
@@ -0,0 +1,81 @@
+import io
+import os
+import pstats
+import re
+from contextlib import redirect_stderr
+
+import pytest
+
+from git_machete import cli, profiling
+
+from .base_test import BaseTest
+from .mockers import (assert_failure, launch_command, overridden_environment,
+                      rewrite_definition_file)
+
+
+class TestProfiling(BaseTest):
+
+    def setup_method(self) -> None:
+        super().setup_method()
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("develop")
+                .commit("develop commit")
+        )
+        rewrite_definition_file("master\n  develop")
+
+    def test_cpu_profile(self) -> None:
+        """
+        Verify that `--profile` prints the functions that took the most time after the output of the command,
+        and saves the full profile in pstats format
+        """
+        status_output = launch_command("status")
+
+        output = launch_command("--profile", "status", "--jobs=4")
+
+        assert output.startswith(status_output)
+        assert "Top 30 functions by cumulative time:" in output
+        assert "(status)" in output
+        stats_file_match = re.search("Full profile saved to (.*), inspect it with", output)
+        assert stats_file_match
+        stats_file_path = stats_file_match.group(1)
+        assert any(function_name == "status" for _, _, function_name in pstats.Stats(stats_file_path).stats)  # type: ignore[attr-defined]
+        os.remove(stats_file_path)
+        assert not profiling.is_cpu_profiling_enabled
+
+    def test_memory_profile(self) -> None:
+        """
+        Verify that `--profile=mem` (or `GIT_MACHETE_PROFILE=mem`) prints the peak memory usage and the top allocation sites
+        """
+        for output in (launch_command("--profile=mem", "status"), launch_command("status", "--profile=mem"),
+                       launch_command("--profile", "mem", "status")):
+            assert "Peak allocated memory: " in output
+            assert "Top 30 allocation sites of the memory allocated at the end:" in output
+            assert re.search(r"\d+ blocks  .*git_machete.*\.py:\d+", output)
+
+        with overridden_environment(GIT_MACHETE_PROFILE="mem"):
+            assert "Peak allocated memory: " in launch_command("status")
+
+    def test_profile_with_invalid_arguments(self) -> None:
+        """
+        Verify that invalid arguments are reported (with `--profile[=cpu|mem]` in the usage line) without running the profiler
+        """
+        for args in (["--profile", "disk", "status"], ["status", "--profile=disk"], ["status", "--no-such-option", "--profile"]):
+            with io.StringIO() as out:
+                with redirect_stderr(out):
+                    with pytest.raises(SystemExit):
+                        cli.launch(args)
+                output = out.getvalue()
+            assert "error: " in output
+            assert "Top 30 functions by cumulative time:" not in output
+            if args[0] == "--profile":
+                assert output.startswith("usage: git machete [--debug] [-h] [--profile[=cpu|mem]] ")
+        assert not profiling.is_cpu_profiling_enabled
+
+    def test_invalid_profile_mode_in_environment(self) -> None:
+        """
+        Verify that an invalid value of `GIT_MACHETE_PROFILE` is reported
+        """
+        with overridden_environment(GIT_MACHETE_PROFILE="disk"):
+            assert_failure(["status"], "Invalid value of GIT_MACHETE_PROFILE environment variable: disk. Valid values: cpu, mem.")
@@ -210,6 +210,82 @@ class TestStatus(BaseTest):
             """
         )
 
+    def test_status_jobs(self) -> None:
+        (
+            self.repo_sandbox.new_branch("root")
+            .commit("root")
+            .push()
+            .new_branch("develop")
+            .commit("develop")
+            .push()
+            .new_branch("feature-1")
+            .commit("feature_1")
+            .push()
+            .new_branch("child")
+            .commit("child")
+            .check_out("develop")
+            .new_branch("feature-2")
+            .commit("feature_2")
+            .commit("feature_2_more")
+            .push()
+            .check_out("develop")
+            .execute("git merge --squash feature-2")
+            .execute("git commit -m squash_feature_2")
+            .new_branch("feature-3")
+            .commit("feature_3")
+        )
+        body: str = \
+            """
+            root
+                develop
+                    feature-1
+                        child
+                    feature-2
+                    feature-3
+            """
+        rewrite_definition_file(body)
+        self.repo_sandbox.write_to_file(".git/hooks/machete-status-branch", "#!/bin/sh\necho \"[$1]\"")
+        self.repo_sandbox.set_file_executable(".git/hooks/machete-status-branch")
+
+        expected_status_output = (
+            """
+            root  [root]
+            |
+            | develop
+            | squash_feature_2
+            o-develop (ahead of origin)  [develop]
+              |
+              | feature_1
+              x-feature-1  [feature-1]
+              | |
+              | | child
+              | o-child (untracked)  [child]
+              |
+              m-feature-2  [feature-2]
+              |
+              | feature_3
+              o-feature-3 * (untracked)  [feature-3]
+            """
+        )
+        # The output must not depend on how many branches are processed concurrently.
+        assert_success(["status", "-l", "--jobs=1"], expected_status_output)
+        assert_success(["status", "-l", "--jobs=4"], expected_status_output)
+        self.repo_sandbox.set_git_config_key("machete.jobs", "3")
+        assert_success(["status", "-l"], expected_status_output)
+
+        # Unlike the git queries, the hook is run for one branch at a time, in the order of the output.
+        hook_log_path = f"{mkdtemp()}/hook.log"
+        self.repo_sandbox.write_to_file(".git/hooks/machete-status-branch",
+                                        f"#!/bin/sh\nmkdir {hook_log_path}.lock || echo overlap >> {hook_log_path}\n"
+                                        f"echo $1 >> {hook_log_path}\nsleep 0.05\nrmdir {hook_log_path}.lock")
+        launch_command("status", "--jobs=4")
+        with open(hook_log_path) as hook_log:
+            assert hook_log.read().split() == ["root", "develop", "feature-1", "child", "feature-2", "feature-3"]
+
+        assert_failure(["status", "--jobs=0"], "Invalid argument for --jobs. Expected a positive integer.")
+        self.repo_sandbox.set_git_config_key("machete.jobs", "many")
+        assert_failure(["status"], "Invalid value for machete.jobs git config key: many. Expected a positive integer.")
+
     def test_extra_space_before_branch_name(self) -> None:
         (
             self.repo_sandbox
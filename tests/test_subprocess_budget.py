@@ -0,0 +1,92 @@
+from collections import Counter
+from typing import List, Tuple
+
+import pytest
+from pytest_mock import MockerFixture
+
+from git_machete import utils
+
+from .base_test import BaseTest
+from .mockers import launch_command, rewrite_definition_file
+
+STACK_COUNT = 10
+STACK_DEPTH = 5
+
+
+def get_subprocess_name(argv: Tuple[str, ...]) -> str:
+    return f"git {argv[1]}" if argv[0] == "git" and len(argv) > 1 else argv[0]
+
+
+def format_budget_failure(args: List[str], argvs: List[Tuple[str, ...]], budget: int) -> str:
+    breakdown = Counter(get_subprocess_name(argv) for argv in argvs).most_common()
+    return "\n".join(
+        [f"`git machete {' '.join(args)}` spawned {len(argvs)} subprocesses, over the budget of {budget}:"] +
+        [f"{count:>6}  {name}" for name, count in breakdown] +
+        ["All spawned subprocesses:"] +
+        ["    " + " ".join(argv) for argv in argvs])
+
+
+class TestSubprocessBudget(BaseTest):
+
+    def setup_method(self) -> None:
+        super().setup_method()
+        # 50 branches in 10 stacks of 5 branches each, all pushed, with master moved forward after the stacks got forked off.
+        self.stacks: List[List[str]] = [[f"stack-{stack}-{depth}" for depth in range(STACK_DEPTH)] for stack in range(STACK_COUNT)]
+        script = ["git checkout -q -b master", "git commit -q --allow-empty -m 'master commit'"]
+        for stack in self.stacks:
+            script.append("git checkout -q master")
+            for branch in stack:
+                # Each branch changes its own file, so that no branch looks squash-merged into its parent.
+                script += [f"git checkout -q -b {branch}", f"echo {branch} > {branch}.txt",
+                           f"git add {branch}.txt", f"git commit -q -m '{branch} commit'"]
+        script += ["git checkout -q master", "echo master > master.txt", "git add master.txt",
+                   "git commit -q -m 'another master commit'", "git push -q --all origin"]
+        self.repo_sandbox.execute(" && ".join(script))
+        rewrite_definition_file("master\n" + "".join("  " * (depth + 1) + branch + "\n"
+                                                     for stack in self.stacks for depth, branch in enumerate(stack)))
+
+    @staticmethod
+    def launch_command_and_get_subprocesses(mocker: MockerFixture, *args: str) -> List[Tuple[str, ...]]:
+        spies = [mocker.spy(utils, name) for name in ('_popen_cmd', '_run_cmd', '_spawn_cmd')]
+        launch_command(*args)
+        return [tuple(call.args) for spy in spies for call in spy.call_args_list]
+
+    # The budgets are the subprocess counts measured when the given budget was last lowered.
+    # If a change makes a command exceed its budget, either avoid the extra git calls
+    # or (if they're really needed) raise the budget in the same change, so that the increase gets reviewed.
+    @pytest.mark.parametrize("args, budget", [
+        (["status"], 16),
+        (["status", "--list-commits"], 67),
+        (["discover", "--yes"], 18),
+        (["traverse", "--yes", "--no-push", "--no-push-untracked"], 548),
+        (["slide-out", "stack-0-0"], 9),
+        (["fork-point", "stack-0-1"], 5),
+        (["list", "slidable"], 1),
+        (["list", "addable"], 1),
+        (["show", "up", "stack-0-1"], 1),
+        (["is-managed", "stack-0-1"], 1),
+    ])
+    def test_subprocess_budget(self, mocker: MockerFixture, args: List[str], budget: int) -> None:
+        """
+        Verify that the given command, run on a 50-branch tree, spawns at most the given number of subprocesses
+        """
+        argvs = self.launch_command_and_get_subprocesses(mocker, *args)
+        if len(argvs) > budget:
+            pytest.fail(format_budget_failure(args, argvs, budget), pytrace=False)
+
+    def test_format_budget_failure(self) -> None:
+        """
+        Verify that the budget failure message includes the breakdown of the spawned subprocesses (the most common ones first)
+        """
+        argvs = [("git", "log", "-1", "master"), ("git", "merge-base", "a", "b"), ("git", "log", "-1", "develop"), ("gh", "pr", "list")]
+        assert format_budget_failure(["status"], argvs, 3) == (
+            "`git machete status` spawned 4 subprocesses, over the budget of 3:\n"
+            "     2  git log\n"
+            "     1  git merge-base\n"
+            "     1  gh\n"
+            "All spawned subprocesses:\n"
+            "    git log -1 master\n"
+            "    git merge-base a b\n"
+            "    git log -1 develop\n"
+            "    gh pr list"
+        )
@@ -0,0 +1,127 @@
+import json
+import os
+from tempfile import mkdtemp
+from typing import Any, Dict, List
+
+from pytest_mock import MockerFixture
+
+from git_machete import tracing, utils
+
+from .base_test import BaseTest
+from .mockers import (launch_command, overridden_environment,
+                      rewrite_definition_file)
+from .mockers_github import (MockGitHubAPIState,
+                             mock_github_token_for_domain_fake,
+                             mock_repository_info, mock_urlopen)
+
+
+def read_trace_events(trace_file_path: str) -> List[Dict[str, Any]]:
+    with open(trace_file_path) as trace_file:
+        events: List[Dict[str, Any]] = json.load(trace_file)["traceEvents"]
+    return events
+
+
+class TestTracing(BaseTest):
+
+    def test_trace_of_git_commands(self, mocker: MockerFixture) -> None:
+        """
+        Verify that `--trace` records every executed git command along with its timing, exit code, output size
+        and the operation that executed it, and writes all of that in Chrome trace event format
+        """
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .new_branch("develop")
+                .commit("develop commit")
+        )
+        rewrite_definition_file("master\n  develop")
+        _popen_cmd_spy = mocker.spy(utils, '_popen_cmd')
+        _spawn_cmd_spy = mocker.spy(utils, '_spawn_cmd')
+        trace_file_path = os.path.join(mkdtemp(), "trace.json")
+
+        launch_command("--trace=" + trace_file_path, "status", "--list-commits")
+
+        events = read_trace_events(trace_file_path)
+        assert events[0] == {"name": "process_name", "ph": "M", "pid": os.getpid(),
+                             "args": {"name": f"git machete --trace={trace_file_path} status --list-commits"}}
+        command_event = events[1]
+        assert command_event["cat"] == "command"
+        assert command_event["name"] == f"git machete --trace={trace_file_path} status --list-commits"
+
+        subprocess_events = events[2:]
+        # The processes that are talked to while they're running (rather than just run to completion) are traced once they're closed.
+        spawned_argvs = [list(call.args) for call in _spawn_cmd_spy.call_args_list]
+        assert any(argv[:2] == ["git", "cat-file"] for argv in spawned_argvs)
+        assert any(argv[:3] == ["git", "log", "--format=%H %P"] for argv in spawned_argvs)
+        assert sorted(event["args"]["argv"] for event in subprocess_events) == \
+            sorted([list(call.args) for call in _popen_cmd_spy.call_args_list] + spawned_argvs)
+        for event in subprocess_events:
+            assert event["cat"] == "subprocess"
+            assert event["ph"] == "X"
+            assert event["name"] == "git " + event["args"]["argv"][1]
+            if event["args"]["argv"] in spawned_argvs:
+                # Unless its entire output has been read, the streamed `git log` gets killed.
+                assert event["args"]["exit_code"] in (0, -9)
+                assert event["args"]["stdout_bytes"] > 0
+            else:
+                assert event["args"]["exit_code"] == 0
+                assert event["args"]["stderr_bytes"] == 0
+            assert command_event["ts"] <= event["ts"]
+            assert event["ts"] + event["dur"] <= command_event["ts"] + command_event["dur"]
+        git_log_events = [event for event in subprocess_events if event["name"] == "git log"]
+        assert git_log_events
+        assert {event["args"]["operation"] for event in git_log_events} == {"MacheteClient.status"}
+        assert sum(event["args"]["stdout_bytes"] for event in git_log_events) > 0
+        assert not tracing.is_enabled()
+
+    def test_trace_enabled_with_environment_variable(self) -> None:
+        """
+        Verify that the trace is written to the file pointed by `GIT_MACHETE_TRACE`, and nothing is written when tracing is not enabled
+        """
+        trace_file_path = os.path.join(mkdtemp(), "trace.json")
+        launch_command("file")
+        assert not os.path.exists(trace_file_path)
+
+        with overridden_environment(GIT_MACHETE_TRACE=trace_file_path):
+            launch_command("file")
+        assert [event["name"] for event in read_trace_events(trace_file_path)] == ["process_name", "git machete file", "git rev-parse"]
+        assert not tracing.is_enabled()
+
+    def test_trace_of_github_api_requests(self, mocker: MockerFixture) -> None:
+        """
+        Verify that `--trace` records GitHub API requests, without the token
+        """
+        self.patch_symbol(mocker, 'git_machete.github.GitHubToken.for_domain', mock_github_token_for_domain_fake)
+        self.patch_symbol(mocker, 'urllib.request.urlopen', mock_urlopen(MockGitHubAPIState([{
+            'head': {'ref': 'develop', 'repo': mock_repository_info},
+            'user': {'login': 'github_user'},
+            'base': {'ref': 'master'},
+            'number': '7',
+            'html_url': 'www.github.com',
+            'state': 'open'
+        }])))
+        (
+            self.repo_sandbox.new_branch("master")
+                .commit("master commit")
+                .push()
+                .new_branch("develop")
+                .commit("develop commit")
+                .push()
+                .add_remote('new_origin', 'https://github.com/user/repo.git')
+        )
+        rewrite_definition_file("master\n  develop")
+        trace_file_path = os.path.join(mkdtemp(), "trace.json")
+
+        launch_command("github", "anno-prs", "--trace", trace_file_path)
+
+        with open(trace_file_path) as trace_file:
+            assert "ghp_dummy_token" not in trace_file.read()
+        http_events = [event for event in read_trace_events(trace_file_path) if event.get("cat") == "http"]
+        assert [event["name"] for event in http_events] == [
+            "GET https://api.github.com/user",
+            "GET https://api.github.com/repos/user/repo/pulls?per_page=100"
+        ]
+        for event in http_events:
+            assert event["args"]["status"] == 200
+            assert event["args"]["response_bytes"] > 0
+            assert event["args"]["operation"] == "MacheteClient.sync_annotations_to_github_prs"
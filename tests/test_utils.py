@@ -1,16 +1,20 @@
+from pytest import CaptureFixture
+from pytest_mock import MockerFixture
+
 from git_machete import utils
 
+from .mockers import mock__popen_cmd_with_fixed_results
+
 
 class TestUtils:
 
-    def test_fmt(self) -> None:
+    def test_fmt(self, mocker: MockerFixture) -> None:
         """
         Verify behaviour of a Utils fmt() function
         """
 
         utils.ascii_only = False
-        utils.AnsiEscapeCodes.UNDERLINE = '\033[4m'
-        utils.AnsiEscapeCodes.RED = '\033[91m'
+        mocker.patch('git_machete.utils.is_terminal_fully_fledged', lambda: True)
 
         input_string = '<red> red <yellow>yellow <b>yellow_bold</b> `yellow_underlined` yellow <green>green </green> default' \
                        ' <dim> dimmed </dim></yellow> <green>green `green_underlined`</green> default</red>'
@@ -20,3 +24,56 @@ class TestUtils:
         ansi_string = utils.fmt(input_string)
 
         assert ansi_string == expected_ansi_string
+
+    def test_terminal_colors_detected_lazily(self, mocker: MockerFixture) -> None:
+        """
+        Verify that the number of colors supported by the terminal is only checked upon the first colored output,
+        and that `tput` is only run when it can't be inferred from the environment
+        """
+
+        utils.ascii_only = False
+        popen_cmd_spy = mocker.spy(utils, 'popen_cmd')
+        for term, colorterm, expected_red in (("xterm-256color", "", '\033[91m'), ("xterm", "truecolor", '\033[91m'),
+                                              ("xterm", "", '\033[31m'), ("", "", '\033[31m')):
+            mocker.patch.dict('os.environ', {"TERM": term, "COLORTERM": colorterm})
+            mocker.patch('git_machete.utils._is_terminal_fully_fledged_cached', None)
+            assert utils.bold("no colors needed") == '\033[1mno colors needed\033[22m'
+            assert utils._is_terminal_fully_fledged_cached is None
+            assert utils.colored("red", utils.AnsiEscapeCodes.RED) == expected_red + 'red\033[0m'
+            assert utils.colored("red again", utils.AnsiEscapeCodes.RED) == expected_red + 'red again\033[0m'
+        assert popen_cmd_spy.call_count == 0
+
+        mocker.patch.dict('os.environ', {"TERM": "some-exotic-terminal", "COLORTERM": ""})
+        mocker.patch('git_machete.utils._is_terminal_fully_fledged_cached', None)
+        mocker.patch('git_machete.utils.popen_cmd', mock__popen_cmd_with_fixed_results((0, "256\n", "")))
+        assert utils.colored("red", utils.AnsiEscapeCodes.RED) == '\033[91mred\033[0m'
+
+    def test_debug(self, mocker: MockerFixture, capsys: CaptureFixture[str]) -> None:
+        """
+        Verify that debug messages are prefixed with the calling function and its (redacted) arguments,
+        filtered by subsystem, and only formatted when actually logged
+        """
+
+        class FailingToFormat:
+            def __str__(self) -> str:
+                raise AssertionError("should not be formatted")
+
+        def fetch_pull_requests(org: str, token: str, *_args: str, page: int = 1) -> None:  # noqa: U100
+            utils.debug("fetching page %s of %s", page, org, subsystem="github")
+            utils.debug("formatted %s", FailingToFormat(), subsystem="hooks")
+
+        utils.ascii_only = True
+        mocker.patch('git_machete.utils.debug_mode', False)
+        fetch_pull_requests("example-org", "secret")
+        assert capsys.readouterr().err == ""
+
+        mocker.patch('git_machete.utils.debug_mode', True)
+        mocker.patch('git_machete.utils.debug_subsystems', {"github"})
+        fetch_pull_requests("example-org", "ghp_123", "ignored", page=2)
+        assert capsys.readouterr().err == "fetch_pull_requests(org=example-org, token=***, page=2): fetching page 2 of example-org\n"
+        assert not utils.is_debug_enabled()
+        assert not utils.is_debug_enabled("hooks")
+
+        mocker.patch('git_machete.utils.debug_subsystems', None)
+        assert utils.is_debug_enabled()
+        assert utils.is_debug_enabled("hooks")